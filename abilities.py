@@ -4,12 +4,16 @@ Author: Caden VanV
 Version: 10/4/2024
 """
 
+import events
 import items
 
 
 class Ability:
     """Stores a unique ability.
 
+    Abilities are shared catalog entries, characters use them through an
+    AbilityState made by new_state().
+
     Attributes:
         name (str): name
         activation (str): activation type (instant, buff, reaction, passive)
@@ -23,14 +27,13 @@ class Ability:
             self targets only yourself, target_count should be 1
             team targets multiple team members
             enemy targets enemies
-        targets_cur (list): current targets
         length (int): how many turns
-        length_cur (int): how many turns currently have passed
         cooldown (int): cooldown
-        cooldown_cur (int): current cooldown after activation
-        active (bool): is the ability active
     """
 
+    __slots__ = ('name', 'activation', 'effects', 'target_count',
+                 'target_type', 'length', 'cooldown')
+
     def __init__(self, name='Bite', activation='instant',
                  effects=(0, 0, 0, 0, 10, 0), target_count=1,
                  target_type='enemy', length=1, cooldown=2):
@@ -50,12 +53,8 @@ class Ability:
         self.effects = effects
         self.target_count = target_count
         self.target_type = target_type
-        self.targets_cur = []
         self.length = length
-        self.length_cur = 0
         self.cooldown = cooldown
-        self.cooldown_cur = 0
-        self.active = False
 
     def __str__(self):
         """Print ability info.
@@ -86,6 +85,67 @@ class Ability:
             result = result[:-2]
         return result
 
+    def new_state(self):
+        """Make per-owner state for a character gaining this ability.
+
+        Returns:
+            AbilityState: fresh cooldowns for one owner
+        """
+        return AbilityState(self)
+
+
+class AbilityState:
+    """Stores one owner's use of a shared ability.
+
+    Ability objects are shared catalog entries, so everything that changes
+    in a fight lives here instead, one per character that has the ability.
+    Anything not stored here, like name or effects, is read from the
+    ability.
+
+    Attributes:
+        ability (Ability): shared definition
+        targets_cur (list): current targets
+        length_cur (int): how many turns currently have passed
+        cooldown_cur (int): current cooldown after activation
+        active (bool): is the ability active
+    """
+
+    __slots__ = ('ability', 'targets_cur', 'length_cur',
+                 'cooldown_cur', 'active')
+
+    def __init__(self, ability):
+        """Create state with nothing active or cooling down.
+
+        Args:
+            ability (Ability): shared definition
+        """
+        self.ability = ability
+        self.targets_cur = []
+        self.length_cur = 0
+        self.cooldown_cur = 0
+        self.active = False
+
+    def __getattr__(self, name):
+        """Read anything not stored per owner from the shared ability.
+
+        Args:
+            name (str): attribute name
+
+        Returns:
+            object: the ability's attribute
+        """
+        if name.startswith('__') or name in AbilityState.__slots__:
+            raise AttributeError(name)
+        return getattr(self.ability, name)
+
+    def __str__(self):
+        """Print ability info.
+
+        Returns:
+            str: ability info
+        """
+        return str(self.ability)
+
     def activate(self, user, targets):
         """Activate ability.
 
@@ -102,24 +162,21 @@ class Ability:
         self.active = True
         # Apply effects
         if self.activation != 'passive':
-            print(f'{user.name} used the ability {self.name}')
+            events.log.emit(events.ABILITY_USED, user.name, self.name)
         for target in targets:
             for i in range(len(self.effects) - 2):
                 if self.effects[i] != 0:
                     if self.effects[i] > 0:
-                        print(f'{target.name}\'s {items.bonus_order[i]} '
-                              f'was buffed by {self.effects[i]}')
+                        events.log.emit(events.BUFFED, target.name,
+                                        items.bonus_order[i], self.effects[i])
                     else:
-                        print(f'{target.name}\'s {items.bonus_order[i]} '
-                              f'was debuffed by {self.effects[i]}')
-            target.atk += self.effects[0]
-            target.ac += self.effects[1]
-            target.dge += self.effects[2]
+                        events.log.emit(events.DEBUFFED, target.name,
+                                        items.bonus_order[i], self.effects[i])
+            target.add_modifier(self, self.ability)
             target.cur_hp += self.effects[3]
-            target.max_hp += self.effects[3]
             if self.effects[4] != 0:
-                print(f'{self.name} dealt {self.effects[4]} '
-                      f'damage to {target.name}')
+                events.log.emit(events.ABILITY_DAMAGE, self.name,
+                                self.effects[4], target.name)
                 target.take_damage(self.effects[4])
             if self.effects[5] != 0:
                 target.heal(self.effects[5])
@@ -135,18 +192,15 @@ class Ability:
                 for i in range(len(self.effects) - 2):
                     if self.effects[i] != 0:
                         if self.effects[i] > 0:
-                            print(f'The buff on {target.name}\'s '
-                                  f'{items.bonus_order[i]} '
-                                  f'for {self.effects[i]} wore off')
+                            events.log.emit(events.BUFF_ENDED, target.name,
+                                            items.bonus_order[i],
+                                            self.effects[i])
                         else:
-                            print(f'The debuff of {target.name}\'s '
-                                  f'{items.bonus_order[i]} '
-                                  f'for {self.effects[i]} wore off')
-            target.atk -= self.effects[0]
-            target.ac -= self.effects[1]
-            target.dge -= self.effects[2]
+                            events.log.emit(events.DEBUFF_ENDED, target.name,
+                                            items.bonus_order[i],
+                                            self.effects[i])
+            target.remove_modifier(self)
             target.take_damage(self.effects[3])
-            target.max_hp -= self.effects[3]
         self.targets_cur = []
 
     def is_usable(self):
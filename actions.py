@@ -3,60 +3,118 @@
 Author: Caden VanV
 Version: 10/4/2024
 """
-import random
+import chunks
+import entities
+import events
+import instrument
+import journal
 import map_items
 import rpg_lists
 import math
 import items
+import rng
+import save_game
+import time
 
+# Random streams, see rng.py
+_spawns = rng.stream(rng.SPAWNS)
+_combat = rng.stream(rng.COMBAT)
+# Seconds the last global turn spent in each of instrument.TURN_PHASES,
+# and 'total'
+last_turn = {}
+# Seconds spent restocking settlements so far this global turn
+_restocking = 0.0
 
-def create_world():
-    """Generate settlements, and enemies."""
-    for _i in range(random.randint(5, 10)):
-        s_pref = [pref for pref in rpg_lists.rpg_names
-                  if len(pref) <= 4]
-        s_pref = s_pref + list(rpg_lists.settlement_pref)
-        suf = random.randint(0, len(rpg_lists.settlement_suf) - 1)
-        settlement_name = f'{s_pref[random.randint(0, len(s_pref) - 1)]}'
-        settlement_name += f'{rpg_lists.settlement_suf[suf]}'
-        map_items.Settlement(settlement_name, random.randint(1000, 10000))
-    for _i in range(random.randint(30, 50)):
-        type = random.randint(0, len(rpg_lists.generic_enemy_types) - 1)
-        map_items.MonsterBand(rpg_lists.generic_enemy_types[type],
-                              1, random.randint(2, 5))
 
+def new_game():
+    """Create the player's character and start the world around them.
+
+    Returns:
+        PlayerParty: the player's party
+    """
+    main_char = entities.PlayerCharacter()
+    adv_party = map_items.PlayerParty(main_char)
+    map_items.Settlement('Startersburg', 1000, (0, 0))
+    chunks.enable()
+    return adv_party
 
-def global_turn(player, day):
+
+@instrument.timed()
+def global_turn(player, day, policy=None):
     """Global turn.
 
     Args:
         player (PlayerParty): player party
         day (int): day
+        policy (Policy): makes player decisions instead of input, optional
 
     Returns:
         int: next day number
     """
+    global _restocking
+    start = time.perf_counter()
     print(f'\n========================== Day {day} '
           '==========================')
-    # AI Turns
-    for item in map_items.map_items:
-        if item.mobile:
-            if item == player.target_move:
-                item.wander(True)
-            else:
-                item.wander(False)
-        else:
-            item.generate_items()
-            item.generate_recruitables()
-            item.wealth = int(item.wealth * ((random.random() / 10) + 0.95))
+    journal.begin_day(day)
+    # Settlements restock up to today when traded with, see restock
+    map_items.current_day = day
+    # Load chunks near the player and pack away far ones
+    if map_items.world is not None:
+        map_items.world.update(player)
+    world_done = time.perf_counter()
+    # AI Turns, the band engine moves every band at once if it's on
+    engine = map_items.engine
+    if engine is not None:
+        engine.step(player.target_move)
+    else:
+        # Bands near the player wander every day, the rest catch up on the
+        # days they missed when they're due, see Band.schedule. Grid order
+        # depends on how items moved, so draws happen in serial order,
+        # which is the same after a save is loaded
+        near = sorted((item for item in map_items.grid.items_within(
+            player.x, player.y, map_items.NEAR_RANGE) if item.mobile),
+            key=lambda item: item.serial)
+        for item in near:
+            item.catch_up(day - 1)
+        chasing = {id(item) for item in map_items.chasers()}
+        for item in near:
+            item.wander(item == player.target_move, id(item) in chasing)
+            item.last_moved = day
+        for item in sorted(map_items.due_bands.pop(day, ()),
+                           key=lambda item: item.serial):
+            # Bands that left the map or were booked again are skipped
+            if item.due_day == day and item.indexed:
+                item.catch_up(day)
+                item.schedule()
+    wander_done = time.perf_counter()
     # Add new enemy parties, level scaling every 10 days
-    type = random.randint(0, len(rpg_lists.generic_enemy_types) - 1)
+    type = _spawns.randint(0, len(rpg_lists.generic_enemy_types) - 1)
     enemy_lvl = math.ceil(day / 10)
-    if random.random() > 0.7:
+    if _spawns.random() > 0.7:
         map_items.MonsterBand(rpg_lists.generic_enemy_types[type],
-                              min(5, enemy_lvl), random.randint(2, 5))
+                              min(5, enemy_lvl), _spawns.randint(2, 5))
+    spawns_done = time.perf_counter()
+    # Show what happened overnight before the player decides anything
+    events.flush()
     # Player goes
-    select_options(player)
+    _restocking = 0.0
+    if policy is None:
+        select_options(player)
+    else:
+        policy.player_turn(player)
+    restock = _restocking
+    player_done = time.perf_counter()
+    events.flush()
+    snapshot = journal.end_day(day)
+    if snapshot is not None:
+        save_game.save(player, snapshot)
+    last_turn.clear()
+    last_turn.update(world=world_done - start,
+                     wander=wander_done - world_done,
+                     spawns=spawns_done - wander_done,
+                     restock=restock,
+                     player=player_done - spawns_done - restock,
+                     total=time.perf_counter() - start)
     # Increment day
     day += 1
     return day
@@ -70,9 +128,10 @@ def select_options(player):
     """
     can_move = True
     while True:
+        events.flush()
         # Print possible actions
         actions = get_actions(player, can_move)
-        if actions == ['party', 'rest']:
+        if actions == ['party', 'save', 'rest']:
             break
         print('-----------------\nPlayer Actions\n'
               '-----------------')
@@ -82,7 +141,7 @@ def select_options(player):
         # Pick action
         your_choice = "None"
         while your_choice.lower() not in actions:
-            your_choice = input('Select Action: ')
+            your_choice = journal.prompt('Select Action: ')
             if your_choice == 'FULL CHEAT':
                 print('CHEAT DONE')
                 for member in player.members:
@@ -107,11 +166,10 @@ def select_options(player):
             player.move_to(player.target_move)
             can_move = False
         elif your_choice.lower() == 'fight enemy':
-            enemy = next(item for item in map_items.map_items
-                         if item.x == 0 and item.y == 0 and
-                         item.mobile and item.hostile)
-            create_encounter(player, enemy)
-            break
+            enemy = pick_enemy(player)
+            if enemy is not None:
+                create_encounter(player, enemy)
+                break
         elif your_choice.lower() == 'new move':
             back = new_move(player)
             if not back == 'back':
@@ -120,6 +178,11 @@ def select_options(player):
             settlement_actions(player)
         elif your_choice.lower() == 'party':
             party_view(player)
+        elif your_choice.lower() == 'save' and journal.feed is None:
+            # Not while replaying, the player's real save is left alone
+            save_game.save(player)
+            print(f'Saved to {save_game.DEFAULT_PATH}, load it with '
+                  f'run_game.py {save_game.DEFAULT_PATH}')
 
 
 def get_actions(player, can_move):
@@ -133,21 +196,45 @@ def get_actions(player, can_move):
         list: Possible actions
     """
     actions = []
-    if any(item.x == 0 and item.y == 0 and item.mobile and item.hostile
-           for item in map_items.map_items):
+    if map_items.hostiles_at(player.x, player.y):
         actions.append('fight enemy')
-    if any(item.x == 0 and item.y == 0 and not item.mobile
-           for item in map_items.map_items):
+    if map_items.settlement_at(player.x, player.y) is not None:
         actions.append('settlement')
     if player.target_move is not None and can_move:
         actions.append('continue moving')
     if can_move:
         actions.append('new move')
     actions.append('party')
+    actions.append('save')
     actions.append('rest')
     return actions
 
 
+def pick_enemy(player):
+    """Pick which hostile band on the player's tile to fight.
+
+    Args:
+        player (PlayerParty): player party
+
+    Returns:
+        Band: band to fight, None to go back
+    """
+    enemies = map_items.hostiles_at(player.x, player.y)
+    if len(enemies) == 1:
+        return enemies[0]
+    print('-----------------\nEnemies Here\n-----------------')
+    for i, enemy in enumerate(enemies):
+        print(f'{i + 1}. {enemy.name} ({len(enemy.members)} members)')
+    while True:
+        your_choice = journal.prompt('Which band do you want to fight? (#) ')
+        if not string_not_back(your_choice):
+            return None
+        your_choice = int(your_choice) if your_choice.isdigit() else 0
+        if your_choice in range(1, len(enemies) + 1):
+            return enemies[your_choice - 1]
+        print('Invalid selection, try again')
+
+
 def new_move(player):
     """Create new movement.
 
@@ -158,24 +245,43 @@ def new_move(player):
         str: Back or not
     """
     print('-----------------\nNearby Locations\n-----------------')
-    for i, loc in enumerate(map_items.map_items):
-        if loc.calculate_dir()[0] < 50:
-            print(i, end='. ')
-            map_items.print_map_item(loc)
-    your_choice = 'None'
-    while not any(your_choice == i for i in range(len(map_items.map_items))):
-        your_choice = input('Where do you want to go? (#) ')
+    nearby = map_items.grid.nearest(player.x, player.y,
+                                    radius=map_items.TRAVEL_RANGE,
+                                    accept=lambda item: item is not player)
+    if len(nearby) == 0:
+        print('Nothing nearby')
+        return 'back'
+    for i, loc in enumerate(nearby):
+        print(i + 1, end='. ')
+        map_items.print_map_item(loc)
+    select = None
+    while select is None:
+        your_choice = journal.prompt('Where do you want to go? (#) ')
         if not string_not_back(str(your_choice)):
             return 'back'
-        your_choice = int(your_choice or 1)
-        if not any(your_choice == i for i in range(len(map_items.map_items))):
+        your_choice = int(your_choice) if your_choice.isdigit() else 0
+        if your_choice not in range(1, len(nearby) + 1):
             print('Invalid selection, try again')
         else:
-            select = map_items.map_items[your_choice]
+            select = nearby[your_choice - 1]
     player.move_to(select)
     return 'Not'
 
 
+def restock(settlement):
+    """Restock a settlement the player is about to trade with.
+
+    Time spent is added to the turn's restock phase, see last_turn.
+
+    Args:
+        settlement (Settlement): settlement being traded with
+    """
+    global _restocking
+    start = time.perf_counter()
+    settlement.restock()
+    _restocking += time.perf_counter() - start
+
+
 def settlement_actions(player):
     """Create new movement.
 
@@ -183,8 +289,8 @@ def settlement_actions(player):
         player (PlayerParty): player party
     """
     # Get the settlement
-    settlement = next(item for item in map_items.map_items
-                      if item.x == 0 and item.y == 0)
+    settlement = map_items.settlement_at(player.x, player.y)
+    restock(settlement)
     # Print out possible actions
     print(f'-----------------\n{settlement.name}\n-----------------')
     actions = ['recruit', 'shop']
@@ -196,7 +302,7 @@ def settlement_actions(player):
     # Get action selection
     select = 'None'
     while select.lower() not in actions:
-        select = input('What would you like to do? ')
+        select = journal.prompt('What would you like to do? ')
         if not string_not_back(select):
             return
         elif select.lower() not in actions:
@@ -221,8 +327,8 @@ def settlement_shop(player, settlement):
     print('What do you want to buy?')
     select = ''
     while string_not_back(select):
-        select = input('Type item name or '
-                       'type "finished" to end: ')
+        select = journal.prompt('Type item name or '
+                                'type "finished" to end: ')
         if any(select == item.name for item in settlement.shop):
             item = next(item for item in settlement.shop
                         if item.name == select)
@@ -260,8 +366,8 @@ def pick_team(player, settlement):
     print('Who Do You Want?')
     selected = []
     while len(player.members) < 5:
-        index_val = input('Enter number for character '
-                          'or type "finished" to end: ')
+        index_val = journal.prompt('Enter number for character '
+                                   'or type "finished" to end: ')
         if not string_not_back(index_val):
             break
         if index_val.isdigit():
@@ -287,12 +393,14 @@ def pick_team(player, settlement):
                                if i not in selected]
 
 
-def create_encounter(team1, team2):
+@instrument.timed()
+def create_encounter(team1, team2, policy=None):
     """Combat between 2 sides.
 
     Args:
         team1 (Band): Player side
         team2 (Band): Enemy side
+        policy (Policy): picks player character actions, optional
     """
     # Print sides
     print('----------------- Battle Lineup -----------------')
@@ -307,10 +415,10 @@ def create_encounter(team1, team2):
     turn_count = 1
     while len(team1.members) > 0 and len(team2.members) > 0:
         print(f'-----------------\nTurn {turn_count}\n-----------------')
-        take_turn(team1.members, team2.members)
+        take_turn(team1.members, team2.members, policy)
         team2.members = [char for char in team2.members if char.cur_hp > 0]
         if len(team2.members) > 0:
-            take_turn(team2.members, team1.members)
+            take_turn(team2.members, team1.members, policy)
             team1.members = [char for char in team1.members
                              if char.cur_hp > 0]
         turn_count += 1
@@ -327,11 +435,12 @@ def create_encounter(team1, team2):
             if abil.activation == 'buff' or abil.activation == 'reaction':
                 abil.deactivate()
             abil.cooldown_cur = 0
+    events.flush()
     print('\n----------------- Encounter Over -----------------')
     if len(team1.members) > 0:
         print('-----------------\nWinners - Team 1\n-----------------')
         team1.gold += team2.gold
-        map_items.map_items.remove(team2)
+        team2.leave_map()
         # Print loot
         print('Loot:')
         print(f'    {team2.gold} gold')
@@ -352,17 +461,20 @@ def create_encounter(team1, team2):
                 if abil.activation == 'buff' or abil.activation == 'reaction':
                     abil.deactivate()
                 abil.cooldown_cur = 0
+        events.flush()
     print('Survivors')
     for char in winning_team.members:
         print(f'{char.name}: {char.cur_hp:.1f}/{char.max_hp}')
 
 
-def take_turn(team, enemy_team):
+@instrument.timed()
+def take_turn(team, enemy_team, policy=None):
     """One team takes its turn.
 
     Args:
         team (list): The team going
         enemy_team (list): The team being targetted
+        policy (Policy): picks player character actions, optional
     """
     for char in team:
         # Check is player controlled or not
@@ -373,7 +485,10 @@ def take_turn(team, enemy_team):
                     abil.deactivate()
             if abil.cooldown_cur > 0:
                 abil.cooldown_cur -= 1
-        if char.player:
+        if char.player and policy is not None:
+            policy.combat_action(char, team, enemy_team)
+        elif char.player:
+            events.flush()
             act_type = 'None'
             # Potential actions on turn
             actions = ['ability', 'attack']
@@ -381,7 +496,8 @@ def take_turn(team, enemy_team):
             print(f'{char.name}\'s Turn')
             print('-----------------')
             while act_type not in actions:
-                act_type = input('Do you want to use an ability or attack? ')
+                act_type = journal.prompt(
+                    'Do you want to use an ability or attack? ')
                 # Attack enemies
                 if act_type == 'attack':
                     print('-----------------')
@@ -390,7 +506,7 @@ def take_turn(team, enemy_team):
                         print(f'{i + 1}. {enemy.name}')
                     target = -1
                     while target not in range(len(enemy_team)):
-                        target = int(input() or 1) - 1
+                        target = int(journal.prompt() or 1) - 1
                         if target in range(len(enemy_team)):
                             char.attack(enemy_team[target])
                         else:
@@ -407,12 +523,15 @@ def take_turn(team, enemy_team):
                     print('You have no usable abilities right now')
                 else:
                     print('Invalid selection, try again')
+            events.flush()
             print()
         else:  # AI actions
-            target = random.randint(0, len(enemy_team) - 1)
+            target = _combat.randint(0, len(enemy_team) - 1)
             char.attack(enemy_team[target])
         if not any(enemy.cur_hp > 0 for enemy in enemy_team):
+            events.flush()
             return
+    events.flush()
     print()
 
 
@@ -434,8 +553,8 @@ def pick_use_ability(char, team, enemy_team):
     abil_select = 'None'
     while not any(abil_select.lower() == abil.name.lower()
                   for abil in char.abilities):
-        abil_select = input('Which ability do '
-                            'you want to use? ')
+        abil_select = journal.prompt('Which ability do '
+                                     'you want to use? ')
         if not any(abil_select.lower() == abil.name.lower()
                    for abil in char.abilities):
             print('Invalid ability, try again')
@@ -461,7 +580,8 @@ def pick_use_ability(char, team, enemy_team):
                     print(f'{i + 1}. {targ.name}')
                 targ_len = min(len(abil_targets), abil.target_count)
                 while len(your_targets) < targ_len:
-                    new_tar = int(input('Who do you want to target? ') or 1) - 1
+                    new_tar = int(journal.prompt(
+                        'Who do you want to target? ') or 1) - 1
                     if ((new_tar in range(len(abil_targets)) and
                          new_tar not in your_targets_i)):
                         your_targets.append(abil_targets[new_tar])
@@ -493,7 +613,7 @@ def party_view(player):
     person = 'None'
     while not any(person.lower() == char.name.lower()
                   for char in player.members):
-        person = input('Select character: ')
+        person = journal.prompt('Select character: ')
         if not string_not_back(person):
             return
         if not any(person.lower() == char.name.lower()
@@ -506,7 +626,7 @@ def party_view(player):
             while string_not_back(select):
                 while (select.lower() != 'equip' and
                        select.lower() != 'unequip'):
-                    select = input('Equip or Unequip? ')
+                    select = journal.prompt('Equip or Unequip? ')
                     if not string_not_back(select):
                         break
                 # Unequip objects
@@ -517,7 +637,8 @@ def party_view(player):
                             print(f'     {key.capitalize()}: {val.one_line()}')
                     sel_item = ''
                     while string_not_back(sel_item):
-                        sel_item = input('Which item do you want to unequip? ')
+                        sel_item = journal.prompt(
+                            'Which item do you want to unequip? ')
                         if not string_not_back(sel_item):
                             break
                         elif not any(person.items[val] is not None and
@@ -531,7 +652,7 @@ def party_view(player):
                                         is not None and
                                         person.items[val].name.lower() ==
                                         sel_item.lower())
-                            item.unequip()
+                            item.unequip(person)
                             player.inv.append(item)
                             sel_item = ''
                         select = ''
@@ -539,7 +660,8 @@ def party_view(player):
                 elif select.lower() == 'equip':
                     sel_item = ''
                     while string_not_back(sel_item):
-                        sel_item = input('Which item do you want to equip? ')
+                        sel_item = journal.prompt(
+                            'Which item do you want to equip? ')
                         if not string_not_back(sel_item):
                             break
                         elif not any(sel_item.lower() == item.name.lower()
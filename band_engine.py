@@ -0,0 +1,346 @@
+"""RPG - NumPy Band Engine.
+
+Author: Caden VanV
+Version: 10/4/2024
+"""
+
+import map_items
+import rng
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional, the plain wander() path still works
+    np = None
+
+# Offset that keeps coordinates positive when packing them into one key
+_KEY_OFFSET = 1 << 30
+
+
+def enable(seed=None, capacity=1024):
+    """Switch every band on the map over to the array engine.
+
+    Args:
+        seed (int): seed for the engine's random generator, defaults to
+            the wander stream of the root seed
+        capacity (int): starting array size, grows as needed
+
+    Returns:
+        BandEngine: the engine now in charge of band movement
+    """
+    if map_items.engine is not None:
+        return map_items.engine
+    engine = BandEngine(seed, capacity)
+    map_items.engine = engine
+    for item in map_items.map_items:
+        engine.add(item)
+    # The engine decides when far bands catch up from now on
+    map_items.due_bands.clear()
+    return engine
+
+
+def disable():
+    """Give every band its own location back and drop the engine."""
+    engine = map_items.engine
+    if engine is None:
+        return
+    bands = list(engine.bands)
+    while engine.count > 0:
+        engine.remove(engine.bands[-1])
+    map_items.engine = None
+    for band in bands:
+        band.schedule()
+
+
+def _keys(x, y):
+    """Pack locations into single integers so they can be compared fast.
+
+    Args:
+        x (ndarray): horizontal locations
+        y (ndarray): vertical locations
+
+    Returns:
+        ndarray: one key per location
+    """
+    return ((x + _KEY_OFFSET) << 31) | (y + _KEY_OFFSET)
+
+
+class BandEngine:
+    """Stores every mobile band's state as parallel NumPy arrays.
+
+    Bands added to the engine read and write their x, y, movement and
+    hostile attributes straight from these arrays.
+
+    Attributes:
+        x (ndarray): horizontal world location per slot
+        y (ndarray): vertical world location per slot
+        movement (ndarray): miles moved per turn per slot
+        hostile (ndarray): hostile to player per slot
+        moved (ndarray): day each slot has wandered up to
+        bands (list): band stored in each slot
+        count (int): slots in use
+        fixed (dict): id to item of every map item that isn't a band, in
+            the order they were added
+        rng (Generator): random generator for wandering
+    """
+
+    def __init__(self, seed=None, capacity=1024):
+        """Create empty engine.
+
+        Args:
+            seed (int): seed for the random generator, defaults to the
+                wander stream of the root seed
+            capacity (int): starting array size
+        """
+        if np is None:
+            raise ImportError('band_engine needs numpy installed')
+        self.x = np.zeros(capacity, dtype=np.int64)
+        self.y = np.zeros(capacity, dtype=np.int64)
+        self.movement = np.zeros(capacity, dtype=np.int64)
+        self.hostile = np.zeros(capacity, dtype=bool)
+        self.moved = np.zeros(capacity, dtype=np.int64)
+        self.bands = []
+        self.count = 0
+        self.fixed = {}
+        if seed is None:
+            self.rng = rng.service.numpy(rng.WANDER)
+        else:
+            self.rng = np.random.default_rng(seed)
+
+    def _grow(self):
+        """Double the size of every array."""
+        size = len(self.x) * 2
+        for name in ('x', 'y', 'movement', 'hostile', 'moved'):
+            old = getattr(self, name)
+            new = np.zeros(size, dtype=old.dtype)
+            new[:self.count] = old[:self.count]
+            setattr(self, name, new)
+
+    def add(self, item):
+        """Move a band's state into the arrays.
+
+        Items that can't move are only remembered, as nothing else has to
+        look through every map item to find them.
+
+        Args:
+            item (MapItem): band to take over, or item to remember
+        """
+        if not item.mobile:
+            self.fixed[id(item)] = item
+            return
+        band = item
+        if self.count == len(self.x):
+            self._grow()
+        slot = self.count
+        self.x[slot] = band._x
+        self.y[slot] = band._y
+        self.movement[slot] = band._movement
+        self.hostile[slot] = band._hostile
+        self.moved[slot] = band._last_moved
+        self.bands.append(band)
+        self.count += 1
+        band.slot = slot
+
+    def remove(self, item):
+        """Copy a band's state back out and free its slot.
+
+        Args:
+            item (MapItem): band to release, or item to forget
+        """
+        if not item.mobile:
+            self.fixed.pop(id(item), None)
+            return
+        band = item
+        slot = band.slot
+        band._x = int(self.x[slot])
+        band._y = int(self.y[slot])
+        band._movement = int(self.movement[slot])
+        band._hostile = bool(self.hostile[slot])
+        band._last_moved = int(self.moved[slot])
+        band.slot = None
+        # Fill the hole with the last band so the arrays stay packed
+        last = self.count - 1
+        if slot != last:
+            moved = self.bands[last]
+            self.x[slot] = self.x[last]
+            self.y[slot] = self.y[last]
+            self.movement[slot] = self.movement[last]
+            self.hostile[slot] = self.hostile[last]
+            self.moved[slot] = self.moved[last]
+            self.bands[slot] = moved
+            moved.slot = slot
+        self.bands.pop()
+        self.count -= 1
+
+    def step(self, watched=None):
+        """Advance the bands by one day at once.
+
+        Bands within map_items.NEAR_RANGE of the player move every day,
+        hostile ones within CHASE_RANGE chase them along the same distance
+        field Band.wander uses and the rest take a random step. Only the
+        first band able to reach the player gets there, the rest behind it
+        in slot order wander instead, like the one at a time loop. Bands
+        further away only catch up on the days they missed every
+        COARSE_DAYS days, like Band.catch_up. Bands that took a random
+        step and land on an occupied tile are nudged diagonally until they
+        are alone.
+
+        Args:
+            watched (MapItem): item whose movement gets printed
+        """
+        n = self.count
+        if n == 0:
+            return
+        day = map_items.current_day
+        camera = map_items.camera
+        x = self.x[:n]
+        y = self.y[:n]
+        move = self.movement[:n]
+        moved = self.moved[:n]
+        dist_x = camera.x - x
+        dist_y = camera.y - y
+        near = (dist_x * dist_x + dist_y * dist_y <=
+                map_items.NEAR_RANGE ** 2)
+        # Near bands catch up to yesterday, like actions.global_turn does,
+        # the rest only once they are COARSE_DAYS behind
+        lag = day - moved
+        behind = np.where(near, lag - 1,
+                          np.where(lag >= map_items.COARSE_DAYS, lag, 0))
+        behind[behind < 0] = 0
+        start_x = x.copy()
+        start_y = y.copy()
+        self._catch_up(behind)
+        old_x = x.copy()
+        old_y = y.copy()
+        # Chasing
+        dist_x = camera.x - x
+        dist_y = camera.y - y
+        chase = near & self.hostile[:n] & (dist_x * dist_x + dist_y * dist_y
+                                           <= map_items.CHASE_RANGE ** 2)
+        if map_items.grid.occupied(camera.x, camera.y):
+            chase[:] = False
+        # Only a handful of bands are ever close enough, so they walk the
+        # shared distance field one by one
+        chase_x = np.zeros(n, dtype=np.int64)
+        chase_y = np.zeros(n, dtype=np.int64)
+        arrived = False
+        for slot in np.nonzero(chase)[0]:
+            step = None
+            if not arrived:
+                step = map_items.chase_step(int(x[slot]), int(y[slot]),
+                                            int(move[slot]))
+            if step is None:
+                chase[slot] = False
+                continue
+            chase_x[slot], chase_y[slot] = step
+            arrived = step == (dist_x[slot], dist_y[slot])
+        # Wandering
+        walkers = np.nonzero(near & ~chase)[0]
+        walk_x, walk_y = self._walk(move[walkers])
+        x[walkers] += walk_x
+        y[walkers] += walk_y
+        x += chase_x
+        y += chase_y
+        moved[near] = day
+        self._nudge(((behind > 0) | near) & ~chase,
+                    list(self.fixed.values()))
+        self._sync_grid(start_x, start_y)
+        # Chasers always say so, like Band.wander
+        for slot in np.nonzero(chase)[0]:
+            self.bands[slot].report_chase(int(chase_x[slot]),
+                                          int(chase_y[slot]))
+        slot = getattr(watched, 'slot', None)
+        if slot is not None and near[slot] and not chase[slot]:
+            watched.report_move(int(x[slot] - old_x[slot]),
+                                int(y[slot] - old_y[slot]))
+
+    def _walk(self, move):
+        """Roll one day of random steps.
+
+        Args:
+            move (ndarray): miles moved per day of each walker
+
+        Returns:
+            tuple: horizontal and vertical steps, movement miles in total
+        """
+        walk_x = self.rng.integers(-move, move, endpoint=True)
+        walk_y = move - np.abs(walk_x)
+        walk_y[self.rng.random(len(move)) < 0.5] *= -1
+        return walk_x, walk_y
+
+    def _catch_up(self, days):
+        """Wander every slot through the days it missed at once.
+
+        Like Band.catch_up, a few days are rolled one by one and longer
+        gaps are drawn as one normal step with the same variance.
+
+        Args:
+            days (ndarray): days each slot missed, 0 for none
+        """
+        slots = np.nonzero(days)[0]
+        if len(slots) == 0:
+            return
+        days = days[slots]
+        move = self.movement[slots]
+        step_x = np.zeros(len(slots), dtype=np.int64)
+        step_y = np.zeros(len(slots), dtype=np.int64)
+        for day in range(map_items.COARSE_DAYS - 1):
+            rows = np.nonzero((days > day) &
+                              (days < map_items.COARSE_DAYS))[0]
+            walk_x, walk_y = self._walk(move[rows])
+            step_x[rows] += walk_x
+            step_y[rows] += walk_y
+        rows = np.nonzero(days >= map_items.COARSE_DAYS)[0]
+        var_x, var_y = map_items.walk_variance(move[rows])
+        step_x[rows] = np.rint(self.rng.normal(
+            0, np.sqrt(days[rows] * var_x)))
+        step_y[rows] = np.rint(self.rng.normal(
+            0, np.sqrt(days[rows] * var_y)))
+        self.x[slots] += step_x
+        self.y[slots] += step_y
+        self.moved[slots] += days
+
+    def _nudge(self, walkers, others):
+        """Push wanderers off tiles someone else already holds.
+
+        Args:
+            walkers (ndarray): mask of slots that took a random step
+            others (list): map items that aren't in the engine
+        """
+        n = self.count
+        fixed_x = np.array([item.x for item in others], dtype=np.int64)
+        fixed_y = np.array([item.y for item in others], dtype=np.int64)
+        stay = ~walkers
+        fixed_keys = np.concatenate((_keys(fixed_x, fixed_y),
+                                     _keys(self.x[:n][stay],
+                                           self.y[:n][stay])))
+        walker_slots = np.nonzero(walkers)[0]
+        while len(walker_slots) > 0:
+            walker_keys = _keys(self.x[walker_slots], self.y[walker_slots])
+            keys = np.concatenate((fixed_keys, walker_keys))
+            _unique, first = np.unique(keys, return_index=True)
+            taken = np.ones(len(keys), dtype=bool)
+            taken[first] = False
+            clash = taken[len(fixed_keys):]
+            if not clash.any():
+                break
+            self.x[walker_slots[clash]] += 1
+            self.y[walker_slots[clash]] += 1
+
+    def _sync_grid(self, old_x, old_y):
+        """Move the bands that changed tile in the grid.
+
+        Only bands that moved are touched, so items that never move keep
+        their place and the grid's version only changes when something is
+        added or removed.
+
+        Args:
+            old_x (ndarray): horizontal location of each slot before
+            old_y (ndarray): vertical location of each slot before
+        """
+        grid = map_items.grid
+        n = self.count
+        changed = np.nonzero((self.x[:n] != old_x) | (self.y[:n] != old_y))[0]
+        bands = self.bands
+        for slot, x, y in zip(changed.tolist(), old_x[changed].tolist(),
+                              old_y[changed].tolist()):
+            grid.move(bands[slot], x, y)
@@ -0,0 +1,191 @@
+"""RPG - Chunked World.
+
+Author: Caden VanV
+Version: 10/4/2024
+"""
+
+import contextlib
+import os
+import zlib
+import map_items
+import rng
+import rpg_lists
+import save_game
+
+# Miles along each side of a chunk
+CHUNK_SIZE = 100
+# Chunks this many away from the player's chunk are loaded
+LOAD_RADIUS = 1
+# Items further than this many chunks away are packed into the cache
+EVICT_RADIUS = 2
+# Streams generation draws from, reseeded per chunk
+_GEN_STREAMS = (rng.WORLD, rng.CHARACTERS, rng.ECONOMY, rng.LOOT)
+
+
+def chunk_of(x, y):
+    """Get the chunk a location is in.
+
+    Args:
+        x (int): horizontal location
+        y (int): vertical location
+
+    Returns:
+        tuple: (chunk x, chunk y)
+    """
+    return (x // CHUNK_SIZE, y // CHUNK_SIZE)
+
+
+def enable(cache_dir=None):
+    """Generate the world chunk by chunk around the player from now on.
+
+    Args:
+        cache_dir (str): folder for evicted chunks, kept in memory if None
+
+    Returns:
+        ChunkWorld: the world now in charge of loading chunks
+    """
+    if map_items.world is None:
+        map_items.world = ChunkWorld(cache_dir)
+        map_items.world.update()
+    return map_items.world
+
+
+class ChunkWorld:
+    """Loads chunks near the player and packs away ones far from it.
+
+    A chunk's settlements and bands are made the first time it is loaded,
+    from the root seed and the chunk's location only, so the same seed
+    always makes the same ones whatever order it is explored in. Each is
+    put on its own tile in the chunk, or the next free one diagonally if
+    a band already wandered onto it. Items wander between chunks freely
+    and belong to whichever chunk they are in when it gets packed away.
+
+    Attributes:
+        generated (set): chunks whose contents have been made
+        loaded (set): chunks currently on the map
+        cache (dict): chunk to list of compressed packed item lists
+        cache_dir (str): folder packed chunks are written to, or None
+        dormant (dict): chunk to number of bands packed away in it
+        center (tuple): chunk the camera was in at the last update
+    """
+
+    def __init__(self, cache_dir=None):
+        """Create world with nothing loaded.
+
+        Args:
+            cache_dir (str): folder for evicted chunks, kept in memory if None
+        """
+        self.generated = set()
+        self.loaded = set()
+        self.cache = {}
+        self.dormant = {}
+        self.cache_dir = cache_dir
+        self.center = None
+        if cache_dir is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def update(self, player=None):
+        """Load chunks around the camera and pack away far items.
+
+        Args:
+            player (PlayerParty): forgets its move target if that is packed
+        """
+        center = chunk_of(map_items.camera.x, map_items.camera.y)
+        if center == self.center:
+            # Everything near is loaded, bands that wandered off are packed
+            # away once the player moves on
+            return
+        self.center = center
+        center_x, center_y = center
+        for cx in range(center_x - LOAD_RADIUS, center_x + LOAD_RADIUS + 1):
+            for cy in range(center_y - LOAD_RADIUS,
+                            center_y + LOAD_RADIUS + 1):
+                if (cx, cy) not in self.loaded:
+                    self.load((cx, cy))
+        far = {}
+        for item in map_items.map_items:
+            chunk = chunk_of(item.x, item.y)
+            if ((abs(chunk[0] - center_x) > EVICT_RADIUS or
+                 abs(chunk[1] - center_y) > EVICT_RADIUS)):
+                far.setdefault(chunk, []).append(item)
+        for chunk, chunk_items in far.items():
+            self.evict(chunk, chunk_items)
+            if player is not None and player.target_move in chunk_items:
+                player.target_move = None
+        self.loaded = {chunk for chunk in self.loaded
+                       if abs(chunk[0] - center_x) <= EVICT_RADIUS and
+                       abs(chunk[1] - center_y) <= EVICT_RADIUS}
+
+    def load(self, chunk):
+        """Put a chunk's items on the map, making them if it's new.
+
+        Args:
+            chunk (tuple): (chunk x, chunk y)
+        """
+        self.loaded.add(chunk)
+        if chunk not in self.generated:
+            self.generated.add(chunk)
+            self.generate(chunk)
+        self.dormant.pop(chunk, None)
+        for blob in self.cache.pop(chunk, ()):
+            if self.cache_dir is not None:
+                path = blob
+                with open(path, 'rb') as file:
+                    blob = file.read()
+                os.remove(path)
+            for item in save_game.loads(zlib.decompress(blob)):
+                # Dormant bands wander the days they were packed away up to
+                # yesterday, today's step comes with everyone else's
+                if item.mobile:
+                    item.catch_up(map_items.current_day - 1)
+                item.enter_map(item.x, item.y)
+
+    def evict(self, chunk, chunk_items):
+        """Take items off the map and pack them into the cache.
+
+        Args:
+            chunk (tuple): (chunk x, chunk y) the items are in
+            chunk_items (list): map items to pack
+        """
+        for item in chunk_items:
+            item.leave_map()
+        blob = zlib.compress(save_game.dumps(chunk_items), 1)
+        packed = self.cache.setdefault(chunk, [])
+        if self.cache_dir is not None:
+            path = os.path.join(self.cache_dir,
+                                f'chunk_{chunk[0]}_{chunk[1]}_{len(packed)}')
+            with open(path, 'wb') as file:
+                file.write(blob)
+            blob = path
+        packed.append(blob)
+        self.dormant[chunk] = (self.dormant.get(chunk, 0) +
+                               sum(item.mobile for item in chunk_items))
+
+    def generate(self, chunk):
+        """Make a chunk's settlements and bands.
+
+        Args:
+            chunk (tuple): (chunk x, chunk y)
+        """
+        seed = rng.service.seed
+        name = f'chunk:{chunk[0]}:{chunk[1]}'
+        left = chunk[0] * CHUNK_SIZE
+        top = chunk[1] * CHUNK_SIZE
+        with contextlib.ExitStack() as stack:
+            for stream in _GEN_STREAMS:
+                stack.enter_context(rng.service.override(
+                    stream, rng.derive(seed, f'{name}:{stream}')))
+            world = rng.stream(rng.WORLD)
+            for _i in range(world.randint(1, 3)):
+                location = (left + world.randint(0, CHUNK_SIZE - 1),
+                            top + world.randint(0, CHUNK_SIZE - 1))
+                map_items.Settlement(map_items.random_settlement_name(),
+                                     world.randint(1000, 10000), location)
+            for _i in range(world.randint(8, 12)):
+                location = (left + world.randint(0, CHUNK_SIZE - 1),
+                            top + world.randint(0, CHUNK_SIZE - 1))
+                type = world.randint(0,
+                                     len(rpg_lists.generic_enemy_types) - 1)
+                map_items.MonsterBand(rpg_lists.generic_enemy_types[type], 1,
+                                      world.randint(2, 5), location)
+
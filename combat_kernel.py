@@ -0,0 +1,336 @@
+"""RPG - NumPy Combat Kernel.
+
+Author: Caden VanV
+Version: 10/4/2024
+
+Resolves the attacks of AI controlled fighters in bulk, for balance
+sweeps. Team fights follow the AI side of actions.take_turn, every
+living member attacks a random enemy that was alive when its team's
+turn started. Player choices, abilities and xp aren't simulated, those
+fights still go through actions.create_encounter.
+"""
+
+import argparse
+import contextlib
+import os
+import time
+import actions
+import entities
+import events
+import rng
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional, Entity.attack is the fallback
+    np = None
+
+
+def _need_numpy():
+    """Fail clearly when numpy isn't installed."""
+    if np is None:
+        raise ImportError('combat_kernel needs numpy installed')
+
+
+def draw_rolls(generator, n):
+    """Pre-draw the random numbers for n attacks.
+
+    Args:
+        generator (Generator): NumPy random generator
+        n (int): attacks
+
+    Returns:
+        tuple: hit rolls in [0, 1) and damage spread rolls in 3-7
+    """
+    _need_numpy()
+    return generator.random(n), generator.integers(3, 7, n, endpoint=True)
+
+
+def _round_tenths(raw):
+    """Round damage to one decimal exactly like Entity.attack.
+
+    Entity.attack rounds with float(f'{damage:.1f}'), which rounds the
+    binary value and can differ from np.round on .x5 ties. Only a handful
+    of distinct damage values ever show up, so each is rounded once the
+    scalar way and spread back out.
+
+    Args:
+        raw (ndarray): unrounded damage
+
+    Returns:
+        ndarray: damage rounded to one decimal
+    """
+    unique, inverse = np.unique(raw, return_inverse=True)
+    rounded = np.array([float(f'{dmg:.1f}') for dmg in unique.tolist()])
+    return rounded[inverse]
+
+
+def resolve_attacks(atk, dge, ac, hp, hit_rolls, spread_rolls):
+    """Resolve one attack per row, all at once.
+
+    Same rules as Entity.attack: hit chance is 50% + 5% per point of atk
+    over dge, damage is atk minus half of ac, times 0.8-1.2 and rounded to
+    one decimal. Reaction abilities and xp aren't handled here.
+
+    Args:
+        atk (ndarray): attacker attack
+        dge (ndarray): defender dodge
+        ac (ndarray): defender armor
+        hp (ndarray): defender current hp
+        hit_rolls (ndarray): uniform rolls in [0, 1), see draw_rolls
+        spread_rolls (ndarray): integer rolls in 3-7, see draw_rolls
+
+    Returns:
+        tuple: hit mask, damage dealt and defender hp afterwards
+    """
+    _need_numpy()
+    hit_chance = (atk - dge) / 20 + .5
+    hit = hit_rolls <= hit_chance
+    damage = np.maximum(0, atk - (ac / 2))
+    damage = damage * ((spread_rolls / 10) + 0.5)
+    damage = np.where(hit, _round_tenths(damage), 0.0)
+    return hit, damage, hp - damage
+
+
+def simulate_duels(stats_a, stats_b, generator, max_turns=100):
+    """Fight many independent one on one duels side by side.
+
+    Side a always swings first, like team 1 in actions.create_encounter.
+
+    Args:
+        stats_a (tuple): arrays of (atk, ac, dge, hp) for side a
+        stats_b (tuple): arrays of (atk, ac, dge, hp) for side b
+        generator (Generator): NumPy random generator
+        max_turns (int): stop unfinished duels after this many turns
+
+    Returns:
+        tuple: winners (1 for a, 2 for b, 0 unfinished), turns taken,
+            and hp left on each side
+    """
+    _need_numpy()
+    atk_a, ac_a, dge_a, hp_a = (np.asarray(col, dtype=float)
+                                for col in stats_a)
+    atk_b, ac_b, dge_b, hp_b = (np.asarray(col, dtype=float)
+                                for col in stats_b)
+    hp_a = hp_a.copy()
+    hp_b = hp_b.copy()
+    n = len(hp_a)
+    winners = np.zeros(n, dtype=np.int8)
+    turns = np.zeros(n, dtype=np.int32)
+    live = np.arange(n)
+    for turn in range(1, max_turns + 1):
+        if len(live) == 0:
+            break
+        hit_rolls, spread_rolls = draw_rolls(generator, len(live))
+        hp_b[live] = resolve_attacks(atk_a[live], dge_b[live], ac_b[live],
+                                     hp_b[live], hit_rolls, spread_rolls)[2]
+        a_won = hp_b[live] <= 0
+        winners[live[a_won]] = 1
+        turns[live[a_won]] = turn
+        live = live[~a_won]
+        hit_rolls, spread_rolls = draw_rolls(generator, len(live))
+        hp_a[live] = resolve_attacks(atk_b[live], dge_a[live], ac_a[live],
+                                     hp_a[live], hit_rolls, spread_rolls)[2]
+        b_won = hp_a[live] <= 0
+        winners[live[b_won]] = 2
+        turns[live[b_won]] = turn
+        live = live[~b_won]
+    turns[live] = max_turns
+    return winners, turns, hp_a, hp_b
+
+
+def _team_turn(attack_side, defend_side, live, generator):
+    """Let every living member of one side attack, in member order.
+
+    Targets are picked from the enemies alive when the turn starts, so
+    like take_turn a member can swing at one a teammate just killed. The
+    turn ends once every enemy is dead.
+
+    Args:
+        attack_side (tuple): (atk, ac, dge, hp) arrays of shape
+            (fights, members) for the side going
+        defend_side (tuple): same for the side being attacked, hp is
+            changed in place
+        live (ndarray): indices of unfinished fights
+        generator (Generator): NumPy random generator
+    """
+    atk, _ac, _dge, hp = attack_side
+    _atk, ac_d, dge_d, hp_d = defend_side
+    pool = hp_d[live] > 0
+    pool_size = pool.sum(axis=1)
+    # Position of each pool member within the pool, to turn a random
+    # number below the pool size into a member
+    rank = np.cumsum(pool, axis=1) - 1
+    for member in range(atk.shape[1]):
+        going = (hp[live, member] > 0) & (hp_d[live] > 0).any(axis=1)
+        rows = np.nonzero(going)[0]
+        if len(rows) == 0:
+            continue
+        fights = live[rows]
+        pick = generator.integers(0, pool_size[rows])
+        target = np.argmax(pool[rows] & (rank[rows] == pick[:, None]),
+                           axis=1)
+        hit_rolls, spread_rolls = draw_rolls(generator, len(rows))
+        hp_d[fights, target] = resolve_attacks(
+            atk[fights, member], dge_d[fights, target], ac_d[fights, target],
+            hp_d[fights, target], hit_rolls, spread_rolls)[2]
+
+
+def simulate_encounters(team_a, team_b, generator, max_turns=100):
+    """Fight many independent team fights side by side.
+
+    Each side is a tuple of (atk, ac, dge, hp) arrays shaped (fights,
+    members), like a 2-5 member band per row. Members with no hp don't
+    take part, so smaller bands can be padded with zeros. Side a goes
+    first, like team 1 in actions.create_encounter.
+
+    Args:
+        team_a (tuple): (atk, ac, dge, hp) arrays for side a
+        team_b (tuple): (atk, ac, dge, hp) arrays for side b
+        generator (Generator): NumPy random generator
+        max_turns (int): stop unfinished fights after this many turns
+
+    Returns:
+        tuple: winners (1 for a, 2 for b, 0 unfinished), turns taken,
+            and hp left of each member on each side
+    """
+    _need_numpy()
+    side_a = tuple(np.array(col, dtype=float, ndmin=2) for col in team_a)
+    side_b = tuple(np.array(col, dtype=float, ndmin=2) for col in team_b)
+    hp_a = side_a[3]
+    hp_b = side_b[3]
+    n = len(hp_a)
+    winners = np.zeros(n, dtype=np.int8)
+    turns = np.zeros(n, dtype=np.int32)
+    live = np.arange(n)
+    for turn in range(1, max_turns + 1):
+        if len(live) == 0:
+            break
+        _team_turn(side_a, side_b, live, generator)
+        a_won = ~(hp_b[live] > 0).any(axis=1)
+        winners[live[a_won]] = 1
+        turns[live[a_won]] = turn
+        live = live[~a_won]
+        _team_turn(side_b, side_a, live, generator)
+        b_won = ~(hp_a[live] > 0).any(axis=1)
+        winners[live[b_won]] = 2
+        turns[live[b_won]] = turn
+        live = live[~b_won]
+    turns[live] = max_turns
+    return winners, turns, hp_a, hp_b
+
+
+def scalar_duel(first, second, max_turns=100):
+    """Fight one duel with Entity.attack for comparison.
+
+    Args:
+        first (Entity): swings first
+        second (Entity): swings second
+        max_turns (int): stop after this many turns
+
+    Returns:
+        tuple: winner (1, 2 or 0) and turns taken
+    """
+    for turn in range(1, max_turns + 1):
+        first.attack(second)
+        if second.cur_hp <= 0:
+            return 1, turn
+        second.attack(first)
+        if first.cur_hp <= 0:
+            return 2, turn
+    return 0, max_turns
+
+
+def scalar_encounter(team1, team2, max_turns=100):
+    """Fight one AI team fight with actions.take_turn for comparison.
+
+    Args:
+        team1 (list): entities that go first
+        team2 (list): entities that go second
+        max_turns (int): stop after this many turns
+
+    Returns:
+        tuple: winner (1, 2 or 0) and turns taken
+    """
+    for turn in range(1, max_turns + 1):
+        actions.take_turn(team1, team2)
+        team2 = [char for char in team2 if char.cur_hp > 0]
+        if len(team2) == 0:
+            return 1, turn
+        actions.take_turn(team2, team1)
+        team1 = [char for char in team1 if char.cur_hp > 0]
+        if len(team1) == 0:
+            return 2, turn
+    return 0, max_turns
+
+
+def compare(lvl_a=1, lvl_b=1, n=20000, seed=0, size_a=1, size_b=1):
+    """Compare the kernel with the scalar path on monster fights.
+
+    Args:
+        lvl_a (int): level of the first side's monsters
+        lvl_b (int): level of the second side's monsters
+        n (int): fights per path
+        seed (int): random seed
+        size_a (int): monsters on the first side
+        size_b (int): monsters on the second side
+
+    Returns:
+        dict: win rate, mean turns and seconds for each path
+    """
+    _need_numpy()
+    rng.seed(seed)
+    start = time.perf_counter()
+    wins = 0
+    total_turns = 0
+    with contextlib.ExitStack() as stack:
+        stack.enter_context(events.use_sinks(events.NullSink()))
+        # take_turn prints a blank line after every turn
+        devnull = stack.enter_context(open(os.devnull, 'w'))
+        stack.enter_context(contextlib.redirect_stdout(devnull))
+        for _i in range(n):
+            team1 = [entities.Entity('A', lvl_a) for _j in range(size_a)]
+            team2 = [entities.Entity('B', lvl_b) for _j in range(size_b)]
+            if size_a == 1 and size_b == 1:
+                winner, turns = scalar_duel(team1[0], team2[0])
+            else:
+                winner, turns = scalar_encounter(team1, team2)
+            wins += winner == 1
+            total_turns += turns
+    scalar_time = time.perf_counter() - start
+    a = entities.Entity('A', lvl_a)
+    b = entities.Entity('B', lvl_b)
+    stats_a = [np.full((n, size_a), stat)
+               for stat in (a.atk, a.ac, a.dge, a.cur_hp)]
+    stats_b = [np.full((n, size_b), stat)
+               for stat in (b.atk, b.ac, b.dge, b.cur_hp)]
+    start = time.perf_counter()
+    if size_a == 1 and size_b == 1:
+        winners, turns, _hp_a, _hp_b = simulate_duels(
+            [stat[:, 0] for stat in stats_a],
+            [stat[:, 0] for stat in stats_b], rng.service.numpy(rng.COMBAT))
+    else:
+        winners, turns, _hp_a, _hp_b = simulate_encounters(
+            stats_a, stats_b, rng.service.numpy(rng.COMBAT))
+    kernel_time = time.perf_counter() - start
+    return {'scalar': (wins / n, total_turns / n, scalar_time),
+            'kernel': (float(np.mean(winners == 1)), float(np.mean(turns)),
+                       kernel_time)}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description='Check the combat kernel against Entity.attack.')
+    parser.add_argument('--lvl-a', type=int, default=1)
+    parser.add_argument('--lvl-b', type=int, default=1)
+    parser.add_argument('--size-a', type=int, default=1,
+                        help='monsters on the first side')
+    parser.add_argument('--size-b', type=int, default=1,
+                        help='monsters on the second side')
+    parser.add_argument('-n', type=int, default=20000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    results = compare(args.lvl_a, args.lvl_b, args.n, args.seed,
+                      args.size_a, args.size_b)
+    for path, (win_rate, turns, seconds) in results.items():
+        print(f'{path}: {win_rate:.2%} first side wins, '
+              f'{turns:.2f} turns, {seconds:.3f}s')
@@ -0,0 +1,290 @@
+"""RPG - Monte Carlo Combat Simulator.
+
+Author: Caden VanV
+Version: 10/4/2024
+"""
+
+import argparse
+import collections
+import concurrent.futures
+import contextlib
+import os
+import actions
+import entities
+import events
+import headless
+import rng
+import rpg_lists
+
+# Survivor hp is bucketed by tenths of max hp, 0-10
+HP_BINS = 11
+
+
+class Tally:
+    """Stores results of many fights that share something.
+
+    Attributes:
+        fights (int): fights counted
+        wins (int): fights the party won
+        turns (Counter): turn count to number of fights
+        hp_hist (list): survivor hp histogram in tenths of max hp
+    """
+
+    def __init__(self):
+        """Create empty tally."""
+        self.fights = 0
+        self.wins = 0
+        self.turns = collections.Counter()
+        self.hp_hist = [0] * HP_BINS
+
+    def merge(self, other):
+        """Add another tally's counts into this one.
+
+        Args:
+            other (Tally): tally to add
+        """
+        self.fights += other.fights
+        self.wins += other.wins
+        self.turns.update(other.turns)
+        for i, count in enumerate(other.hp_hist):
+            self.hp_hist[i] += count
+
+    def win_rate(self):
+        """Calculate win rate.
+
+        Returns:
+            float: fraction of fights won
+        """
+        if self.fights == 0:
+            return 0.0
+        return self.wins / self.fights
+
+    def mean_turns(self):
+        """Calculate average fight length.
+
+        Returns:
+            float: average turns per fight
+        """
+        if self.fights == 0:
+            return 0.0
+        return sum(turns * count for turns, count
+                   in self.turns.items()) / self.fights
+
+
+class SweepResult:
+    """Stores tallies grouped by class, subclass, race and enemy level.
+
+    Attributes:
+        tallies (dict): (group, value) to Tally, group is one of
+            'class', 'subclass', 'race' or 'enemy_lvl'
+    """
+
+    def __init__(self):
+        """Create empty result."""
+        self.tallies = collections.defaultdict(Tally)
+
+    def merge(self, other):
+        """Add another result's tallies into this one.
+
+        Args:
+            other (SweepResult): result to add
+        """
+        for key, tally in other.tallies.items():
+            self.tallies[key].merge(tally)
+
+    def group(self, name):
+        """Get every tally of one group.
+
+        Args:
+            name (str): 'class', 'subclass', 'race' or 'enemy_lvl'
+
+        Returns:
+            dict: value to Tally
+        """
+        return {key[1]: tally for key, tally in self.tallies.items()
+                if key[0] == name}
+
+    def __str__(self):
+        """Print result as tables.
+
+        Returns:
+            str: result info
+        """
+        result = ''
+        for name in ('class', 'subclass', 'race', 'enemy_lvl'):
+            result += f'-----------------\n{name}\n-----------------\n'
+            for value, tally in sorted(self.group(name).items()):
+                result += (f'{value}: {tally.win_rate():.1%} win rate, '
+                           f'{tally.mean_turns():.1f} turns, '
+                           f'{tally.fights} fights\n')
+        return result
+
+
+def make_character(spec):
+    """Build a player character from a spec.
+
+    Args:
+        spec (tuple): (class name, subclass name, race name, lvl)
+
+    Returns:
+        RPGCharacter: character at the given level
+    """
+    class_name, subclass_name, race_name, lvl = spec
+    char = entities.RPGCharacter()
+    char.rpg_class = next(cl for cl in entities.rpg_classes
+                          if cl.name == class_name)
+    char.subclass = next(sc for sc in char.rpg_class.subclasses
+                         if sc.name == subclass_name)
+    char.race = next(rc for rc in entities.rpg_races if rc.name == race_name)
+    char.invalidate_stats()
+    char.cur_hp = float(char.max_hp)
+    char.player = True
+    for _i in range(lvl - 1):
+        char.level_up()
+    return char
+
+
+def make_monsters(spec):
+    """Build the members of a monster band from a spec.
+
+    Same stats as map_items.MonsterBand without putting it on the map.
+
+    Args:
+        spec (tuple): (enemy type, lvl, amt)
+
+    Returns:
+        list: monsters, the elite leader first
+    """
+    type, lvl, amt = spec
+    members = [entities.Entity('Elite ' + type, lvl + 1)]
+    for _i in range(amt - 1):
+        members.append(entities.Entity(type, lvl))
+    return members
+
+
+def fight(party_spec, band_spec, seed, policy=None):
+    """Run one fight to the end with no input.
+
+    Args:
+        party_spec (list): member specs, see make_character
+        band_spec (tuple): monster band spec, see make_monsters
+        seed (int or str): root seed for this fight
+        policy (Policy): picks player actions, defaults to headless.Policy
+
+    Returns:
+        tuple: (party won, turns taken, survivor hp fractions per member)
+    """
+    if policy is None:
+        policy = headless.Policy()
+    rng.seed(seed)
+    team1 = [make_character(spec) for spec in party_spec]
+    party = list(team1)
+    team2 = make_monsters(band_spec)
+    turn_count = 1
+    while len(team1) > 0 and len(team2) > 0:
+        actions.take_turn(team1, team2, policy)
+        team2 = [char for char in team2 if char.cur_hp > 0]
+        if len(team2) > 0:
+            actions.take_turn(team2, team1, policy)
+            team1 = [char for char in team1 if char.cur_hp > 0]
+        turn_count += 1
+    hp = [max(0.0, char.cur_hp) / char.max_hp for char in party]
+    return (len(team1) > 0, turn_count - 1, hp)
+
+
+def _run_chunk(job):
+    """Run a block of seeded fights for one matchup, used by workers.
+
+    Args:
+        job (tuple): (party spec, band spec, seed, matchup index,
+            first fight, last fight)
+
+    Returns:
+        SweepResult: tallies for the block
+    """
+    party_spec, band_spec, seed, matchup, start, end = job
+    sweep = rng.RNGService(seed)
+    result = SweepResult()
+    policy = headless.Policy()
+    with open(os.devnull, 'w') as sink, contextlib.redirect_stdout(sink), \
+            events.use_sinks(events.NullSink()):
+        for i in range(start, end):
+            # Every fight gets its own child service, so workers never
+            # share or overlap streams no matter how the jobs are split
+            won, turns, hp = fight(party_spec, band_spec,
+                                   sweep.spawn(f'{matchup}:{i}').seed, policy)
+            keys = {('enemy_lvl', band_spec[1])}
+            for spec in party_spec:
+                keys.add(('class', spec[0]))
+                keys.add(('subclass', spec[1]))
+                keys.add(('race', spec[2]))
+            for key in keys:
+                tally = result.tallies[key]
+                tally.fights += 1
+                tally.wins += won
+                tally.turns[turns] += 1
+            for spec, frac in zip(party_spec, hp):
+                hp_bin = min(HP_BINS - 1, int(frac * 10))
+                for key in (('class', spec[0]), ('subclass', spec[1]),
+                            ('race', spec[2])):
+                    result.tallies[key].hp_hist[hp_bin] += 1
+    return result
+
+
+def run_sweep(matchups, fights=1000, seed=0, workers=None, chunk=500):
+    """Run many seeded fights per matchup across processes.
+
+    Args:
+        matchups (list): (party spec, band spec) pairs
+        fights (int): fights per matchup
+        seed (int): root seed, the same seed gives the same results
+        workers (int): processes, defaults to the cpu count
+        chunk (int): fights per job sent to a worker
+
+    Returns:
+        SweepResult: merged tallies
+    """
+    jobs = []
+    for matchup, (party_spec, band_spec) in enumerate(matchups):
+        for start in range(0, fights, chunk):
+            jobs.append((party_spec, band_spec, seed, matchup,
+                         start, min(fights, start + chunk)))
+    result = SweepResult()
+    with concurrent.futures.ProcessPoolExecutor(workers) as pool:
+        for part in pool.map(_run_chunk, jobs):
+            result.merge(part)
+    return result
+
+
+def solo_matchups(lvl=1, enemy_type='Wolf', amt=2):
+    """Every subclass and race alone against a band of each enemy level.
+
+    Args:
+        lvl (int): level of the characters
+        enemy_type (str): enemy name from rpg_lists.generic_enemy_types
+        amt (int): monsters per band
+
+    Returns:
+        list: (party spec, band spec) pairs
+    """
+    matchups = []
+    for rpg_class in entities.rpg_classes:
+        for subclass in rpg_class.subclasses:
+            for race in entities.rpg_races:
+                for enemy_lvl in range(1, 6):
+                    party = [(rpg_class.name, subclass.name, race.name, lvl)]
+                    matchups.append((party, (enemy_type, enemy_lvl, amt)))
+    return matchups
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Run combat balance sweeps.')
+    parser.add_argument('--fights', type=int, default=200)
+    parser.add_argument('--lvl', type=int, default=1)
+    parser.add_argument('--enemy', default=rpg_lists.generic_enemy_types[0])
+    parser.add_argument('--amt', type=int, default=2)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+    print(run_sweep(solo_matchups(args.lvl, args.enemy, args.amt),
+                    args.fights, args.seed, args.workers))
@@ -4,10 +4,17 @@ Author: Caden VanV
 Version: 10/4/2024
 """
 
-import random
 import rpg_lists
+import events
 import items
 import abilities
+import instrument
+import journal
+import rng
+
+# Random streams, see rng.py
+_combat = rng.stream(rng.COMBAT)
+_characters = rng.stream(rng.CHARACTERS)
 
 
 class RPGClass:
@@ -55,7 +62,7 @@ class RPGSubclass:
         name (str): name
         stats (tuple): stats
         stats_lvl (tuple): stats gained per lvl
-        abilities (list): abilities gained from lvl 2-5
+        abilities (list): shared abilities gained from lvl 2-5
     """
 
     def __init__(self, name, stats, stats_lvl, abil):
@@ -218,9 +225,27 @@ rpg_races = (RPGRace('Edain', (1, 1, 1, 1)),
              RPGRace('Orc', (2, -1, 0, 3)))
 
 
+def recompute_stats(entities):
+    """Recompute effective stats for many entities at once.
+
+    Use after changing catalog items, abilities, subclasses or races.
+
+    Args:
+        entities (iterable): entities to update
+    """
+    for entity in entities:
+        entity.invalidate_stats()
+        # Reading the property rebuilds the cache now instead of on the
+        # next attack
+        entity.stats
+
+
 class Entity:
     """Stores a character.
 
+    Effective atk, ac, dge and max_hp are base stats plus modifiers from
+    anything affecting the entity, cached until something changes.
+
     Attributes:
         name (str): name
         atk (int): attack
@@ -231,9 +256,13 @@ class Entity:
         player (bool): player controlled?
         lvl (int): level
         xp (int): xp
-        abilities (list): abilities
+        abilities (list): AbilityState for each ability
+        modifiers (dict): active ability state to the Ability affecting it
     """
 
+    __slots__ = ('name', 'cur_hp', 'lvl', 'xp', 'player', 'abilities',
+                 'modifiers', '_base', '_stats')
+
     def __init__(self, name='Wolf', lvl=1):
         """Create generic entity.
 
@@ -242,16 +271,86 @@ class Entity:
             lvl (int): lvl
         """
         self.name = name
-        self.atk = 5 + (3 * lvl)
-        self.ac = 5 + (2 * lvl)
-        self.dge = 5 + (2 * lvl)
-        self.max_hp = 20 + (5 * lvl)
+        self._base = (5 + (3 * lvl), 5 + (2 * lvl),
+                      5 + (2 * lvl), 20 + (5 * lvl))
+        self.modifiers = {}
+        self._stats = None
         self.cur_hp = float(self.max_hp)
         self.lvl = lvl
         self.xp = 0
         self.player = False
         self.abilities = []
 
+    @property
+    def stats(self):
+        """tuple: effective (atk, ac, dge, max_hp), cached."""
+        if self._stats is None:
+            stats = list(self.base_stats())
+            for source in self.modifier_sources():
+                for i in range(4):
+                    stats[i] += source.effects[i]
+            self._stats = tuple(stats)
+        return self._stats
+
+    @property
+    def atk(self):
+        """int: effective attack."""
+        return self.stats[0]
+
+    @property
+    def ac(self):
+        """int: effective armor."""
+        return self.stats[1]
+
+    @property
+    def dge(self):
+        """int: effective dodge."""
+        return self.stats[2]
+
+    @property
+    def max_hp(self):
+        """int: effective maximum health."""
+        return self.stats[3]
+
+    def base_stats(self):
+        """Get stats before items and abilities.
+
+        Returns:
+            tuple: (atk, ac, dge, max_hp)
+        """
+        return self._base
+
+    def modifier_sources(self):
+        """Get everything currently changing stats.
+
+        Returns:
+            list: objects with effects tuples starting (atk, ac, dge, hp)
+        """
+        return list(self.modifiers.values())
+
+    def add_modifier(self, key, source):
+        """Start applying a modifier.
+
+        Args:
+            key (object): what owns the modifier, adding it again replaces
+            source (object): has an effects tuple starting (atk, ac, dge, hp)
+        """
+        self.modifiers[key] = source
+        self._stats = None
+
+    def remove_modifier(self, key):
+        """Stop applying a modifier.
+
+        Args:
+            key (object): what owns the modifier
+        """
+        if self.modifiers.pop(key, None) is not None:
+            self._stats = None
+
+    def invalidate_stats(self):
+        """Mark cached stats as out of date."""
+        self._stats = None
+
     def __str__(self):
         """Print entity info.
 
@@ -265,6 +364,7 @@ class Entity:
         result += f'     HP: {int(self.cur_hp)}/{self.max_hp}'
         return result
 
+    @instrument.timed()
     def attack(self, enemy):
         """Attack enemy.
 
@@ -273,7 +373,7 @@ class Entity:
         """
         # Hit chance, base chance 50% + 5% for each dif in atk and dge
         hit_chance = (self.atk - enemy.dge) / 20 + .5
-        if random.random() <= hit_chance:
+        if _combat.random() <= hit_chance:
             # Triggers reaction abilities
             for ability in enemy.abilities:
                 # Added two (()) because otherwise alignment doesn't work
@@ -286,15 +386,14 @@ class Entity:
             # Base damage is atk minus half enemy armor. Can't be below 0
             damage = max(0, (self.atk - (enemy.ac / 2)))
             # Damage range is 80% - 120% of base damage
-            damage *= ((random.randint(3, 7) / 10) + 0.5)
+            damage *= ((_combat.randint(3, 7) / 10) + 0.5)
             # Truncates to 1 decimal just in case math adds unecessary digits
             damage = float(f'{damage:.1f}')
-            print(f'{self.name} hit their attack against '
-                  f'{enemy.name} for {damage} points')
+            events.log.emit(events.HIT, self.name, enemy.name, damage)
             enemy.take_damage(damage)
             self.add_xp(1)
         else:
-            print(f'{self.name} missed their attack against {enemy.name}')
+            events.log.emit(events.MISS, self.name, enemy.name)
 
     def take_damage(self, dmg):
         """Take damage.
@@ -308,7 +407,7 @@ class Entity:
 
     def die(self):
         """Entity dies."""
-        print(f'{self.name} has died.')
+        events.log.emit(events.DIED, self.name)
         self.name = self.name + ' (Dead)'
 
     def heal(self, amt):
@@ -321,15 +420,14 @@ class Entity:
             amt = self.max_hp - self.cur_hp
         self.cur_hp += amt
         if amt > 0:
-            print(f'{self.name} heals by {int(amt)} hp '
-                  f'and is now at {self.cur_hp}/{self.max_hp}')
+            events.log.emit(events.HEALED, self.name, int(amt),
+                            self.cur_hp, self.max_hp)
 
     def level_up(self):
         """Level up."""
-        self.atk += 3
-        self.ac += 2
-        self.dge += 2
-        self.max_hp += 5
+        self._base = (self._base[0] + 3, self._base[1] + 2,
+                      self._base[2] + 2, self._base[3] + 5)
+        self._stats = None
         self.cur_hp += 5
 
     def add_xp(self, amt):
@@ -363,34 +461,34 @@ class RPGCharacter(Entity):
         player (bool): player controlled?
         items (dict): items equipt
         xp (int): xp had
-        abilities (list): abilities
+        abilities (list): AbilityState for each ability
     """
 
+    __slots__ = ('rpg_class', 'subclass', 'race', 'items')
+
     def __init__(self):
         """Create generic NPC character."""
         # Generate random numbers
-        rn = random.randint(0, len(rpg_lists.rpg_names) - 1)
-        rc = random.randint(0, len(rpg_classes) - 1)
-        rsc = random.randint(0, 2)
-        rr = random.randint(0, len(rpg_races) - 1)
+        rn = _characters.randint(0, len(rpg_lists.rpg_names) - 1)
+        rc = _characters.randint(0, len(rpg_classes) - 1)
+        rsc = _characters.randint(0, 2)
+        rr = _characters.randint(0, len(rpg_races) - 1)
         # Assign the basic attributes using random nums
         self.name = rpg_lists.rpg_names[rn]
         self.rpg_class = rpg_classes[rc]
         self.subclass = self.rpg_class.subclasses[rsc]
         self.race = rpg_races[rr]
-        # Assign stats
-        self.atk = self.subclass.stats[0] + self.race.stats[0]
-        self.ac = self.subclass.stats[1] + self.race.stats[1]
-        self.dge = self.subclass.stats[2] + self.race.stats[2]
-        self.max_hp = self.subclass.stats[3] + self.race.stats[3]
-        self.cur_hp = float(self.max_hp)
         # Assign the rest of the attributes
         self.player = False
         self.lvl = 1
         self.xp = 0
         self.abilities = []
+        self.modifiers = {}
         self.items = {'weapon': None, 'chest': None, 'head': None,
                       'hands': None, 'feet': None, 'accessory': None}
+        # Stats come from subclass, race and level
+        self._stats = None
+        self.cur_hp = float(self.max_hp)
 
     def __str__(self):
         """Print character info.
@@ -418,24 +516,40 @@ class RPGCharacter(Entity):
                     result += f' {item.one_line()}'
         return result
 
+    def base_stats(self):
+        """Get stats from subclass, race and level.
+
+        Returns:
+            tuple: (atk, ac, dge, max_hp)
+        """
+        return tuple(self.subclass.stats[i] + self.race.stats[i] +
+                     (self.lvl - 1) *
+                     (self.subclass.stats_lvl[i] + self.race.stats[i])
+                     for i in range(4))
+
+    def modifier_sources(self):
+        """Get equipped items and active abilities changing stats.
+
+        Returns:
+            list: objects with effects tuples starting (atk, ac, dge, hp)
+        """
+        sources = [item for item in self.items.values() if item is not None]
+        sources += self.modifiers.values()
+        return sources
+
     def level_up(self):
         """Level up."""
         self.lvl += 1
-        self.atk += self.subclass.stats_lvl[0] + self.race.stats[0]
-        self.ac += self.subclass.stats_lvl[1] + self.race.stats[1]
-        self.dge += self.subclass.stats_lvl[2] + self.race.stats[2]
-        self.max_hp += self.subclass.stats_lvl[3] + self.race.stats[3]
+        self._stats = None
         self.cur_hp += self.subclass.stats_lvl[3] + self.race.stats[3]
-        print(f'{self.name} leveled up to level {self.lvl}')
-        print('-----------------------------')
+        events.log.emit(events.LEVEL_UP, self.name, self.lvl)
         # Add new ability
-        new_ability = self.subclass.abilities[self.lvl - 2]
-        print(f'{self.name} gained the ability {new_ability.name}')
+        new_ability = self.subclass.abilities[self.lvl - 2].new_state()
+        events.log.emit(events.ABILITY_GAINED, self.name, new_ability.name)
         self.abilities.append(new_ability)
         # Activate passive abilities
         if new_ability.activation == 'passive':
             new_ability.activate(self, [self])
-        print()
 
 
 class PlayerCharacter(RPGCharacter):
@@ -454,25 +568,29 @@ class PlayerCharacter(RPGCharacter):
         lvl (int): Level (1-5)
         player (bool): always True
         items (dict): items equipt
-        abilities (list): abilities list
+        abilities (list): AbilityState for each ability
     """
 
+    __slots__ = ()
+
     def __init__(self):
         """Create character."""
-        self.name = input('Choose Character Name: ').capitalize()
+        self.name = journal.prompt('Choose Character Name: ').capitalize()
         print('-----------------')
         self.__pick_class()
         print('-----------------')
         self.__pick_subclass(self.rpg_class)
         print('-----------------')
         self.__pick_race()
-        self.cur_hp = float(self.max_hp)
         self.player = True
         self.lvl = 1
         self.xp = 0
         self.abilities = []
+        self.modifiers = {}
         self.items = {'weapon': None, 'chest': None, 'head': None,
                       'hands': None, 'feet': None, 'accessory': None}
+        self._stats = None
+        self.cur_hp = float(self.max_hp)
 
     def __pick_class(self):
         """List and picks a class."""
@@ -489,7 +607,7 @@ class PlayerCharacter(RPGCharacter):
         select = "None"
         while not any(select.lower() == cl.name.lower()
                       for cl in rpg_classes):
-            select = input()
+            select = journal.prompt()
             if not any(select.lower() == cl.name.lower()
                        for cl in rpg_classes):
                 print('Invalid selection, try again')
@@ -513,7 +631,7 @@ class PlayerCharacter(RPGCharacter):
         select_name = "None"
         while not any(select_name.lower() in sc.name.lower()
                       for sc in self.rpg_class.subclasses):
-            select_name = input()
+            select_name = journal.prompt()
             if not any(select_name.lower() in sc.name.lower()
                        for sc in self.rpg_class.subclasses):
                 print('Invalid selection, try again')
@@ -521,10 +639,6 @@ class PlayerCharacter(RPGCharacter):
                 select = next(sc for sc in self.rpg_class.subclasses
                               if select_name.lower() == sc.name.lower())
         self.subclass = select
-        self.atk = select.stats[0]
-        self.ac = select.stats[1]
-        self.dge = select.stats[2]
-        self.max_hp = select.stats[3]
 
     def __pick_race(self):
         """List and picks a race."""
@@ -542,7 +656,7 @@ class PlayerCharacter(RPGCharacter):
         select_name = "None"
         while not any(select_name.lower() == rc.name.lower()
                       for rc in races):
-            select_name = input()
+            select_name = journal.prompt()
             if not any(select_name.lower() == rc.name.lower()
                        for rc in races):
                 print('Invalid selection, try again')
@@ -550,7 +664,3 @@ class PlayerCharacter(RPGCharacter):
                 select = next(rc for rc in races
                               if select_name.lower() == rc.name.lower())
         self.race = select
-        self.atk += select.stats[0]
-        self.ac += select.stats[1]
-        self.dge += select.stats[2]
-        self.max_hp += select.stats[3]
@@ -0,0 +1,214 @@
+"""RPG - Event Log.
+
+Author: Caden VanV
+Version: 10/4/2024
+"""
+
+import collections
+import contextlib
+import sys
+
+# Event kinds
+HIT = 'hit'
+MISS = 'miss'
+DIED = 'died'
+HEALED = 'healed'
+LEVEL_UP = 'level_up'
+ABILITY_GAINED = 'ability_gained'
+ABILITY_USED = 'ability_used'
+BUFFED = 'buffed'
+DEBUFFED = 'debuffed'
+ABILITY_DAMAGE = 'ability_damage'
+BUFF_ENDED = 'buff_ended'
+DEBUFF_ENDED = 'debuff_ended'
+BAND_MOVED = 'band_moved'
+BAND_CHASED = 'band_chased'
+BAND_ARRIVED = 'band_arrived'
+PARTY_STAYED = 'party_stayed'
+PARTY_ARRIVED = 'party_arrived'
+PARTY_MOVED = 'party_moved'
+PARTY_BLOCKED = 'party_blocked'
+
+# How each kind reads, filled in with the event's args
+TEMPLATES = {
+    HIT: '{0} hit their attack against {1} for {2} points',
+    MISS: '{0} missed their attack against {1}',
+    DIED: '{0} has died.',
+    HEALED: '{0} heals by {1} hp and is now at {2}/{3}',
+    LEVEL_UP: '{0} leveled up to level {1}\n-----------------------------',
+    ABILITY_GAINED: '{0} gained the ability {1}\n',
+    ABILITY_USED: '{0} used the ability {1}',
+    BUFFED: '{0}\'s {1} was buffed by {2}',
+    DEBUFFED: '{0}\'s {1} was debuffed by {2}',
+    ABILITY_DAMAGE: '{0} dealt {1} damage to {2}',
+    BUFF_ENDED: 'The buff on {0}\'s {1} for {2} wore off',
+    DEBUFF_ENDED: 'The debuff of {0}\'s {1} for {2} wore off',
+    BAND_MOVED: '{0} has moved {1} {2} and {3} {4} '
+                'and is now {5:.1f} miles {6}',
+    BAND_CHASED: '{0} has moved {1} {2}and {3} {4} towards you '
+                 'and is now {5:.1f} miles {6}',
+    BAND_ARRIVED: '{0} has moved {1} {2}and {3} {4} to you '
+                  'and is now about to attack you',
+    PARTY_STAYED: 'You are already at {0}.',
+    PARTY_ARRIVED: 'You have arrived at {0}.',
+    PARTY_MOVED: 'You have moved towards {0}\n'
+                 'Trip will take an additional {1} days',
+    PARTY_BLOCKED: 'There is no way through to {0}.',
+}
+
+
+def format_event(event):
+    """Turn an event into the line players read.
+
+    Args:
+        event (tuple): (kind, args)
+
+    Returns:
+        str: event text
+    """
+    kind, args = event
+    return TEMPLATES[kind].format(*args)
+
+
+class ConsoleSink:
+    """Prints events.
+
+    Attributes:
+        stream (file): where lines go, defaults to stdout at write time
+    """
+
+    def __init__(self, stream=None):
+        """Create console sink.
+
+        Args:
+            stream (file): where lines go, defaults to stdout
+        """
+        self.stream = stream
+
+    def write(self, events):
+        """Print a batch of events.
+
+        Args:
+            events (iterable): (kind, args) events in order
+        """
+        stream = self.stream or sys.stdout
+        lines = [format_event(event) for event in events]
+        if len(lines) > 0:
+            stream.write('\n'.join(lines) + '\n')
+
+
+class NullSink:
+    """Throws events away, a log with only null sinks records nothing."""
+
+    def write(self, events):
+        """Ignore a batch of events.
+
+        Args:
+            events (iterable): (kind, args) events in order
+        """
+
+
+class PanelSink:
+    """Keeps the last few event lines for an on screen log panel.
+
+    Attributes:
+        lines (deque): newest lines last
+    """
+
+    def __init__(self, size=8):
+        """Create panel sink.
+
+        Args:
+            size (int): lines kept
+        """
+        self.lines = collections.deque(maxlen=size)
+
+    def write(self, events):
+        """Add a batch of events to the panel.
+
+        Args:
+            events (iterable): (kind, args) events in order
+        """
+        for event in events:
+            self.lines.extend(format_event(event).split('\n'))
+
+
+class EventLog:
+    """Ring buffer of events waiting to be handed to sinks.
+
+    Events are stored as (kind, args) tuples and only formatted when a
+    sink that shows them is flushed, so recording one is cheap and a log
+    with nothing to show them to doesn't record at all.
+
+    Attributes:
+        events (deque): events since the last flush, oldest dropped if full
+        sinks (list): sinks that get every flushed event
+        recording (bool): are events being kept
+        dropped (int): events pushed out of a full buffer
+    """
+
+    def __init__(self, sinks=None, capacity=4096):
+        """Create event log.
+
+        Args:
+            sinks (list): sinks to flush to, defaults to the console
+            capacity (int): events kept between flushes
+        """
+        self.events = collections.deque(maxlen=capacity)
+        self.dropped = 0
+        self.set_sinks([ConsoleSink()] if sinks is None else sinks)
+
+    def set_sinks(self, sinks):
+        """Replace every sink, flushing anything already recorded first.
+
+        Args:
+            sinks (list): new sinks
+        """
+        if len(self.events) > 0:
+            self.flush()
+        self.sinks = list(sinks)
+        self.recording = any(not isinstance(sink, NullSink)
+                             for sink in self.sinks)
+
+    def emit(self, kind, *args):
+        """Record an event.
+
+        Args:
+            kind (str): event kind, one of the TEMPLATES keys
+            *args: values filled into the kind's template
+        """
+        if self.recording:
+            if len(self.events) == self.events.maxlen:
+                self.dropped += 1
+            self.events.append((kind, args))
+
+    def flush(self):
+        """Hand every recorded event to the sinks and empty the buffer."""
+        if len(self.events) == 0:
+            return
+        for sink in self.sinks:
+            sink.write(self.events)
+        self.events.clear()
+
+
+log = EventLog()
+
+
+def flush():
+    """Show everything recorded on the game's log so far."""
+    log.flush()
+
+
+@contextlib.contextmanager
+def use_sinks(*sinks):
+    """Send the game's log to other sinks for a while.
+
+    Args:
+        *sinks: sinks to use inside the block
+    """
+    old = log.sinks
+    log.set_sinks(sinks)
+    try:
+        yield log
+    finally:
+        log.set_sinks(old)
@@ -0,0 +1,335 @@
+"""RPG - Headless Simulation.
+
+Author: Caden VanV
+Version: 10/4/2024
+"""
+
+import argparse
+import contextlib
+import math
+import os
+import time
+import actions
+import band_engine
+import chunks
+import entities
+import events
+import instrument
+import map_items
+import rng
+import save_game
+
+
+def strength(members):
+    """Rough fighting strength of a group.
+
+    Args:
+        members (list): entities in the group
+
+    Returns:
+        float: attack times current health, summed
+    """
+    return sum(char.atk * max(0, char.cur_hp) for char in members)
+
+
+class Policy:
+    """Makes every player decision so days can run without input.
+
+    The default policy fights bands it looks strong enough to beat,
+    recruits and shops in settlements it stands in, rests when the party
+    is hurt and otherwise heads for the nearest beatable band, or the
+    nearest settlement if none are close. Subclass it and override any
+    decision to try other play styles.
+
+    Attributes:
+        sight (int): how far away targets are considered, in miles
+        rest_below (float): rest when any member is under this hp fraction
+    """
+
+    def __init__(self, sight=50, rest_below=0.5):
+        """Create policy.
+
+        Args:
+            sight (int): how far away targets are considered, in miles
+            rest_below (float): hp fraction that makes the party rest
+        """
+        self.sight = sight
+        self.rest_below = rest_below
+
+    def player_turn(self, player):
+        """Take the player's turn, used by actions.global_turn.
+
+        Args:
+            player (PlayerParty): player party
+        """
+        enemy = next((band for band in
+                      map_items.hostiles_at(player.x, player.y)
+                      if self.should_fight(player, band)), None)
+        if enemy is not None:
+            actions.create_encounter(player, enemy, self)
+            return
+        settlement = map_items.settlement_at(player.x, player.y)
+        if settlement is not None:
+            actions.restock(settlement)
+            self.recruit(player, settlement)
+            self.shop(player, settlement)
+        if self.should_rest(player):
+            for char in player.members:
+                char.heal(100)
+            return
+        target = self.choose_move(player)
+        if target is not None:
+            player.move_to(target)
+
+    def should_fight(self, player, enemy):
+        """Decide to fight a band on the player's tile.
+
+        Args:
+            player (PlayerParty): player party
+            enemy (Band): hostile band
+
+        Returns:
+            bool: fight or not
+        """
+        return strength(player.members) >= strength(enemy.members)
+
+    def should_rest(self, player):
+        """Decide to rest instead of moving.
+
+        Args:
+            player (PlayerParty): player party
+
+        Returns:
+            bool: rest or not
+        """
+        return any(char.cur_hp < char.max_hp * self.rest_below
+                   for char in player.members)
+
+    def choose_move(self, player):
+        """Pick something to move towards.
+
+        Args:
+            player (PlayerParty): player party
+
+        Returns:
+            MapItem: target, or None to stay put
+        """
+        nearby = map_items.grid.nearest(
+            player.x, player.y, radius=self.sight,
+            accept=lambda item: item.x != player.x or item.y != player.y)
+        bands = [item for item in nearby if item.mobile and item.hostile
+                 and self.should_fight(player, item)]
+        if len(bands) == 0:
+            bands = [item for item in nearby if not item.mobile]
+        if len(bands) == 0:
+            return player.target_move
+        return bands[0]
+
+    def recruit(self, player, settlement):
+        """Recruit characters while there is room and gold.
+
+        Args:
+            player (PlayerParty): player party
+            settlement (Settlement): settlement the party is in
+        """
+        for recruit in list(settlement.recruitables):
+            if len(player.members) >= 5:
+                break
+            char, cost = recruit
+            if cost <= player.gold:
+                player.gold -= cost
+                char.player = True
+                player.members.append(char)
+                settlement.recruitables.remove(recruit)
+
+    def shop(self, player, settlement):
+        """Buy and equip items for empty slots.
+
+        Args:
+            player (PlayerParty): player party
+            settlement (Settlement): settlement the party is in
+        """
+        for item in list(settlement.shop):
+            if item.cost > player.gold:
+                continue
+            wearer = next((char for char in player.members
+                           if char.items[item.type] is None), None)
+            if wearer is None:
+                continue
+            player.gold -= item.cost
+            settlement.shop.remove(item)
+            item.equip(wearer)
+
+    def combat_action(self, char, team, enemy_team):
+        """Act for a player character in combat.
+
+        Uses the first usable ability, otherwise attacks the weakest enemy.
+
+        Args:
+            char (RPGCharacter): character taking its turn
+            team (list): the character's team
+            enemy_team (list): the team being targetted
+        """
+        living = [enemy for enemy in enemy_team if enemy.cur_hp > 0]
+        ability = next((abil for abil in char.abilities
+                        if abil.is_usable()), None)
+        if ability is not None:
+            if ability.target_type == 'self':
+                targets = [char]
+            elif ability.target_type == 'enemy(ies)':
+                targets = living[:ability.target_count]
+            else:
+                targets = team[:ability.target_count]
+            ability.activate(char, targets)
+        else:
+            char.attack(min(living, key=lambda enemy: enemy.cur_hp))
+
+
+class CampaignReport:
+    """Stores timings of a headless campaign.
+
+    Attributes:
+        days (int): days simulated
+        seconds (float): total wall time
+        turn_times (list): wall time of each global_turn in seconds
+        survived (bool): was the party alive at the end
+        seed (int or str): root seed, reruns with it play out the same
+    """
+
+    def __init__(self, days, seconds, turn_times, survived, seed=None):
+        """Create report.
+
+        Args:
+            days (int): days simulated
+            seconds (float): total wall time
+            turn_times (list): wall time of each global_turn
+            survived (bool): was the party alive at the end
+            seed (int or str): root seed of the run
+        """
+        self.seed = seed
+        self.days = days
+        self.seconds = seconds
+        self.turn_times = turn_times
+        self.survived = survived
+
+    def __str__(self):
+        """Print report.
+
+        Returns:
+            str: report info
+        """
+        result = f'Days: {self.days} ({self.days_per_second():.1f}/s)\n'
+        result += f'     Seed: {self.seed}\n'
+        result += f'     Wall Time: {self.seconds:.2f}s\n'
+        result += f'     Survived: {self.survived}\n'
+        result += '     Turn Latency:'
+        for pct in (50, 90, 99, 100):
+            result += f' p{pct} {self.percentile(pct) * 1000:.3f}ms'
+        return result
+
+    def days_per_second(self):
+        """Calculate simulation speed.
+
+        Returns:
+            float: days per second
+        """
+        if self.seconds == 0:
+            return 0.0
+        return self.days / self.seconds
+
+    def percentile(self, pct):
+        """Get a turn latency percentile, nearest rank.
+
+        Args:
+            pct (float): percentile from 0 to 100
+
+        Returns:
+            float: turn time in seconds
+        """
+        if len(self.turn_times) == 0:
+            return 0.0
+        ordered = sorted(self.turn_times)
+        rank = max(1, math.ceil(pct / 100 * len(ordered)))
+        return ordered[rank - 1]
+
+
+def new_campaign():
+    """Build a fresh world and a random player party.
+
+    Returns:
+        PlayerParty: the player's party
+    """
+    map_items.clear_map()
+    leader = entities.RPGCharacter()
+    leader.player = True
+    player = map_items.PlayerParty(leader)
+    startersburg = map_items.Settlement('Startersburg', 1000)
+    startersburg.x = player.x
+    startersburg.y = player.y
+    chunks.enable()
+    return player
+
+
+def run_campaign(days, policy=None, seed=None, quiet=True, use_numpy=False,
+                 resume=None, checkpoint=None, every=100):
+    """Run global turns until the day count or the party is wiped out.
+
+    Args:
+        days (int): days to simulate
+        policy (Policy): player decisions, defaults to Policy()
+        seed (int or str): root seed, a random one is picked if None
+        quiet (bool): throw away the event log and everything printed
+        use_numpy (bool): move bands with the band engine
+        resume (str): save to carry on from instead of a new world
+        checkpoint (str): save file written every few days, optional
+        every (int): days between checkpoints
+
+    Returns:
+        CampaignReport: timings
+    """
+    if policy is None:
+        policy = Policy()
+    rng.seed(seed)
+    turn_times = []
+    with contextlib.ExitStack() as stack:
+        if quiet:
+            stack.enter_context(events.use_sinks(events.NullSink()))
+            sink = stack.enter_context(open(os.devnull, 'w'))
+            stack.enter_context(contextlib.redirect_stdout(sink))
+        if resume is None:
+            player = new_campaign()
+        else:
+            player = save_game.load(resume)
+        if use_numpy:
+            band_engine.enable()
+        day = map_items.current_day + 1
+        last_day = day + days - 1
+        start = time.perf_counter()
+        while day <= last_day and len(player.members) > 0:
+            turn_start = time.perf_counter()
+            day = actions.global_turn(player, day, policy)
+            turn_times.append(time.perf_counter() - turn_start)
+            if checkpoint is not None and (day - 1) % every == 0:
+                save_game.save(player, checkpoint)
+        seconds = time.perf_counter() - start
+    return CampaignReport(len(turn_times), seconds, turn_times,
+                          len(player.members) > 0, rng.service.seed)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description='Run TextRPG headless.',
+        epilog=f'Set {instrument.ENV_VAR} to a .json or .csv file to time '
+               'the hot paths and write them there at exit.')
+    parser.add_argument('--days', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--numpy', action='store_true',
+                        help='move bands with the NumPy band engine')
+    parser.add_argument('--resume', help='save file to carry on from')
+    parser.add_argument('--checkpoint', help='save file to keep updated')
+    parser.add_argument('--every', type=int, default=100,
+                        help='days between checkpoints')
+    args = parser.parse_args()
+    print(run_campaign(args.days, seed=args.seed, use_numpy=args.numpy,
+                       resume=args.resume, checkpoint=args.checkpoint,
+                       every=args.every))
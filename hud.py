@@ -0,0 +1,164 @@
+"""RPG - Performance Overlay.
+
+Author: Caden VanV
+Version: 10/4/2024
+"""
+
+import collections
+import instrument
+import pygame
+
+# Frames kept for the histogram, two seconds at 60 frames a second
+FRAME_SAMPLES = 120
+# Upper edge in milliseconds of each histogram bar, the last is the rest
+FRAME_BUCKETS = (8, 12, 17, 20, 33, 50)
+# Seconds between redrawing the overlay's text
+REFRESH = 0.25
+# Pixels between lines and the width of the longest histogram bar
+LINE_HEIGHT = 22
+BAR_WIDTH = 160
+
+
+class PerfOverlay:
+    """Shows how fast the window and the game are going.
+
+    Drawn over the top right corner of the map when visible. The text is
+    only remade a few times a second from the frames recorded since, so
+    showing it costs one blit a frame.
+
+    Attributes:
+        visible (bool): drawn or not
+        frames (deque): milliseconds each recent frame took
+        draw_calls (deque): blits and fills the renderer made each frame
+        font (Font): font for the text
+        surface (Surface): last drawn overlay
+    """
+
+    def __init__(self, font=None):
+        """Create hidden overlay.
+
+        Args:
+            font (Font): font for the text, pygame's default if None
+        """
+        self.visible = False
+        self.frames = collections.deque(maxlen=FRAME_SAMPLES)
+        self.draw_calls = collections.deque(maxlen=FRAME_SAMPLES)
+        self.font = pygame.font.Font(None, 24) if font is None else font
+        self.surface = None
+        self._refreshed = 0
+
+    def toggle(self):
+        """Show it if hidden, hide it if shown.
+
+        Returns:
+            bool: visible now
+        """
+        self.visible = not self.visible
+        self.surface = None
+        return self.visible
+
+    def tick(self, milliseconds, draw_calls):
+        """Record how a frame went.
+
+        Args:
+            milliseconds (int): time since the last frame, from Clock.tick
+            draw_calls (int): blits and fills the renderer made
+        """
+        self.frames.append(milliseconds)
+        self.draw_calls.append(draw_calls)
+
+    def lines(self, fps, snapshot):
+        """Write out what the overlay shows.
+
+        Args:
+            fps (float): average frames per second
+            snapshot (WorldSnapshot): latest world
+
+        Returns:
+            list: lines of text
+        """
+        calls = self.draw_calls
+        average = sum(calls) / len(calls) if calls else 0
+        most = max(calls, default=0)
+        lines = [f'FPS {fps:.0f}',
+                 f'Draw calls {average:.0f} a frame, {most} most',
+                 f'Map items {snapshot.items}   day {snapshot.day}']
+        if not snapshot.turn:
+            # Same lines as after a turn, so the overlay never changes size
+            lines.append('Last turn -')
+            lines.extend(f'  {phase:<8}       - ms'
+                         for phase in instrument.TURN_PHASES)
+            return lines
+        *phases, (_total, total) = snapshot.turn
+        lines.append(f'Last turn {total * 1000:.1f} ms')
+        for phase, seconds in phases:
+            lines.append(f'  {phase:<8}{seconds * 1000:8.2f} ms')
+        return lines
+
+    def histogram(self):
+        """Count recent frames by how long they took.
+
+        Returns:
+            list: (label, frames) for each of FRAME_BUCKETS then the rest
+        """
+        counts = [0] * (len(FRAME_BUCKETS) + 1)
+        for milliseconds in self.frames:
+            i = 0
+            while i < len(FRAME_BUCKETS) and milliseconds >= FRAME_BUCKETS[i]:
+                i += 1
+            counts[i] += 1
+        labels = [f'<{edge}' for edge in FRAME_BUCKETS]
+        labels.append(f'{FRAME_BUCKETS[-1]}+')
+        return list(zip(labels, counts))
+
+    def render(self, fps, snapshot):
+        """Remake the overlay surface.
+
+        Args:
+            fps (float): average frames per second
+            snapshot (WorldSnapshot): latest world
+        """
+        lines = self.lines(fps, snapshot)
+        bars = self.histogram()
+        width = 140 + BAR_WIDTH
+        height = LINE_HEIGHT * (len(lines) + len(bars) + 1) + 10
+        surface = pygame.Surface((width, height))
+        surface.fill('black')
+        y = 5
+        for line in lines:
+            surface.blit(self.font.render(line, True, 'white'), (10, y))
+            y += LINE_HEIGHT
+        surface.blit(self.font.render('Frame ms', True, 'white'), (10, y))
+        y += LINE_HEIGHT
+        most = max(count for _label, count in bars) or 1
+        for i, (label, count) in enumerate(bars):
+            # Frames over one 60 FPS frame are shown in red
+            colour = 'green' if i < 3 else 'red'
+            surface.blit(self.font.render(label, True, 'white'), (10, y))
+            surface.fill(colour, (60, y + 4, BAR_WIDTH * count // most,
+                                  LINE_HEIGHT - 8))
+            surface.blit(self.font.render(str(count), True, 'white'),
+                         (width - 40, y))
+            y += LINE_HEIGHT
+        self.surface = surface
+
+    def draw(self, screen, fps, snapshot):
+        """Put the overlay on screen if it's visible.
+
+        Args:
+            screen (Surface): display surface
+            fps (float): average frames per second
+            snapshot (WorldSnapshot): latest world
+
+        Returns:
+            list: rectangles that changed, for pygame.display.update
+        """
+        if not self.visible:
+            return []
+        now = pygame.time.get_ticks()
+        if self.surface is None or now - self._refreshed >= REFRESH * 1000:
+            self._refreshed = now
+            self.render(fps, snapshot)
+        rect = self.surface.get_rect(topright=(screen.get_width() - 10, 10))
+        screen.blit(self.surface, rect)
+        return [rect]
@@ -0,0 +1,359 @@
+"""RPG - Instrumentation.
+
+Author: Caden VanV
+Version: 10/4/2024
+"""
+
+import atexit
+import csv
+import functools
+import json
+import os
+import random
+import sys
+import time
+
+# Set to a file name to measure every span and write them out at exit,
+# .csv files get CSV and anything else JSON
+ENV_VAR = 'TEXTRPG_PROFILE'
+# Set to 0 to skip tracking allocated memory blocks, which costs a little
+# per span
+ALLOCS_ENV_VAR = 'TEXTRPG_PROFILE_ALLOCS'
+DEFAULT_PATH = 'textrpg_profile.json'
+# Most durations kept per span for percentiles
+SAMPLES = 10000
+# Columns written for each span
+FIELDS = ('name', 'count', 'total_ms', 'mean_us', 'p50_us', 'p99_us',
+          'max_us', 'net_blocks', 'net_blocks_per_call')
+# Parts of a global turn in the order they run, see actions.last_turn.
+# Restocking happens during the player's turn whenever they trade at a
+# settlement
+TURN_PHASES = ('world', 'wander', 'spawns', 'restock', 'player')
+
+
+class Span:
+    """Stores what has been measured for one named span.
+
+    Calls inside a span are counted in it too, so a span's time
+    includes the time of any spans it calls.
+
+    Attributes:
+        name (str): name
+        count (int): times it ran
+        total (float): seconds spent in it
+        longest (float): seconds the slowest run took
+        net_blocks (int): change in allocated memory blocks over its runs,
+            from sys.getallocatedblocks, so blocks freed inside a run
+            cancel out and it is not a count of allocations
+        samples (list): seconds of up to SAMPLES runs, picked at random
+    """
+
+    def __init__(self, name):
+        """Create span that hasn't run.
+
+        Args:
+            name (str): name
+        """
+        self.name = name
+        self.count = 0
+        self.total = 0.0
+        self.longest = 0.0
+        self.net_blocks = 0
+        self.samples = []
+
+    def record(self, seconds, net_blocks=0):
+        """Add one run.
+
+        Args:
+            seconds (float): how long it took
+            net_blocks (int): change in allocated memory blocks over it
+        """
+        self.count += 1
+        self.total += seconds
+        self.net_blocks += net_blocks
+        if seconds > self.longest:
+            self.longest = seconds
+        if len(self.samples) < SAMPLES:
+            self.samples.append(seconds)
+        else:
+            # Reservoir sampling keeps every run equally likely to be kept
+            i = _sampler.randrange(self.count)
+            if i < SAMPLES:
+                self.samples[i] = seconds
+
+    def percentile(self, percent):
+        """Get a percentile of the run times, nearest rank.
+
+        Args:
+            percent (float): 0 to 100
+
+        Returns:
+            float: seconds
+        """
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        rank = max(1, -(-len(ordered) * percent // 100))
+        return ordered[int(rank) - 1]
+
+    def summary(self):
+        """Sum up the span for a report.
+
+        Returns:
+            dict: one value for each of FIELDS
+        """
+        count = self.count
+        return {'name': self.name,
+                'count': count,
+                'total_ms': round(self.total * 1e3, 3),
+                'mean_us': round(self.total / count * 1e6, 2) if count else 0,
+                'p50_us': round(self.percentile(50) * 1e6, 2),
+                'p99_us': round(self.percentile(99) * 1e6, 2),
+                'max_us': round(self.longest * 1e6, 2),
+                'net_blocks': self.net_blocks,
+                'net_blocks_per_call': round(self.net_blocks / count, 2)
+                if count else 0}
+
+
+class _Timer:
+    """Times one run of a span as a context manager."""
+
+    __slots__ = ('span', 'start', 'start_blocks')
+
+    def __init__(self, span):
+        """Create timer.
+
+        Args:
+            span (Span): span to record the run in
+        """
+        self.span = span
+
+    def __enter__(self):
+        """Start timing."""
+        self.start_blocks = sys.getallocatedblocks() if count_allocs else 0
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        """Stop timing and record the run."""
+        seconds = time.perf_counter() - self.start
+        net_blocks = (sys.getallocatedblocks() - self.start_blocks
+                      if count_allocs else 0)
+        self.span.record(seconds, net_blocks)
+        return False
+
+
+class _NullTimer:
+    """Does nothing, shared by every span while measuring is off."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        """Do nothing."""
+        return self
+
+    def __exit__(self, *exc):
+        """Do nothing."""
+        return False
+
+
+# Measuring is on, and allocated blocks are tracked while it is
+enabled = False
+count_allocs = True
+# Span name to Span
+spans = {}
+# File written at exit, None to not write one
+path = None
+# (function, timing wrapper) for everything decorated with timed, the
+# wrappers are only put in place while measuring is on
+_timed = []
+# Picks which run times are kept, separate from the game's streams so
+# measuring never changes a seeded game
+_sampler = random.Random(0)
+_null = _NullTimer()
+
+
+def _owner(func):
+    """Find the module or class a function is an attribute of.
+
+    Args:
+        func (function): module level function or method
+
+    Returns:
+        object: module or class, None if it can't be found
+    """
+    owner = sys.modules.get(func.__module__)
+    for part in func.__qualname__.split('.')[:-1]:
+        owner = getattr(owner, part, None)
+    return owner
+
+
+def _swap(old, new):
+    """Put one function in place of another wherever it is defined.
+
+    Args:
+        old (function): function expected there now
+        new (function): function to put there
+    """
+    owner = _owner(old)
+    name = old.__name__
+    if owner is not None and owner.__dict__.get(name) is old:
+        setattr(owner, name, new)
+
+
+def enable(out=None, allocations=True):
+    """Start measuring spans.
+
+    Every function decorated with timed gets its timing wrapper.
+
+    Args:
+        out (str): file to write at exit, None to only write on demand
+        allocations (bool): track the change in allocated memory blocks
+    """
+    global enabled, count_allocs, path
+    enabled = True
+    count_allocs = allocations
+    path = out
+    for func, wrapper in _timed:
+        _swap(func, wrapper)
+
+
+def disable():
+    """Stop measuring, what's been measured is kept.
+
+    Functions decorated with timed get their originals back.
+    """
+    global enabled
+    enabled = False
+    for func, wrapper in _timed:
+        _swap(wrapper, func)
+
+
+def reset():
+    """Forget everything measured."""
+    spans.clear()
+
+
+def get_span(name):
+    """Get the span for a name, making it if it's new.
+
+    Args:
+        name (str): span name
+
+    Returns:
+        Span: span
+    """
+    found = spans.get(name)
+    if found is None:
+        found = spans[name] = Span(name)
+    return found
+
+
+def span(name):
+    """Measure a block of code.
+
+    Use as "with instrument.span('name'):". While measuring is off this
+    returns a shared object that does nothing.
+
+    Args:
+        name (str): span name
+
+    Returns:
+        context manager: times the block
+    """
+    if not enabled:
+        return _null
+    return _Timer(get_span(name))
+
+
+def timed(name=None):
+    """Decorate a function so every call is measured as a span.
+
+    The function is left as it is while measuring is off, so it costs
+    nothing. enable puts a timing wrapper in its place and disable takes
+    it out again.
+
+    Args:
+        name (str): span name, module and qualified name of the
+            function if None
+
+    Returns:
+        function: decorator
+    """
+    def decorate(func):
+        label = name
+        if label is None:
+            label = f'{func.__module__}.{func.__qualname__}'
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with _Timer(get_span(label)):
+                return func(*args, **kwargs)
+        _timed.append((func, wrapper))
+        # Still being defined, so nothing to swap yet
+        return wrapper if enabled else func
+    return decorate
+
+
+def report():
+    """Sum up every span, slowest total first.
+
+    Returns:
+        list: dict from Span.summary for each span
+    """
+    ordered = sorted(spans.values(), key=lambda found: -found.total)
+    return [found.summary() for found in ordered]
+
+
+def dump(out=None):
+    """Write every span to a file.
+
+    Args:
+        out (str): file to write, path or DEFAULT_PATH if None, .csv files
+            get CSV and anything else JSON
+
+    Returns:
+        str: file written
+    """
+    if out is None:
+        out = DEFAULT_PATH if path is None else path
+    rows = report()
+    with open(out, 'w', newline='') as file:
+        if out.lower().endswith('.csv'):
+            writer = csv.DictWriter(file, fieldnames=FIELDS)
+            writer.writeheader()
+            writer.writerows(rows)
+        else:
+            json.dump(rows, file, indent=2)
+    return out
+
+
+def write_at_exit():
+    """Write spans to path if it's set and anything was measured.
+
+    Registered to run at exit. A process that ends without running exit
+    handlers, like a multiprocessing worker, calls it itself.
+    """
+    if path is not None and spans:
+        dump()
+
+
+def enable_from_env():
+    """Start measuring if ENV_VAR is set, writing to it at exit.
+
+    Returns:
+        bool: measuring was started
+    """
+    out = os.environ.get(ENV_VAR)
+    if not out:
+        return False
+    if out == '1':
+        out = DEFAULT_PATH
+    # Written at exit, after the game may have changed folder
+    enable(os.path.abspath(out), os.environ.get(ALLOCS_ENV_VAR, '1') != '0')
+    return True
+
+
+atexit.register(write_at_exit)
+# On as soon as anything is imported, so every entry point is covered
+enable_from_env()
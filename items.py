@@ -4,23 +4,31 @@ Author: Caden VanV
 Version: 10/4/2024
 """
 
+import rng
+
 
 bonus_order = ('ATK', 'AC', 'DGE', 'HP', 'DMG', 'healing')
+# Random stream for shops and drops, see rng.py
+_loot = rng.stream(rng.LOOT)
 
 
 class Item:
     """Stores a unique item.
 
+    Items are shared catalog entries, the same object sits in every shop,
+    inventory and equip slot that holds one, so they keep no per-owner
+    state. Who wears an item is only stored in the wearer's items dict.
+
     Attributes:
         name (str): name
         type (str): type (weapon, chest, head, hands, feet, accessory)
         rarity (str): rarity (common, well-made, expert, masterwork)
         effects (tuple): effects (atk, ac, dge, hp)
         cost (int): gold cost to buy
-        owner (Band): owner
-        equipt (RPGCharacter): person wearing
     """
 
+    __slots__ = ('name', 'type', 'rarity', 'effects', 'cost')
+
     def __init__(self, name='Spear', type='weapon',
                  rarity='common', effects=(2, 0, 0, 0)):
         """Create item.
@@ -35,8 +43,6 @@ class Item:
         self.type = type
         self.rarity = rarity
         self.effects = effects
-        self.owner = None
-        self.equipt = None
         # Calculate cost
         if rarity == 'common':
             cost_base = 10
@@ -95,26 +101,22 @@ class Item:
             person (RPGCharacter): new wearer
         """
         if person.items[self.type] is not None:
-            person.items[self.type].unequip()
+            person.items[self.type].unequip(person)
         person.items[self.type] = self
-        self.equipt = person
-        self.equipt.atk += self.effects[0]
-        self.equipt.ac += self.effects[1]
-        self.equipt.dge += self.effects[2]
-        self.equipt.max_hp += self.effects[3]
-        self.equipt.cur_hp += self.effects[3]
-        print(f'{self.equipt.name} equipt {self.name}')
-
-    def unequip(self):
-        """Unequip self."""
-        self.equipt.items[self.type] = None
-        self.equipt.atk -= self.effects[0]
-        self.equipt.ac -= self.effects[1]
-        self.equipt.dge -= self.effects[2]
-        self.equipt.max_hp -= self.effects[3]
-        self.equipt.cur_hp -= self.effects[3]
-        print(f'Unequipt {self.name} from {self.equipt.name}')
-        self.equipt = None
+        person.invalidate_stats()
+        person.cur_hp += self.effects[3]
+        print(f'{person.name} equipt {self.name}')
+
+    def unequip(self, person):
+        """Unequip self.
+
+        Args:
+            person (RPGCharacter): current wearer
+        """
+        person.items[self.type] = None
+        person.invalidate_stats()
+        person.cur_hp -= self.effects[3]
+        print(f'Unequipt {self.name} from {person.name}')
 
 
 all_items = (Item('Ring of Health', 'accessory', 'common', (0, 0, 0, 2)),
@@ -199,6 +201,111 @@ expert_items = [item for item in all_items if item.rarity == 'expert']
 masterwork_items = [item for item in all_items if item.rarity == 'masterwork']
 
 
+class AliasTable:
+    """Weighted random picks in O(1) using Walker's alias method.
+
+    Attributes:
+        choices (tuple): things that can be picked
+        prob (list): chance to keep each column's own choice
+        alias (list): index picked instead when a column isn't kept
+    """
+
+    def __init__(self, choices, weights):
+        """Build table, Vose's version of Walker's method.
+
+        Args:
+            choices (list): things that can be picked
+            weights (list): relative weight of each choice
+        """
+        self.choices = tuple(choices)
+        n = len(self.choices)
+        total = sum(weights)
+        scaled = [weight * n / total for weight in weights]
+        self.prob = [1.0] * n
+        self.alias = list(range(n))
+        small = [i for i, weight in enumerate(scaled) if weight < 1]
+        large = [i for i, weight in enumerate(scaled) if weight >= 1]
+        while small and large:
+            less = small.pop()
+            more = large.pop()
+            self.prob[less] = scaled[less]
+            self.alias[less] = more
+            scaled[more] -= 1 - scaled[less]
+            if scaled[more] < 1:
+                small.append(more)
+            else:
+                large.append(more)
+        # Whatever is left is 1 give or take rounding error
+
+    def sample(self, stream=_loot):
+        """Pick one choice.
+
+        Args:
+            stream (Random): random generator, the loot stream by default
+
+        Returns:
+            object: picked choice
+        """
+        roll = stream.random() * len(self.choices)
+        column = int(roll)
+        if roll - column < self.prob[column]:
+            return self.choices[column]
+        return self.choices[self.alias[column]]
+
+    def sample_many(self, k, stream=_loot):
+        """Pick k choices with replacement.
+
+        Args:
+            k (int): how many
+            stream (Random): random generator, the loot stream by default
+
+        Returns:
+            list: picked choices
+        """
+        n = len(self.choices)
+        choices = self.choices
+        prob = self.prob
+        alias = self.alias
+        result = []
+        for _i in range(k):
+            roll = stream.random() * n
+            column = int(roll)
+            if roll - column < prob[column]:
+                result.append(choices[column])
+            else:
+                result.append(choices[alias[column]])
+        return result
+
+
+# Chance a shop slot rolls each rarity, split evenly between its items
+shop_rarity_odds = {'common': 0.75, 'well-made': 0.15,
+                    'expert': 0.07, 'masterwork': 0.03}
+# Rarity of the item a monster band drops, by band level 1-5
+drop_rarity = ('common', 'common', 'well-made', 'expert', 'masterwork')
+rarity_pools = {'common': common_items, 'well-made': well_made_items,
+                'expert': expert_items, 'masterwork': masterwork_items}
+shop_table = AliasTable(
+    all_items, [shop_rarity_odds[item.rarity] /
+                len(rarity_pools[item.rarity]) for item in all_items])
+drop_tables = tuple(AliasTable(rarity_pools[rarity],
+                               [1] * len(rarity_pools[rarity]))
+                    for rarity in drop_rarity)
+
+
+def drop_table(lvl):
+    """Get the loot table for a monster band level.
+
+    Args:
+        lvl (int): band level, anything outside 1-5 drops common items
+
+    Returns:
+        AliasTable: items the band can drop
+    """
+    if 1 <= lvl <= len(drop_tables):
+        return drop_tables[lvl - 1]
+    return drop_tables[0]
+
+
 def print_item_list(your_list):
     """Print all items in list.
 
@@ -0,0 +1,268 @@
+"""RPG - Decision Journal.
+
+Author: Caden VanV
+Version: 10/4/2024
+"""
+
+import collections
+import contextlib
+import json
+
+VERSION = 1
+DEFAULT_PATH = 'textrpg.journal'
+
+# Journal being written, None when decisions aren't recorded
+recorder = None
+# Answers by day while replaying, None when answers come from input()
+feed = None
+# Answers left for the day being replayed
+_today = collections.deque()
+# Asks the player instead of input() when set, like a window's text box
+reader = None
+
+
+class JournalError(Exception):
+    """Raised when a journal can't be read or a replay goes out of sync."""
+
+
+class EndOfJournal(Exception):
+    """Raised when a replay asks for more answers than were recorded."""
+
+
+class Journal:
+    """Append-only record of every answer the player typed.
+
+    The file is plain text. The first line is a JSON header with the root
+    seed, then one line per event: 'd <day>' when a day starts,
+    'a <answer>' for each answer and 's <day> <path>' for each snapshot
+    saved at the end of a day. Lines are flushed at the end of every day.
+
+    Attributes:
+        path (str): journal file
+        file (file): open journal file
+        snapshot_every (int): days between snapshots, 0 for none
+    """
+
+    def __init__(self, path, seed, start=None, snapshot_every=10):
+        """Start a new journal, replacing any file already there.
+
+        Args:
+            path (str): journal file
+            seed (int or str): root seed of the campaign
+            start (str): save the campaign was loaded from, if any
+            snapshot_every (int): days between snapshots, 0 for none
+        """
+        self.path = path
+        self.snapshot_every = snapshot_every
+        self.file = open(path, 'w', encoding='utf-8')
+        self.file.write(json.dumps({'version': VERSION, 'seed': seed,
+                                    'start': start}) + '\n')
+        self.file.flush()
+
+    def record(self, answer):
+        """Write one answer.
+
+        Args:
+            answer (str): what the player typed
+        """
+        self.file.write(f'a {answer}\n')
+
+    def begin_day(self, day):
+        """Mark the start of a day.
+
+        Args:
+            day (int): day number
+        """
+        self.file.write(f'd {day}\n')
+
+    def end_day(self, day):
+        """Finish a day, deciding whether it gets a snapshot.
+
+        Args:
+            day (int): day number
+
+        Returns:
+            str: path the caller should save a snapshot to, or None
+        """
+        path = None
+        if self.snapshot_every > 0 and day % self.snapshot_every == 0:
+            path = f'{self.path}.{day}.sav'
+            self.file.write(f's {day} {path}\n')
+        self.file.flush()
+        return path
+
+    def close(self):
+        """Flush and close the file."""
+        self.file.close()
+
+
+class JournalRecord:
+    """Stores a journal read back from disk.
+
+    Attributes:
+        seed (int or str): root seed of the campaign
+        start (str): save the campaign was loaded from, or None
+        answers (dict): day to list of answers, day 0 is before day 1
+        snapshots (list): (day, save path) in order
+        last_day (int): last day that was started
+    """
+
+    def __init__(self, seed, start):
+        """Create empty record.
+
+        Args:
+            seed (int or str): root seed of the campaign
+            start (str): save the campaign was loaded from, or None
+        """
+        self.seed = seed
+        self.start = start
+        self.answers = {0: []}
+        self.snapshots = []
+        self.last_day = 0
+
+
+def read(path):
+    """Read a journal.
+
+    Args:
+        path (str): journal file
+
+    Returns:
+        JournalRecord: everything recorded
+    """
+    with open(path, encoding='utf-8') as file:
+        try:
+            header = json.loads(file.readline())
+        except ValueError:
+            raise JournalError(f'{path} is not a journal') from None
+        if header.get('version', VERSION + 1) > VERSION:
+            raise JournalError(f'{path} is from a newer version')
+        record = JournalRecord(header['seed'], header.get('start'))
+        day = 0
+        for line in file:
+            kind, _sep, value = line.rstrip('\n').partition(' ')
+            if kind == 'a':
+                record.answers[day].append(value)
+            elif kind == 'd':
+                day = int(value)
+                record.answers[day] = []
+                record.last_day = day
+            elif kind == 's':
+                snap_day, _sep, snap_path = value.partition(' ')
+                record.snapshots.append((int(snap_day), snap_path))
+            else:
+                raise JournalError(f'bad line in {path}: {line!r}')
+    return record
+
+
+def prompt(text=''):
+    """Ask the player something, use instead of input().
+
+    Answers come from the keyboard or the reader, or from the journal
+    while replaying, and are written to the journal being recorded.
+
+    Args:
+        text (str): question shown to the player
+
+    Returns:
+        str: answer
+    """
+    if feed is None:
+        answer = input(text) if reader is None else reader(text)
+    elif len(_today) > 0:
+        answer = _today.popleft()
+    else:
+        raise EndOfJournal()
+    if recorder is not None:
+        recorder.record(answer)
+    return answer
+
+
+def begin_day(day):
+    """Tell the journal a day is starting, used by actions.global_turn.
+
+    Args:
+        day (int): day number
+    """
+    if recorder is not None:
+        recorder.begin_day(day)
+    if feed is not None:
+        if len(_today) > 0:
+            raise JournalError(f'replay went out of sync before day {day}, '
+                               f'{len(_today)} answers were not used')
+        _today.extend(feed.get(day, ()))
+
+
+def end_day(day):
+    """Tell the journal a day is over, used by actions.global_turn.
+
+    Args:
+        day (int): day number
+
+    Returns:
+        str: path to save a snapshot to, or None
+    """
+    if recorder is None:
+        return None
+    return recorder.end_day(day)
+
+
+def start_recording(path=DEFAULT_PATH, seed=None, start=None,
+                    snapshot_every=10):
+    """Record every answer from now on.
+
+    Args:
+        path (str): journal file
+        seed (int or str): root seed of the campaign
+        start (str): save the campaign was loaded from, if any
+        snapshot_every (int): days between snapshots, 0 for none
+    """
+    global recorder
+    stop_recording()
+    recorder = Journal(path, seed, start, snapshot_every)
+
+
+def stop_recording():
+    """Close the journal being recorded, if any."""
+    global recorder
+    if recorder is not None:
+        recorder.close()
+        recorder = None
+
+
+def start_replay(answers, day=0):
+    """Answer prompts from recorded answers instead of input().
+
+    Args:
+        answers (dict): day to list of answers, see JournalRecord
+        day (int): day whose answers are used until the next day starts,
+            None to start with nothing until then
+    """
+    global feed
+    feed = answers
+    _today.clear()
+    if day is not None:
+        _today.extend(answers.get(day, ()))
+
+
+def stop_replay():
+    """Go back to answering prompts with input()."""
+    global feed
+    feed = None
+    _today.clear()
+
+
+@contextlib.contextmanager
+def use_reader(ask):
+    """Get answers from a function instead of input() for a while.
+
+    Args:
+        ask (function): takes the question and returns the answer
+    """
+    global reader
+    old = reader
+    reader = ask
+    try:
+        yield
+    finally:
+        reader = old
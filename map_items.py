@@ -4,13 +4,231 @@ Author: Caden VanV
 Version: 10/4/2024
 """
 
-import random
 import entities
+import events
+import instrument
 import math
 import items
+import pathfinding
+import rng
+import rpg_lists
+import spatial
 
 
 map_items = []
+grid = spatial.GridIndex()
+# BandEngine from band_engine when bands are simulated as arrays
+engine = None
+# ChunkWorld from chunks when the world is generated as the player explores
+world = None
+# Day the world is on, settlements restock up to it when traded with
+current_day = 0
+# Map items made so far, each one's serial is its place in that count
+spawned = 0
+# Day to bands booked to catch up on wandering that day, see Band.schedule
+due_bands = {}
+# Random streams, see rng.py. Every band shares one wander stream
+_world = rng.stream(rng.WORLD)
+_economy = rng.stream(rng.ECONOMY)
+_wander = rng.stream(rng.WANDER)
+# Daily wealth drift is a uniform factor in [0.95, 1.05), these are the
+# mean and variance of its log so many days can be drawn at once
+_DRIFT_LOW = 0.95
+_DRIFT_HIGH = 1.05
+_DRIFT_LOG_MEAN = ((_DRIFT_HIGH * math.log(_DRIFT_HIGH) - _DRIFT_HIGH -
+                    _DRIFT_LOW * math.log(_DRIFT_LOW) + _DRIFT_LOW) /
+                   (_DRIFT_HIGH - _DRIFT_LOW))
+_DRIFT_LOG_VAR = ((_DRIFT_HIGH * (math.log(_DRIFT_HIGH) ** 2 -
+                                  2 * math.log(_DRIFT_HIGH) + 2) -
+                   _DRIFT_LOW * (math.log(_DRIFT_LOW) ** 2 -
+                                 2 * math.log(_DRIFT_LOW) + 2)) /
+                  (_DRIFT_HIGH - _DRIFT_LOW) - _DRIFT_LOG_MEAN ** 2)
+# Below this many days the drift is rolled day by day
+_DRIFT_EXACT_DAYS = 8
+# Bands this close to the player wander every day
+NEAR_RANGE = 50
+# Hostile bands this close to the player chase it, must be under NEAR_RANGE
+CHASE_RANGE = 15
+# Chasers find their way over this many miles around the player
+CHASE_FIELD = 2 * CHASE_RANGE
+# Items this close to the player show up in the travel menu
+TRAVEL_RANGE = 50
+# Bands further away catch up on wandering this many days at a time
+COARSE_DAYS = 4
+
+
+class Camera:
+    """Stores the point distances and directions are measured from.
+
+    Attributes:
+        x (int): horizontal world location, the player's location
+        y (int): vertical world location, the player's location
+    """
+
+    def __init__(self):
+        """Create camera at the world origin."""
+        self.x = 0
+        self.y = 0
+
+    def follow(self, item):
+        """Center camera on an item.
+
+        Args:
+            item (MapItem): item to center on
+        """
+        self.x = item.x
+        self.y = item.y
+
+
+camera = Camera()
+
+
+def clear_map():
+    """Remove every map item and put the camera back at the origin."""
+    global engine, world, current_day, spawned
+    map_items.clear()
+    grid.clear()
+    due_bands.clear()
+    spawned = 0
+    camera.x = 0
+    camera.y = 0
+    engine = None
+    world = None
+    current_day = 0
+    pathfinding.reset()
+
+
+def random_location():
+    """Pick a location for a new map item somewhere near the camera.
+
+    Returns:
+        tuple: (x, y)
+    """
+    return (camera.x + _world.randint(-100, 100),
+            camera.y + _world.randint(-100, 100))
+
+
+def random_settlement_name():
+    """Make up a settlement name.
+
+    Returns:
+        str: name
+    """
+    s_pref = [pref for pref in rpg_lists.rpg_names
+              if len(pref) <= 4]
+    s_pref = s_pref + list(rpg_lists.settlement_pref)
+    suf = _world.randint(0, len(rpg_lists.settlement_suf) - 1)
+    settlement_name = f'{s_pref[_world.randint(0, len(s_pref) - 1)]}'
+    settlement_name += f'{rpg_lists.settlement_suf[suf]}'
+    return settlement_name
+
+
+def drift_wealth(wealth, days):
+    """Apply several days of random wealth drift at once.
+
+    Each day wealth is multiplied by a uniform factor in [0.95, 1.05).
+    Short gaps roll every day, longer ones draw the log of the product
+    from a normal distribution with the same mean and variance.
+
+    Args:
+        wealth (int): starting wealth
+        days (int): days of drift
+
+    Returns:
+        int: wealth afterwards
+    """
+    if days < _DRIFT_EXACT_DAYS:
+        for _i in range(days):
+            wealth = int(wealth * ((_economy.random() / 10) + 0.95))
+        return wealth
+    log_factor = _economy.gauss(days * _DRIFT_LOG_MEAN,
+                                math.sqrt(days * _DRIFT_LOG_VAR))
+    return int(wealth * math.exp(log_factor))
+
+
+def walk_variance(movement):
+    """Get the spread of one day of wandering, see Band.random_step.
+
+    Args:
+        movement (int): miles moved per day
+
+    Returns:
+        tuple: variance of the horizontal and vertical step
+    """
+    var_x = movement * (movement + 1) / 3
+    var_y = ((movement ** 2 + (movement - 1) * movement *
+              (2 * movement - 1) / 3) / (2 * movement + 1))
+    return var_x, var_y
+
+
+def chasers():
+    """Get the hostile bands close enough to chase the player.
+
+    Returns:
+        list: hostile bands within CHASE_RANGE of the camera, in the order
+            they were spawned
+    """
+    return sorted((item for item in grid.items_within(camera.x, camera.y,
+                                                      CHASE_RANGE)
+                   if item.mobile and item.hostile),
+                  key=lambda item: item.serial)
+
+
+def hostiles_at(x, y):
+    """Get the hostile bands on a tile.
+
+    Args:
+        x (int): horizontal location
+        y (int): vertical location
+
+    Returns:
+        list: hostile bands, ordered by name and size so the order doesn't
+            depend on how they got there
+    """
+    return sorted((item for item in grid.items_at(x, y)
+                   if item.mobile and item.hostile),
+                  key=lambda band: (band.name, len(band.members)))
+
+
+def settlement_at(x, y):
+    """Get the settlement on a tile.
+
+    Args:
+        x (int): horizontal location
+        y (int): vertical location
+
+    Returns:
+        Settlement: settlement there, or None
+    """
+    return next((item for item in grid.items_at(x, y) if not item.mobile),
+                None)
+
+
+def chase_step(x, y, movement):
+    """Plan one day of chasing the player.
+
+    Every chaser walks the same distance field to the camera, made once
+    per day, see pathfinding.field_to. A chaser that could reach the
+    player and is no more than its movement away in a straight line
+    arrives that day, as it always has, even if the path there is longer.
+
+    Args:
+        x (int): horizontal location of the chaser
+        y (int): vertical location of the chaser
+        movement (int): miles the chaser moves per day
+
+    Returns:
+        tuple: (x, y) moved, or None if the player can't be reached
+    """
+    field = pathfinding.field_to((camera.x, camera.y), CHASE_FIELD)
+    if not field.reaches(x, y):
+        return None
+    dist_x = camera.x - x
+    dist_y = camera.y - y
+    if dist_x * dist_x + dist_y * dist_y <= movement * movement:
+        return dist_x, dist_y
+    end_x, end_y = field.step(x, y, movement)
+    return end_x - x, end_y - y
 
 
 def print_map_items():
@@ -47,28 +265,103 @@ class MapItem:
 
     Attributes:
         name (str): name
-        x (int): location horizontally from player
-        y (int): location vertically from player
+        x (int): location horizontally in the world
+        y (int): location vertically in the world
         mobile (bool): can it move
         hostile (bool): hostile to player?
         player (bool): player controlled?
         leader (Entity): being in charge
+        indexed (bool): is it tracked by the grid
+        serial (int): order it was made in, never changes
     """
 
-    def __init__(self):
-        """Create generic map item."""
+    indexed = False
+    serial = None
+    _x = 0
+    _y = 0
+
+    def __init__(self, location=None):
+        """Create generic map item.
+
+        Args:
+            location (tuple): (x, y) to put it at, somewhere near the
+                camera if None
+        """
         self.name = 'City'
-        self.x = random.randint(-100, 100)
-        self.y = random.randint(-100, 100)
-        while any((self.x == loc.x and self.y == loc.y and
-                   not self == loc) for loc in map_items):
-            self.x += 1
-            self.y += 1
+        x, y = random_location() if location is None else location
         self.mobile = False
         self.hostile = False
         self.player = False
         self.leader = entities.RPGCharacter()
+        self.enter_map(x, y)
+
+    @property
+    def x(self):
+        """int: location horizontally, kept in sync with the grid."""
+        return self._x
+
+    @x.setter
+    def x(self, value):
+        old_x = self._x
+        self._x = value
+        if self.indexed:
+            grid.move(self, old_x, self._y)
+
+    @property
+    def y(self):
+        """int: location vertically, kept in sync with the grid."""
+        return self._y
+
+    @y.setter
+    def y(self, value):
+        old_y = self._y
+        self._y = value
+        if self.indexed:
+            grid.move(self, self._x, old_y)
+
+    def enter_map(self, x, y):
+        """Place item at first free tile from (x, y) and add it to the map.
+
+        Args:
+            x (int): wanted horizontal location
+            y (int): wanted vertical location
+        """
+        global spawned
+        if self.serial is None:
+            self.serial = spawned
+            spawned += 1
+        while grid.occupied(x, y):
+            x += 1
+            y += 1
+        self._x = x
+        self._y = y
+        grid.add(self)
+        self.indexed = True
         map_items.append(self)
+        if engine is not None:
+            engine.add(self)
+        elif self.mobile:
+            self.schedule()
+
+    def leave_map(self):
+        """Remove item from the map and the grid."""
+        map_items.remove(self)
+        grid.remove(self)
+        self.indexed = False
+        if engine is not None:
+            engine.remove(self)
+
+    def __getstate__(self):
+        """Get what a save keeps, see save_game.
+
+        Returns:
+            dict: attributes, with the grid and engine links left out
+        """
+        state = dict(self.__dict__)
+        state.pop('indexed', None)
+        state['_x'] = self.x
+        state['_y'] = self.y
+        return state
 
     def __str__(self):
         """Print map item info.
@@ -93,13 +386,22 @@ class MapItem:
                 self.mobile, self.hostile,
                 self.player, self.leader.name)
 
+    def offset(self):
+        """Calculate location relative to the camera.
+
+        Returns:
+            tuple: horizontal and vertical distance from player
+        """
+        return (self.x - camera.x, self.y - camera.y)
+
     def calculate_dir(self):
         """Calculate dir from player.
 
         Returns:
             tuple: direction and distance
         """
-        dist = (self.x*self.x + self.y*self.y)**0.5
+        rel_x, rel_y = self.offset()
+        dist = (rel_x*rel_x + rel_y*rel_y)**0.5
         # atan2 gives angle from EAST in radians (-pi to pi),
         # then we normalize it to -1 to 1, then 0 to 8.
         # Rounding gives nearest cardinal direction,
@@ -107,7 +409,7 @@ class MapItem:
         # We must have a second copy of "EAST" in the
         # list as 0-8 has 9 integer slots, and in this mod 8 system,
         # 0 = 8, similar to how circles work.
-        theta = round((math.atan2(self.y, self.x)/math.pi) * 4 + 4)
+        theta = round((math.atan2(rel_y, rel_x)/math.pi) * 4 + 4)
         directions = ("E", "NE", "N", "NW",
                       "W", "SW", "S", "SE", "E")
         return (dist, directions[theta])
@@ -118,8 +420,8 @@ class Settlement(MapItem):
 
     Attributes:
         name (str): name
-        x (int): location horizontally from player
-        y (int): location vertically from player
+        x (int): location horizontally in the world
+        y (int): location vertically in the world
         mobile (bool): always False
         hostile (bool): always False
         player (bool): always False
@@ -127,32 +429,31 @@ class Settlement(MapItem):
         shop (list): list of items in stock
         recruitables (list): recruitable characters and their cost
         leader (Entity): being in charge
+        last_restock (int): day the shop, recruits and wealth are up to
     """
 
-    def __init__(self, name, wealth):
+    def __init__(self, name, wealth, location=None):
         """Create generic settlement.
 
         Args:
             name (str): Name of settlement
             wealth (int): Wealth
+            location (tuple): (x, y) to put it at, somewhere near the
+                camera if None
         """
         self.name = name
         self.wealth = wealth
-        self.x = random.randint(-100, 100)
-        self.y = random.randint(-100, 100)
-        while any((self.x == loc.x and self.y == loc.y and
-                   not self == loc) for loc in map_items):
-            self.x += 1
-            self.y += 1
+        x, y = random_location() if location is None else location
         self.mobile = False
         self.hostile = False
         self.player = False
         self.leader = entities.RPGCharacter()
         self.shop = []
         self.recruitables = []
+        self.last_restock = current_day
         self.generate_items()
         self.generate_recruitables()
-        map_items.append(self)
+        self.enter_map(x, y)
 
     def __str__(self):
         """Print map item info.
@@ -167,29 +468,30 @@ class Settlement(MapItem):
         result += f'     Location: {location[0]:.1f} miles {location[1]}\n'
         return result
 
+    def restock(self):
+        """Catch up on every day since the settlement was last traded with.
+
+        Shops and recruits only refill what was taken, so one refill is the
+        same as one per day. Wealth drift is applied for all days at once.
+        """
+        days = current_day - self.last_restock
+        if days <= 0:
+            return
+        self.last_restock = current_day
+        self.generate_items()
+        self.generate_recruitables()
+        self.wealth = drift_wealth(self.wealth, days)
+
     def generate_items(self):
         """Generate items for shop."""
-        for _x in range(len(self.shop), 10):
-            rar = random.random()
-            if rar < 0.75:
-                rand = random.randint(0, len(items.common_items) - 1)
-                item = items.common_items[rand]
-            elif rar < 0.9:
-                rand = random.randint(0, len(items.well_made_items) - 1)
-                item = items.well_made_items[rand]
-            elif rar < 0.97:
-                rand = random.randint(0, len(items.expert_items) - 1)
-                item = items.expert_items[rand]
-            else:
-                rand = random.randint(0, len(items.masterwork_items) - 1)
-                item = items.masterwork_items[rand]
-            self.shop.append(item)
+        self.shop += items.shop_table.sample_many(10 - len(self.shop))
 
+    @instrument.timed()
     def generate_recruitables(self):
         """Generate items for shop."""
         for _x in range(len(self.recruitables), 10):
             self.recruitables.append((entities.RPGCharacter(),
-                                      random.randint(20, 100)))
+                                      _economy.randint(20, 100)))
 
 
 class Band(MapItem):
@@ -197,8 +499,8 @@ class Band(MapItem):
 
     Attributes:
         name (str): name
-        x (int): location horizontally from player
-        y (int): location vertically from player
+        x (int): location horizontally in the world
+        y (int): location vertically in the world
         mobile (bool): can it move
         hostile (bool): hostile to player?
         player (bool): player controlled?
@@ -207,30 +509,37 @@ class Band(MapItem):
         movement (int): movement in miles per/turn
         gold (int): gold stored
         inv (list): items
+        slot (int): index in the band engine's arrays, None if not in it
+        last_moved (int): day the band has wandered up to
+        due_day (int): day it's booked to catch up on, see schedule
     """
 
-    def __init__(self, leader):
+    slot = None
+    due_day = None
+    _last_moved = 0
+    _movement = 10
+    _hostile = False
+
+    def __init__(self, leader, location=None):
         """Create party.
 
         Args:
             leader (Entity): leader and first member of party.
+            location (tuple): (x, y) to put it at, somewhere near the
+                camera if None
         """
         self.name = f'{leader.name}\'s Band'
-        self.x = random.randint(-100, 100)
-        self.y = random.randint(-100, 100)
-        while any((self.x == loc.x and self.y == loc.y and
-                   not self == loc) for loc in map_items):
-            self.x += 1
-            self.y += 1
+        x, y = random_location() if location is None else location
         self.mobile = True
         self.hostile = False
         self.player = False
         self.leader = leader
         self.members = [leader]
-        map_items.append(self)
         self.movement = 10
         self.gold = 0
         self.inv = []
+        self.last_moved = current_day
+        self.enter_map(x, y)
 
     def __str__(self):
         """Print map item info.
@@ -246,6 +555,95 @@ class Band(MapItem):
         result += f'     Member Count: {len(self.members)}'
         return result
 
+    @property
+    def x(self):
+        """int: location horizontally, read from the engine if in one."""
+        if self.slot is None:
+            return self._x
+        return int(engine.x[self.slot])
+
+    @x.setter
+    def x(self, value):
+        old_x = self.x
+        if self.slot is None:
+            self._x = value
+        else:
+            engine.x[self.slot] = value
+        if self.indexed:
+            grid.move(self, old_x, self.y)
+
+    @property
+    def y(self):
+        """int: location vertically, read from the engine if in one."""
+        if self.slot is None:
+            return self._y
+        return int(engine.y[self.slot])
+
+    @y.setter
+    def y(self, value):
+        old_y = self.y
+        if self.slot is None:
+            self._y = value
+        else:
+            engine.y[self.slot] = value
+        if self.indexed:
+            grid.move(self, self.x, old_y)
+
+    @property
+    def movement(self):
+        """int: movement in miles per/turn."""
+        if self.slot is None:
+            return self._movement
+        return int(engine.movement[self.slot])
+
+    @movement.setter
+    def movement(self, value):
+        if self.slot is None:
+            self._movement = value
+        else:
+            engine.movement[self.slot] = value
+
+    @property
+    def last_moved(self):
+        """int: day the band has wandered up to."""
+        if self.slot is None:
+            return self._last_moved
+        return int(engine.moved[self.slot])
+
+    @last_moved.setter
+    def last_moved(self, value):
+        if self.slot is None:
+            self._last_moved = value
+        else:
+            engine.moved[self.slot] = value
+
+    @property
+    def hostile(self):
+        """bool: hostile to player?"""
+        if self.slot is None:
+            return self._hostile
+        return bool(engine.hostile[self.slot])
+
+    @hostile.setter
+    def hostile(self, value):
+        if self.slot is None:
+            self._hostile = value
+        else:
+            engine.hostile[self.slot] = value
+
+    def __getstate__(self):
+        """Get what a save keeps, see save_game.
+
+        Returns:
+            dict: attributes, with the grid and engine links left out
+        """
+        state = super().__getstate__()
+        state.pop('slot', None)
+        state['_movement'] = self.movement
+        state['_hostile'] = self.hostile
+        state['_last_moved'] = self.last_moved
+        return state
+
     def move(self, x, y):
         """Move band by amount.
 
@@ -256,76 +654,126 @@ class Band(MapItem):
         self.x += x
         self.y += y
 
-    def wander(self, say):
-        """Randomly move in any direction.
+    @instrument.timed()
+    def wander(self, say, chase=False):
+        """Randomly move in any direction, or towards the player.
 
         Args:
-            say (bool): Print or not
+            say (bool): Log the move or not
+            chase (bool): band is in range to chase, see chasers
         """
-        if ((self.hostile and abs(self.x) <= 15 and abs(self.y) <= 15 and
-             not any(item.x == 0 and item.y == 0 for item in map_items))):
-            dist_x = -self.x
-            dist_y = -self.y
-            total_dist = math.sqrt(dist_x**2 + dist_y**2)
-            ns = 'S'
-            ew = 'W'
-            if total_dist <= self.movement:
-                if dist_y > 0:
-                    ns = 'N'
-                if dist_x > 0:
-                    ew = 'E'
-                self.move(dist_x, dist_y)
-                print(f'{self.name} has moved {dist_y} {ns}'
-                      f'and {dist_x} {ew} to you '
-                      f'and is now about to attack you')
-            else:
-                move_fraction = self.movement / total_dist
-                move_x = int(dist_x * move_fraction)
-                move_y = int(dist_y * move_fraction)
-                # Makes sure we're staying under the total movement
-                total_move = abs(move_x) + abs(move_y)
-                if total_move > self.movement:
-                    scale_factor = self.movement / total_move
-                    move_x = int(move_x * scale_factor)
-                    move_y = int(move_y * scale_factor)
-                self.move(move_x, move_y)
-                if move_y > 0:
-                    ns = 'N'
-                if move_x > 0:
-                    ew = 'E'
-                loc = self.calculate_dir()
-                print(f'{self.name} has moved {move_y} {ns}'
-                      f'and {move_x} {ew} towards you '
-                      f'and is now {loc[0]:.1f} miles {loc[1]}')
+        step = None
+        if chase and not grid.occupied(camera.x, camera.y):
+            step = chase_step(self.x, self.y, self.movement)
+        if step is not None:
+            self.move(*step)
+            self.report_chase(*step)
         else:
-            x = random.randint(-self.movement, self.movement)
-            y = self.movement - abs(x)
-            if random.random() < 0.5:
-                y = -y
+            x, y = self.random_step()
             self.move(x, y)
             if say:
-                ns = 'S'
-                ew = 'W'
-                if y > 0:
-                    ns = 'N'
-                if x > 0:
-                    ew = 'E'
-                loc = self.calculate_dir()
-                print(f'{self.name} has moved {y} {ns} and {x} {ew} '
-                      f'and is now {loc[0]:.1f} miles {loc[1]}')
-            while any((self.x == loc.x and self.y == loc.y and
-                       not self == loc) for loc in map_items):
+                self.report_move(x, y)
+            while grid.occupied(self.x, self.y, self):
                 self.x += 1
                 self.y += 1
 
+    def random_step(self):
+        """Roll one day of wandering.
+
+        Returns:
+            tuple: (x, y) moved, always movement miles in total
+        """
+        x = _wander.randint(-self.movement, self.movement)
+        y = self.movement - abs(x)
+        if _wander.random() < 0.5:
+            y = -y
+        return x, y
+
+    def schedule(self):
+        """Book the next day the band catches up on wandering.
+
+        Bands away from the player only move every COARSE_DAYS days, and
+        only the bands booked for a day are looked at on it. A band that
+        wandered in the meantime is just booked again.
+        """
+        self.due_day = max(self.last_moved + COARSE_DAYS, current_day + 1)
+        due_bands.setdefault(self.due_day, []).append(self)
+
+    def catch_up(self, day):
+        """Wander every day missed since last_moved in one go.
+
+        A few days are rolled one by one. Longer gaps are drawn as a single
+        normal step with the same variance as that many days of wandering,
+        which is what the sum of the daily steps tends to.
+
+        Args:
+            day (int): day to catch up to, included
+        """
+        days = day - self.last_moved
+        if days <= 0:
+            return
+        self.last_moved = day
+        if days < COARSE_DAYS:
+            for _i in range(days):
+                self.move(*self.random_step())
+        else:
+            var_x, var_y = walk_variance(self.movement)
+            self.move(round(_wander.gauss(0, math.sqrt(days * var_x))),
+                      round(_wander.gauss(0, math.sqrt(days * var_y))))
+        while self.indexed and grid.occupied(self.x, self.y, self):
+            self.x += 1
+            self.y += 1
+
+    def report_chase(self, x, y):
+        """Log a step towards the player, or reaching them.
+
+        Args:
+            x (int): Moved horizontally
+            y (int): Moved vertically
+        """
+        if not events.log.recording:
+            return
+        ns = 'S'
+        ew = 'W'
+        if y > 0:
+            ns = 'N'
+        if x > 0:
+            ew = 'E'
+        if self.x == camera.x and self.y == camera.y:
+            events.log.emit(events.BAND_ARRIVED, self.name, y, ns, x, ew)
+        else:
+            loc = self.calculate_dir()
+            events.log.emit(events.BAND_CHASED, self.name, y, ns, x, ew,
+                            loc[0], loc[1])
+
+    def report_move(self, x, y):
+        """Log how far the band just wandered.
+
+        Args:
+            x (int): Moved horizontally
+            y (int): Moved vertically
+        """
+        if not events.log.recording:
+            # Nothing would show it, skip working out the direction
+            return
+        ns = 'S'
+        ew = 'W'
+        if y > 0:
+            ns = 'N'
+        if x > 0:
+            ew = 'E'
+        loc = self.calculate_dir()
+        events.log.emit(events.BAND_MOVED, self.name, y, ns, x, ew,
+                        loc[0], loc[1])
+
 
 class PlayerParty(Band):
     """Stores the player's party.
 
     Attributes:
         name (str): name
-        x (int): always 0
-        y (int): always 0
+        x (int): location horizontally in the world, followed by the camera
+        y (int): location vertically in the world, followed by the camera
         mobile (bool): always True
         hostile (bool): always False
         player (bool): always True
@@ -344,8 +792,8 @@ class PlayerParty(Band):
             leader (Entity): leader and first member of party.
         """
         self.name = 'Player Party'
-        self.x = 0
-        self.y = 0
+        self.x = camera.x
+        self.y = camera.y
         self.mobile = True
         self.hostile = False
         self.player = True
@@ -371,47 +819,39 @@ class PlayerParty(Band):
         return result
 
     def move(self, x, y):
-        """Move all other items by negative amount.
+        """Move party by amount and keep the camera on it.
 
         Args:
             x (int): Moves horizontally
             y (int): Moves vertically
         """
-        for map_item in map_items:
-            map_item.x -= x
-            map_item.y -= y
+        self.x += x
+        self.y += y
+        camera.follow(self)
 
     def move_to(self, target):
-        """Move towards something.
+        """Move towards something along the cheapest path.
 
         Args:
             target (MapItem): target to move towards
         """
-        dist_x = target.x - self.x
-        dist_y = target.y - self.y
-        total_dist = math.sqrt(dist_x**2 + dist_y**2)
-        if total_dist == 0:
-            print(f"You are already at {target.name}.")
+        if target.x == self.x and target.y == self.y:
+            events.log.emit(events.PARTY_STAYED, target.name)
+            return
+        path = pathfinding.find_path((self.x, self.y), (target.x, target.y))
+        if path is None:
+            self.target_move = None
+            events.log.emit(events.PARTY_BLOCKED, target.name)
             return
-        if total_dist <= self.movement:
-            self.move(dist_x, dist_y)
+        end_x, end_y = path.walk(self.movement)
+        self.move(end_x - self.x, end_y - self.y)
+        if self.x == target.x and self.y == target.y:
             self.target_move = None
-            print(f'You have arrived at {target.name}.')
+            events.log.emit(events.PARTY_ARRIVED, target.name)
         else:
-            move_fraction = self.movement / total_dist
-            move_x = int(dist_x * move_fraction)
-            move_y = int(dist_y * move_fraction)
-            # Makes sure we're staying under the total movement
-            total_move = abs(move_x) + abs(move_y)
-            if total_move > self.movement:
-                scale_factor = self.movement / total_move
-                move_x = int(move_x * scale_factor)
-                move_y = int(move_y * scale_factor)
-            self.move(move_x, move_y)
             self.target_move = target
-            print(f'You have moved towards {target.name}\n'
-                  f'Trip will take an additional '
-                  f'{self.calculate_travel_time(target)} days')
+            events.log.emit(events.PARTY_MOVED, target.name,
+                            self.calculate_travel_time(target))
 
     def calculate_travel_time(self, target):
         """Calculate how long it will take to move towards something.
@@ -420,13 +860,12 @@ class PlayerParty(Band):
             target (MapItem): target to test
 
         Returns:
-            int: Turns to reach target
+            int: Turns to reach target, None if it can't be reached
         """
-        dist_x = target.x - self.x
-        dist_y = target.y - self.y
-        total_dist = math.sqrt(dist_x ** 2 + dist_y ** 2)
-        turns = math.ceil(total_dist / self.movement)
-        return turns
+        path = pathfinding.find_path((self.x, self.y), (target.x, target.y))
+        if path is None:
+            return None
+        return math.ceil(path.length / self.movement)
 
 
 class MonsterBand(Band):
@@ -434,8 +873,8 @@ class MonsterBand(Band):
 
     Attributes:
         name (str): name
-        x (int): distance from player horizontally
-        y (int): distance from player vertically
+        x (int): location horizontally in the world
+        y (int): location vertically in the world
         mobile (bool): always True
         hostile (bool): always True
         player (bool): always False
@@ -446,21 +885,23 @@ class MonsterBand(Band):
         inv (list): items
     """
 
-    def __init__(self, type, lvl, amt):
+    def __init__(self, type, lvl, amt, location=None):
         """Create band of monsters.
 
         Args:
             type (str): What type of enemies
             lvl (int): Level of enemies
             amt (int): Amount of enemies
+            location (tuple): (x, y) to put it at, somewhere near the
+                camera if None
         """
         # Basic stats for all
         # Elite monster in charge
         prefixes = ('Raging ', 'Vicious ', 'Bloodthirsty ',
                     'Alpha ', 'Great ', 'Giant ')
-        prefix = prefixes[random.randint(0, len(prefixes) - 1)]
+        prefix = prefixes[_world.randint(0, len(prefixes) - 1)]
         self.leader = entities.Entity(prefix + type, lvl + 1)
-        super().__init__(self.leader)
+        super().__init__(self.leader, location)
         # Generate generic monsters
         for i in range(amt - 1):
             self.members.append(entities.Entity(type, lvl))
@@ -470,18 +911,7 @@ class MonsterBand(Band):
         self.diff = lvl
         # Drops
         self.gold += 30 + ((20 * lvl) * amt)
-        if lvl == 1 or lvl == 2:
-            item_pool = items.common_items
-        elif lvl == 3:
-            item_pool = items.well_made_items
-        elif lvl == 4:
-            item_pool = items.expert_items
-        elif lvl == 5:
-            item_pool = items.masterwork_items
-        else:
-            item_pool = items.common_items
-        rand = random.randint(0, len(items.common_items) - 1)
-        self.inv = [item_pool[rand]]
+        self.inv = [items.drop_table(lvl).sample()]
 
     def __str__(self):
         """Print map item info.
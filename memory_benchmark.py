@@ -0,0 +1,97 @@
+"""RPG - Memory Benchmark.
+
+Author: Caden VanV
+Version: 10/4/2024
+"""
+
+import argparse
+import contextlib
+import gc
+import os
+import tracemalloc
+import abilities
+import entities
+import items
+
+
+def unslotted(cls):
+    """Copy a class without its __slots__, the way it was stored before.
+
+    Args:
+        cls (type): slotted class
+
+    Returns:
+        type: same methods, attributes kept in a per-instance __dict__
+    """
+    namespace = {}
+    for klass in reversed(cls.__mro__[:-1]):
+        slots = getattr(klass, '__slots__', ())
+        for key, value in vars(klass).items():
+            if key not in slots and key not in ('__slots__', '__dict__',
+                                                '__weakref__'):
+                namespace[key] = value
+    return type(f'Dict{cls.__name__}', (), namespace)
+
+
+# (name, slotted class, class with __dict__)
+CASES = tuple((cls.__name__, cls, unslotted(cls))
+              for cls in (entities.Entity, entities.RPGCharacter,
+                          items.Item, abilities.Ability))
+
+
+def bytes_per_object(factory, n, build_dict=False):
+    """Measure memory allocated per object.
+
+    Args:
+        factory (callable): makes one object with no arguments
+        n (int): objects to make
+        build_dict (bool): touch each object's __dict__ after making it
+
+    Returns:
+        float: bytes allocated per object
+    """
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    made = [factory() for _i in range(n)]
+    if build_dict:
+        # Touching __dict__ the way vars(), copy and pickle do builds it
+        # for real instead of leaving the values inline
+        for obj in made:
+            getattr(obj, '__dict__', None)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del made
+    return (after - before) / n
+
+
+def run(n=20000):
+    """Measure every hot class slotted and with a __dict__.
+
+    Args:
+        n (int): objects made per measurement
+
+    Returns:
+        list: (name, bytes with an untouched __dict__, bytes once the
+            __dict__ is built, bytes slotted) per class
+    """
+    results = []
+    with open(os.devnull, 'w') as sink, contextlib.redirect_stdout(sink):
+        for name, slotted, with_dict in CASES:
+            results.append((name, bytes_per_object(with_dict, n),
+                            bytes_per_object(with_dict, n, True),
+                            bytes_per_object(slotted, n)))
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description='Measure bytes per entity, item and ability.')
+    parser.add_argument('-n', type=int, default=20000)
+    args = parser.parse_args()
+    print('-----------------\nBytes per Object\n-----------------')
+    print('__dict__ untouched / __dict__ built -> slotted')
+    for name, inline, built, after in run(args.n):
+        print(f'{name}: {inline:.0f} / {built:.0f} -> {after:.0f} '
+              f'({1 - after / inline:.0%} / {1 - after / built:.0%} '
+              f'smaller)')
@@ -0,0 +1,373 @@
+"""RPG - Pathfinding.
+
+Author: Caden VanV
+Version: 10/4/2024
+"""
+
+import heapq
+import math
+
+# Cost of walking onto open ground, no tile costs less
+OPEN = 1
+# Cost of a tile nothing can walk onto
+BLOCKED = math.inf
+# Tiles past the box around the start and goal a search may wander into,
+# doubled each time the search runs out of room, up to MAX_SEARCH_MARGIN
+SEARCH_MARGIN = 32
+MAX_SEARCH_MARGIN = 512
+# Most paths kept in the cache
+CACHE_SIZE = 256
+# Moves are one mile on one axis, like band movement
+_STEPS = ((1, 0), (-1, 0), (0, 1), (0, -1))
+
+
+class TerrainMap:
+    """Stores what it costs to walk onto each tile.
+
+    Tiles are open ground unless given another cost. Every change bumps
+    version, which throws away paths planned over the old costs.
+
+    Attributes:
+        costs (dict): (x, y) to cost of every tile that isn't open ground
+        version (int): changes whenever a cost does
+    """
+
+    def __init__(self):
+        """Create terrain that's open ground everywhere."""
+        self.costs = {}
+        self.version = 0
+
+    def cost(self, x, y):
+        """Get the cost of walking onto a tile.
+
+        Args:
+            x (int): horizontal location
+            y (int): vertical location
+
+        Returns:
+            float: cost, BLOCKED if it can't be walked onto
+        """
+        return self.costs.get((x, y), OPEN)
+
+    def set_cost(self, x, y, cost):
+        """Change the cost of a tile.
+
+        Args:
+            x (int): horizontal location
+            y (int): vertical location
+            cost (float): new cost, at least OPEN, BLOCKED for a wall
+        """
+        if cost < OPEN:
+            raise ValueError(f'tile cost {cost} is below open ground')
+        if cost == OPEN:
+            self.costs.pop((x, y), None)
+        else:
+            self.costs[(x, y)] = cost
+        self.version += 1
+
+
+class Path:
+    """Stores a planned route.
+
+    Attributes:
+        tiles (list): (x, y) of every tile from the start to the goal
+        costs (list): cost of getting to each tile from the start
+    """
+
+    def __init__(self, tiles, costs):
+        """Create path.
+
+        Args:
+            tiles (list): (x, y) of every tile from the start to the goal
+            costs (list): cost of getting to each tile from the start
+        """
+        self.tiles = tiles
+        self.costs = costs
+
+    @property
+    def length(self):
+        """float: cost of the whole path"""
+        return self.costs[-1]
+
+    def after(self, i):
+        """Get the rest of the path from one of its tiles.
+
+        Args:
+            i (int): index of the tile to start from
+
+        Returns:
+            Path: path from that tile to the goal
+        """
+        spent = self.costs[i]
+        return Path(self.tiles[i:], [cost - spent for cost in self.costs[i:]])
+
+    def walk(self, budget):
+        """Find how far along the path a budget of movement gets.
+
+        Args:
+            budget (float): movement to spend
+
+        Returns:
+            tuple: (x, y) of the furthest tile reached
+        """
+        i = 0
+        while i + 1 < len(self.tiles) and self.costs[i + 1] <= budget:
+            i += 1
+        return self.tiles[i]
+
+
+class DistanceField:
+    """Stores the cost of the cheapest way to a goal from every tile near it.
+
+    Made once for everything heading to the same goal, like every band
+    chasing the player, instead of a search per band. Dijkstra's
+    algorithm runs outwards from the goal only as far as the tiles asked
+    about, so a few nearby chasers only pay for the tiles around them.
+
+    Attributes:
+        goal (tuple): (x, y) everything is heading to
+        radius (int): tiles away from the goal on each axis that are covered
+        terrain (TerrainMap): tile costs
+        version (int): terrain version the field was made with
+        costs (dict): (x, y) to cost of getting to the goal, final for
+            settled tiles and a best guess so far for the rest
+        settled (set): tiles whose cost is final
+    """
+
+    def __init__(self, goal, radius, terrain):
+        """Create field with only the goal settled.
+
+        Args:
+            goal (tuple): (x, y) everything is heading to
+            radius (int): tiles away from the goal on each axis to cover
+            terrain (TerrainMap): tile costs
+        """
+        self.goal = goal
+        self.radius = radius
+        self.terrain = terrain
+        self.version = terrain.version
+        self.costs = {goal: 0}
+        self.settled = set()
+        self._frontier = [(0, goal)]
+
+    def _settle(self, target):
+        """Carry on the search until a tile's cost is final.
+
+        Args:
+            target (tuple): (x, y) of the tile
+
+        Returns:
+            bool: the goal can be reached from the tile
+        """
+        costs = self.costs
+        settled = self.settled
+        frontier = self._frontier
+        tile_costs = self.terrain.costs
+        goal_x, goal_y = self.goal
+        radius = self.radius
+        while target not in settled and frontier:
+            cost, tile = heapq.heappop(frontier)
+            if tile in settled:
+                continue
+            settled.add(tile)
+            # Walking from a neighbour onto this tile costs this tile
+            step = OPEN if tile == self.goal else tile_costs.get(tile, OPEN)
+            for dx, dy in _STEPS:
+                x = tile[0] + dx
+                y = tile[1] + dy
+                if abs(x - goal_x) > radius or abs(y - goal_y) > radius:
+                    continue
+                near = (x, y)
+                if near in settled or tile_costs.get(near, OPEN) == BLOCKED:
+                    continue
+                new_cost = cost + step
+                if new_cost < costs.get(near, BLOCKED):
+                    costs[near] = new_cost
+                    heapq.heappush(frontier, (new_cost, near))
+        return target in settled
+
+    def reaches(self, x, y):
+        """Test if the goal can be reached from a tile.
+
+        Args:
+            x (int): horizontal location
+            y (int): vertical location
+
+        Returns:
+            bool: tile is covered and not cut off
+        """
+        return self._settle((x, y))
+
+    def step(self, x, y, budget):
+        """Walk downhill towards the goal.
+
+        Args:
+            x (int): horizontal location
+            y (int): vertical location
+            budget (float): movement to spend
+
+        Returns:
+            tuple: (x, y) where the walk ended
+        """
+        if not self._settle((x, y)):
+            return x, y
+        goal_x, goal_y = self.goal
+        costs = self.costs
+        # Every tile downhill of a settled tile is settled too
+        settled = self.settled
+        spent = 0
+        while (x, y) != self.goal:
+            best = None
+            for dx, dy in _STEPS:
+                tile = (x + dx, y + dy)
+                if tile not in settled:
+                    continue
+                cost = costs[tile]
+                # Even ties are broken towards the straight line
+                key = (cost, abs(abs(tile[0] - goal_x) -
+                                 abs(tile[1] - goal_y)))
+                if best is None or key < best[0]:
+                    best = (key, tile)
+            if best is None or best[0][0] >= costs[(x, y)]:
+                break
+            tile = best[1]
+            step = OPEN if tile == self.goal else self.terrain.cost(*tile)
+            if spent + step > budget:
+                break
+            spent += step
+            x, y = tile
+        return x, y
+
+
+# Terrain everything walks over
+terrain = TerrainMap()
+# Goal to (terrain version, path, tile to index in path)
+_paths = {}
+# Last distance field made, reused while its goal and terrain stay the same
+_field = None
+
+
+def reset(new_terrain=None):
+    """Swap in new terrain and forget every planned path.
+
+    Args:
+        new_terrain (TerrainMap): terrain to use, open ground if None
+    """
+    global terrain, _field
+    terrain = TerrainMap() if new_terrain is None else new_terrain
+    _paths.clear()
+    _field = None
+
+
+def _search(start, goal, margin):
+    """Find the cheapest path with A*.
+
+    Args:
+        start (tuple): (x, y) to start from
+        goal (tuple): (x, y) to reach
+        margin (int): tiles past the box around start and goal to search
+
+    Returns:
+        tuple: cheapest path or None if none was found, and whether the
+            search was held back by the edge of its box
+    """
+    start_x, start_y = start
+    goal_x, goal_y = goal
+    low_x = min(start_x, goal_x) - margin
+    high_x = max(start_x, goal_x) + margin
+    low_y = min(start_y, goal_y) - margin
+    high_y = max(start_y, goal_y) + margin
+    line_x = start_x - goal_x
+    line_y = start_y - goal_y
+    tile_costs = terrain.costs
+    rest = (abs(line_x) + abs(line_y)) * OPEN
+    # (estimate, estimate left, distance from the straight line, tile),
+    # ties go to the tile closest to the goal then to the line
+    frontier = [(rest, rest, 0, start)]
+    best = {start: 0}
+    came_from = {}
+    clipped = False
+    while frontier:
+        estimate, rest, _off_line, tile = heapq.heappop(frontier)
+        cost = best[tile]
+        if estimate - rest > cost:
+            continue
+        if tile == goal:
+            tiles = [tile]
+            while tile in came_from:
+                tile = came_from[tile]
+                tiles.append(tile)
+            tiles.reverse()
+            return Path(tiles, [best[tile] for tile in tiles]), clipped
+        for dx, dy in _STEPS:
+            x = tile[0] + dx
+            y = tile[1] + dy
+            if not (low_x <= x <= high_x and low_y <= y <= high_y):
+                clipped = True
+                continue
+            step = OPEN if (x, y) == goal else tile_costs.get((x, y), OPEN)
+            if step == BLOCKED:
+                continue
+            new_cost = cost + step
+            if new_cost < best.get((x, y), BLOCKED):
+                best[(x, y)] = new_cost
+                came_from[(x, y)] = tile
+                rest = (abs(x - goal_x) + abs(y - goal_y)) * OPEN
+                off_line = abs((x - goal_x) * line_y - (y - goal_y) * line_x)
+                heapq.heappush(frontier,
+                               (new_cost + rest, rest, off_line, (x, y)))
+    return None, clipped
+
+
+def find_path(start, goal):
+    """Get the cheapest path between two tiles.
+
+    Paths are cached by goal. Anyone standing on a cached path to the
+    same goal, like a party that walked part of it yesterday, gets the
+    rest of it without a new search. Changing the terrain throws the
+    cache away. A search that finds nothing near the start and goal is
+    tried again over a wider area, up to MAX_SEARCH_MARGIN, unless it
+    never reached the edge of its area.
+
+    Args:
+        start (tuple): (x, y) to start from
+        goal (tuple): (x, y) to reach
+
+    Returns:
+        Path: cheapest path, or None if the goal can't be reached
+    """
+    entry = _paths.get(goal)
+    if entry is not None and entry[0] == terrain.version:
+        i = entry[2].get(start)
+        if i is not None:
+            return entry[1].after(i)
+    margin = SEARCH_MARGIN
+    path, clipped = _search(start, goal, margin)
+    while path is None and clipped and margin < MAX_SEARCH_MARGIN:
+        margin *= 2
+        path, clipped = _search(start, goal, margin)
+    if path is None:
+        return None
+    if len(_paths) >= CACHE_SIZE and goal not in _paths:
+        # Dicts keep insertion order, the first entry is the oldest
+        del _paths[next(iter(_paths))]
+    _paths[goal] = (terrain.version, path,
+                    {tile: i for i, tile in enumerate(path.tiles)})
+    return path
+
+
+def field_to(goal, radius):
+    """Get a distance field to a goal, reusing the last one if it fits.
+
+    Args:
+        goal (tuple): (x, y) everything is heading to
+        radius (int): tiles away from the goal on each axis to cover
+
+    Returns:
+        DistanceField: field to the goal
+    """
+    global _field
+    if ((_field is None or _field.goal != goal or _field.radius < radius or
+         _field.terrain is not terrain or _field.version != terrain.version)):
+        _field = DistanceField(goal, radius, terrain)
+    return _field
@@ -4,76 +4,129 @@ Author: Caden VanV
 Version: 10/4/2024
 """
 
+import sys
 import actions
-import entities
-import map_items
+import hud
+import journal
 import pygame
+import renderer
+import rng
+import sim_worker
 
-import pygame
+# Frames drawn per second, however long the game takes to think
+FPS = 60
+# Window size in pixels when it opens
+SIZE = (2240, 1400)
+
+
+def start_campaign():
+    """Show the intro and start a new game, run by the sim worker.
+
+    Returns:
+        PlayerParty: the player party
+    """
+    print('____________________________________________________________\n'
+          '========================== TEXTRPG ==========================\n'
+          '‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾')
+    print('Welcome to my weekend obsession '
+          'video game creation. This is a text rpg\nusing the most generic'
+          'possible systems I could think of, like classes ripped\nstraight '
+          'from original dnd with subclasses named after DND classes of Fin '
+          'al\nFantasy, and races based off of LotR, as is only proper. This '
+          'combination of\nADHD and boredom is fully functional however, and '
+          'is questionably engaging\nat best. If you are in a menu and want'
+          'to go back, you can enter the word\n"back" or "finished" to'
+          'return.\n\nThe combt system in this game is based off of 4 stats: '
+          'attack, armor, dodge,\nand hp. The chance to hit is based off of '
+          'your attack compared to enemy\ndefense, and damage is based off of '
+          'your attack minus half of their armor.\nHP is fairly obvious, as '
+          'it determines your health.\n\nSettlements allow recruitment of new '
+          'party members, at a max of 5 as well\nas buying items to buff your '
+          'stats. Items can be equipt and unequipt in the\nparty view. You '
+          'can choose to move towards a settlement or enemy party\nevery your '
+          'turn, and you can continue to do so every turn as needed.\n\n'
+          'Wandering bands are your main source of income, and will also each '
+          'drop an\nitem that you can equip. Enemy bands will start off low '
+          'level but higher level\nbands will spawn as the game continues.\n')
+    journal.prompt('Are you ready to begin? ')
+    # Start game
+    print('__________________________________________________________________'
+          '\n========================== Begin Campaign '
+          '==========================\n'
+          '‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾')
+    journal.start_recording(seed=rng.service.seed)
+    return actions.new_game()
 
-# pygame setup
-pygame.init()
-screen = pygame.display.set_mode((2240, 1400))
-clock = pygame.time.Clock()
-running = True
-startersburg = map_items.Settlement('Startersburg', 1000)
-actions.create_world()
-startersburg.x = 0
-startersburg.y = -1
-player_pos = pygame.Vector2(screen.get_width() / 2, screen.get_height() / 2)
-print('____________________________________________________________\n'
-      '========================== TEXTRPG ==========================\n'
-      '‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾')
-print('Welcome to my weekend obsession '
-      'video game creation. This is a text rpg\nusing the most generic'
-      'possible systems I could think of, like classes ripped\nstraight '
-      'from original dnd with subclasses named after DND classes of Fin '
-      'al\nFantasy, and races based off of LotR, as is only proper. This '
-      'combination of\nADHD and boredom is fully functional however, and '
-      'is questionably engaging\nat best. If you are in a menu and want'
-      'to go back, you can enter the word\n"back" or "finished" to'
-      'return.\n\nThe combt system in this game is based off of 4 stats: '
-      'attack, armor, dodge,\nand hp. The chance to hit is based off of '
-      'your attack compared to enemy\ndefense, and damage is based off of '
-      'your attack minus half of their armor.\nHP is fairly obvious, as '
-      'it determines your health.\n\nSettlements allow recruitment of new '
-      'party members, at a max of 5 as well\nas buying items to buff your '
-      'stats. Items can be equipt and unequipt in the\nparty view. You '
-      'can choose to move towards a settlement or enemy party\nevery your '
-      'turn, and you can continue to do so every turn as needed.\n\n'
-      'Wandering bands are your main source of income, and will also each '
-      'drop an\nitem that you can equip. Enemy bands will start off low '
-      'level but higher level\nbands will spawn as the game continues.\n')
-input('Are you ready to begin? ')
-# Start game
-print('__________________________________________________________________'
-      '\n========================== Begin Campaign '
-      '==========================\n'
-      '‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾')
-main_char = entities.PlayerCharacter()
-adv_party = map_items.PlayerParty(main_char)
-while running:
-    # poll for events
-    # pygame.QUIT event means the user clicked X to close your window
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            running = False
 
-    # fill the screen with a color to wipe away anything from last frame
-    screen.fill("dark green")
-    pygame.draw.circle(screen, 'black', player_pos, 10)
-    for item in map_items.map_items:
-        if abs(item.x) <= 56 and abs(item.y) < 35:
-            if item.mobile:
-                  pygame.draw.circle(screen, 'red', ((-(item.x) + 56) * 20, (-(item.y) + 35) * 20), 10)
-            else:
-                  r = pygame.Rect((-(item.x) + 56) * 20 - 10, (-(item.y) + 35) * 20 - 10, 20, 20)
-                  pygame.draw.rect(screen, 'white', r)
-    # RENDER YOUR GAME HERE
+if __name__ == '__main__':
+    viewport = renderer.Viewport(SIZE)
+    # The game runs in its own process, the window draws its latest
+    # snapshot, started first so it doesn't inherit the window
+    worker = sim_worker.SimWorker(start_campaign, viewport.request())
+    worker.start()
+    # View the worker was last asked for
+    asked = viewport.request()
+    # pygame setup
+    pygame.init()
+    screen = pygame.display.set_mode(SIZE, pygame.RESIZABLE)
+    clock = pygame.time.Clock()
+    running = True
+    view = renderer.Renderer(viewport)
+    # F3 shows how fast the window and the game are going
+    overlay = hud.PerfOverlay()
+    # Answer being typed
+    typed = ''
+    while running:
+        # poll for events
+        # pygame.QUIT event means the user clicked X to close your window
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+            elif event.type == pygame.VIDEORESIZE:
+                viewport.size = event.size
+                view.resize()
+            elif event.type == pygame.MOUSEWHEEL:
+                viewport.zoom(event.y)
+            elif event.type == pygame.TEXTINPUT:
+                typed += event.text
+            elif event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_BACKSPACE:
+                    typed = typed[:-1]
+                elif event.key == pygame.K_PAGEUP:
+                    viewport.zoom(1)
+                elif event.key == pygame.K_PAGEDOWN:
+                    viewport.zoom(-1)
+                elif event.key == pygame.K_HOME:
+                    viewport.recenter()
+                elif event.key == pygame.K_F3:
+                    if not overlay.toggle():
+                        # Paint the map back over where it was
+                        view.invalidate()
+                elif ((event.key == pygame.K_RETURN and
+                       worker.snapshot.prompt is not None)):
+                    worker.send(typed)
+                    typed = ''
+        # Arrow keys pan for as long as they're held
+        keys = pygame.key.get_pressed()
+        dx = keys[pygame.K_RIGHT] - keys[pygame.K_LEFT]
+        dy = keys[pygame.K_DOWN] - keys[pygame.K_UP]
+        if dx or dy:
+            viewport.pan(dx, dy)
+        if not viewport.covered_by(asked):
+            asked = viewport.request()
+            worker.look(asked)
+        snapshot = worker.poll()
+        if snapshot.error is not None:
+            sys.exit(snapshot.error)
 
-    # flip() the display to put your work on screen
-    pygame.display.flip()
+        # RENDER YOUR GAME HERE
+        # Only the parts of the screen that changed are sent to the display
+        dirty = view.draw(screen, snapshot, typed)
+        dirty += overlay.draw(screen, clock.get_fps(), snapshot)
+        pygame.display.update(dirty)
 
-    clock.tick(60)  # limits FPS to 60
+        # limits FPS to 60
+        overlay.tick(clock.tick(FPS), view.draw_calls)
 
-pygame.quit()
+    worker.stop()
+    pygame.quit()
@@ -0,0 +1,359 @@
+"""RPG - Map Renderer.
+
+Author: Caden VanV
+Version: 10/4/2024
+"""
+
+import math
+import pathfinding
+import pygame
+import spatial
+
+# Pixels per mile when the window opens
+TILE = 20
+# Pixels per mile at each zoom level, furthest out first
+ZOOM_LEVELS = (1, 2, 3, 5, 8, 12, 20, 32)
+# Bands are drawn as density markers below this many pixels per mile
+CLUSTER_TILE = 4
+# Smallest width in pixels of the block a density marker counts
+CLUSTER_PIXELS = 40
+# Pixels the view moves each frame an arrow key is held
+PAN_PIXELS = 20
+GROUND = 'dark green'
+# Colour of tiles that cost more than open ground, and of blocked ones
+ROUGH = 'dark olive green'
+WALL = 'gray20'
+# Lines of printed text shown and the pixels between them
+LOG_LINES = 8
+LOG_SPACING = 30
+
+
+class Viewport:
+    """Stores which part of the map the window shows and how big.
+
+    Locations are relative to the camera, like the ones in snapshots, so
+    the view follows the party unless it's panned away.
+
+    Attributes:
+        size (tuple): (width, height) of the window in pixels
+        tile (int): pixels per mile
+        center_x (int): miles horizontally from the camera to the middle
+        center_y (int): miles vertically from the camera to the middle
+    """
+
+    def __init__(self, size, tile=TILE):
+        """Create viewport centered on the camera.
+
+        Args:
+            size (tuple): (width, height) of the window in pixels
+            tile (int): pixels per mile
+        """
+        self.size = size
+        self.tile = tile
+        self.center_x = 0
+        self.center_y = 0
+
+    @property
+    def half_width(self):
+        """int: miles shown either side of the middle"""
+        return math.ceil(self.size[0] / 2 / self.tile)
+
+    @property
+    def half_height(self):
+        """int: miles shown above and below the middle"""
+        return math.ceil(self.size[1] / 2 / self.tile)
+
+    @property
+    def cluster(self):
+        """int: miles along each side of a density marker, 0 for none"""
+        if self.tile >= CLUSTER_TILE:
+            return 0
+        cell_pixels = spatial.CELL_SIZE * self.tile
+        return spatial.CELL_SIZE * math.ceil(CLUSTER_PIXELS / cell_pixels)
+
+    @property
+    def key(self):
+        """tuple: changes whenever anything on screen would move"""
+        return (self.size, self.tile, self.center_x, self.center_y)
+
+    def to_screen(self, rel_x, rel_y):
+        """Turn a location relative to the camera into a pixel.
+
+        Args:
+            rel_x (int): miles horizontally from the camera
+            rel_y (int): miles vertically from the camera
+
+        Returns:
+            tuple: (x, y) pixel at the middle of the tile
+        """
+        return (self.size[0] // 2 + (self.center_x - rel_x) * self.tile,
+                self.size[1] // 2 + (self.center_y - rel_y) * self.tile)
+
+    def visible(self, rel_x, rel_y):
+        """Test if a location relative to the camera is on screen.
+
+        Args:
+            rel_x (int): miles horizontally from the camera
+            rel_y (int): miles vertically from the camera
+
+        Returns:
+            bool: on screen or not
+        """
+        return (abs(rel_x - self.center_x) <= self.half_width and
+                abs(rel_y - self.center_y) <= self.half_height)
+
+    def pan(self, dx, dy):
+        """Move the view across the screen.
+
+        Args:
+            dx (int): steps of PAN_PIXELS to move right
+            dy (int): steps of PAN_PIXELS to move down
+        """
+        step = max(1, PAN_PIXELS // self.tile)
+        # The map is drawn mirrored, see to_screen
+        self.center_x -= dx * step
+        self.center_y -= dy * step
+
+    def zoom(self, steps):
+        """Zoom in or out through ZOOM_LEVELS.
+
+        Args:
+            steps (int): levels to zoom in, negative to zoom out
+        """
+        below = sum(level <= self.tile for level in ZOOM_LEVELS)
+        i = max(0, min(len(ZOOM_LEVELS) - 1, below - 1 + steps))
+        self.tile = ZOOM_LEVELS[i]
+
+    def recenter(self):
+        """Put the camera back in the middle."""
+        self.center_x = 0
+        self.center_y = 0
+
+    def request(self):
+        """Get the view to ask the sim worker for.
+
+        Half a screen more is asked for on every side, so panning a
+        little is drawn right away without waiting on the worker.
+
+        Returns:
+            tuple: (center x, center y, half width, half height, cluster)
+        """
+        return (self.center_x, self.center_y,
+                self.half_width + self.half_width // 2,
+                self.half_height + self.half_height // 2, self.cluster)
+
+    def covered_by(self, view):
+        """Test if everything on screen is inside a requested view.
+
+        Args:
+            view (tuple): view from request, or None
+
+        Returns:
+            bool: the view has all that's needed at this zoom
+        """
+        if view is None:
+            return False
+        center_x, center_y, half_width, half_height, cluster = view
+        return (cluster == self.cluster and
+                abs(self.center_x - center_x) + self.half_width <=
+                half_width and
+                abs(self.center_y - center_y) + self.half_height <=
+                half_height)
+
+
+class BandSprite(pygame.sprite.Sprite):
+    """Draws one band on the map.
+
+    Attributes:
+        image (Surface): shared band picture
+        rect (Rect): where it's drawn
+    """
+
+    def __init__(self, image):
+        """Create sprite.
+
+        Args:
+            image (Surface): shared band picture
+        """
+        super().__init__()
+        self.image = image
+        self.rect = image.get_rect()
+
+
+class Renderer:
+    """Draws world snapshots, only redrawing the parts that changed.
+
+    Everything drawn comes from a sim_worker.WorldSnapshot, never the
+    live world, so the window never waits on the game and never sees it
+    half updated. Open ground, terrain, settlements, density markers and
+    the player never move while the view stays put, so they are drawn
+    once to a background surface. Bands are sprites in a RenderUpdates
+    group, made only for bands on screen, that are only moved, cleared
+    and redrawn when a snapshot with different bands comes in. Every
+    frame returns just the rectangles that changed, for
+    pygame.display.update, so a still frame costs next to nothing
+    however many items there are.
+
+    Attributes:
+        viewport (Viewport): part of the map shown
+        background (Surface): cached ground, terrain and settlements
+        bands (RenderUpdates): sprite of every band on screen
+        sprites (dict): band key to its sprite
+        font (Font): font for the text panel
+        draw_calls (int): about how many blits and fills the last draw
+            made
+    """
+
+    def __init__(self, viewport, font=None):
+        """Create renderer.
+
+        Args:
+            viewport (Viewport): part of the map shown
+            font (Font): font for the text panel, pygame's default if None
+        """
+        self.viewport = viewport
+        self.bands = pygame.sprite.RenderUpdates()
+        self.sprites = {}
+        self.font = pygame.font.Font(None, 32) if font is None else font
+        self._count_font = pygame.font.Font(None, 20)
+        self._band_image = None
+        self.draw_calls = 0
+        self.resize()
+
+    def resize(self):
+        """Make the cached surfaces fit the viewport's size again."""
+        width, height = self.viewport.size
+        self.background = pygame.Surface((width, height))
+        # Printed lines and the line being typed
+        self._panel_rect = pygame.Rect(
+            0, height - LOG_SPACING * (LOG_LINES + 1), width,
+            LOG_SPACING * (LOG_LINES + 1))
+        self.invalidate()
+
+    def invalidate(self):
+        """Forget what's on screen, so the next draw redraws all of it."""
+        self._background_key = None
+        self._bands = None
+        self._lines = None
+
+    def _rezoom(self):
+        """Make the band picture for the current zoom, dropping old sprites."""
+        size = max(self.viewport.tile, 3)
+        image = self._band_image
+        if image is not None and image.get_width() == size:
+            return
+        self._band_image = pygame.Surface((size, size), pygame.SRCALPHA)
+        pygame.draw.circle(self._band_image, 'red', (size / 2, size / 2),
+                           size / 2)
+        self.bands.empty()
+        self.sprites.clear()
+
+    def draw_background(self, snapshot):
+        """Draw ground, terrain, settlements and the player to the cache.
+
+        Args:
+            snapshot (WorldSnapshot): world to draw
+        """
+        background = self.background
+        viewport = self.viewport
+        tile = viewport.tile
+        background.fill(GROUND)
+        for rel_x, rel_y, cost in snapshot.terrain:
+            x, y = viewport.to_screen(rel_x, rel_y)
+            background.fill(WALL if cost == pathfinding.BLOCKED else ROUGH,
+                            (x - tile // 2, y - tile // 2, tile, tile))
+        size = max(tile, 3)
+        for rel_x, rel_y in snapshot.settlements:
+            x, y = viewport.to_screen(rel_x, rel_y)
+            background.fill('white', (x - size // 2, y - size // 2,
+                                      size, size))
+        for rel_x, rel_y, count in snapshot.clusters:
+            # Area grows with the bands counted, up to the block's size
+            x, y = viewport.to_screen(rel_x, rel_y)
+            radius = min(CLUSTER_PIXELS // 2, 3 + 2 * math.sqrt(count))
+            pygame.draw.circle(background, 'red', (x, y), radius)
+            if radius >= 10:
+                text = self._count_font.render(str(count), True, 'white')
+                background.blit(text, text.get_rect(center=(x, y)))
+        pygame.draw.circle(background, 'black', viewport.to_screen(0, 0),
+                           size // 2)
+
+    def sync_bands(self, snapshot):
+        """Move band sprites to where a snapshot has their bands.
+
+        Sprites are made for bands that came on screen and killed for
+        ones that left, the group remembers where they were so clear()
+        can paint over them.
+
+        Args:
+            snapshot (WorldSnapshot): world to draw
+        """
+        viewport = self.viewport
+        seen = set()
+        for key, rel_x, rel_y in snapshot.bands:
+            if not viewport.visible(rel_x, rel_y):
+                continue
+            seen.add(key)
+            sprite = self.sprites.get(key)
+            if sprite is None:
+                sprite = BandSprite(self._band_image)
+                self.sprites[key] = sprite
+                self.bands.add(sprite)
+            sprite.rect.center = viewport.to_screen(rel_x, rel_y)
+        for key in [key for key in self.sprites if key not in seen]:
+            self.sprites.pop(key).kill()
+
+    def draw(self, screen, snapshot, typed=''):
+        """Bring the screen up to date with a snapshot.
+
+        Args:
+            screen (Surface): display surface
+            snapshot (WorldSnapshot): latest world
+            typed (str): answer being typed
+
+        Returns:
+            list: rectangles that changed, for pygame.display.update
+        """
+        dirty = []
+        calls = 0
+        lines = snapshot.console[-LOG_LINES:]
+        if snapshot.prompt is not None:
+            lines += (f'{snapshot.prompt}{typed}_',)
+        background_key = (snapshot.background_key, snapshot.clusters,
+                          self.viewport.key)
+        if background_key != self._background_key:
+            # The view moved or something appeared, draw it all again
+            self._background_key = background_key
+            self._bands = snapshot.bands
+            self._rezoom()
+            self.draw_background(snapshot)
+            self.sync_bands(snapshot)
+            screen.blit(self.background, (0, 0))
+            self.bands.draw(screen)
+            dirty.append(screen.get_rect())
+            calls += (1 + len(snapshot.terrain) + len(snapshot.settlements) +
+                      len(snapshot.clusters) + len(self.bands))
+        elif snapshot.bands != self._bands or lines != self._lines:
+            self._bands = snapshot.bands
+            if lines != self._lines:
+                screen.blit(self.background, self._panel_rect,
+                            self._panel_rect)
+                dirty.append(self._panel_rect)
+                calls += 1
+            self.sync_bands(snapshot)
+            self.bands.clear(screen, self.background)
+            changed = self.bands.draw(screen)
+            dirty.extend(changed)
+            # Each changed rect was cleared and then drawn
+            calls += 2 * len(changed)
+        if dirty:
+            # Text goes over everything, so it goes after the bands
+            self._lines = lines
+            top = self._panel_rect.top
+            for i, line in enumerate(lines):
+                text = self.font.render(line, True, 'white')
+                screen.blit(text, (20, top + LOG_SPACING * i))
+            dirty.append(self._panel_rect)
+            calls += len(lines)
+        self.draw_calls = calls
+        return dirty
@@ -0,0 +1,110 @@
+"""RPG - Journal Replay.
+
+Author: Caden VanV
+Version: 10/4/2024
+"""
+
+import argparse
+import contextlib
+import os
+import time
+import actions
+import events
+import headless
+import journal
+import map_items
+import rng
+import save_game
+
+
+def nearest_snapshot(record, day):
+    """Find the latest snapshot that doesn't pass a day.
+
+    Args:
+        record (JournalRecord): journal read back
+        day (int): day to reach, None for the end
+
+    Returns:
+        tuple: (day, save path), or None if there isn't one on disk
+    """
+    best = None
+    for snap_day, path in record.snapshots:
+        if day is not None and snap_day > day:
+            continue
+        if os.path.exists(path) and (best is None or snap_day > best[0]):
+            best = (snap_day, path)
+    return best
+
+
+def replay(path, to_day=None, quiet=True, use_snapshots=True):
+    """Play a journaled campaign again with no prompts.
+
+    Starts from the nearest snapshot before to_day when there is one,
+    otherwise from the root seed, and feeds every recorded answer back in.
+
+    Args:
+        path (str): journal file
+        to_day (int): stop once this day is over, None for every day
+        quiet (bool): throw away the event log and everything printed
+        use_snapshots (bool): allow starting from a snapshot
+
+    Returns:
+        tuple: (PlayerParty, CampaignReport of the days replayed)
+    """
+    record = journal.read(path)
+    last_day = record.last_day if to_day is None else to_day
+    snapshot = nearest_snapshot(record, to_day) if use_snapshots else None
+    turn_times = []
+    with contextlib.ExitStack() as stack:
+        if quiet:
+            stack.enter_context(events.use_sinks(events.NullSink()))
+            sink = stack.enter_context(open(os.devnull, 'w'))
+            stack.enter_context(contextlib.redirect_stdout(sink))
+        stack.callback(journal.stop_replay)
+        if snapshot is not None:
+            journal.start_replay(record.answers, None)
+            player = save_game.load(snapshot[1])
+        elif record.start is not None:
+            journal.start_replay(record.answers, None)
+            player = save_game.load(record.start)
+        else:
+            journal.start_replay(record.answers, 0)
+            map_items.clear_map()
+            rng.seed(record.seed)
+            player = actions.new_game()
+        day = map_items.current_day + 1
+        start = time.perf_counter()
+        try:
+            while day <= last_day and len(player.members) > 0:
+                turn_start = time.perf_counter()
+                day = actions.global_turn(player, day)
+                turn_times.append(time.perf_counter() - turn_start)
+        except journal.EndOfJournal:
+            # The session stopped partway through a day
+            pass
+        seconds = time.perf_counter() - start
+    return player, headless.CampaignReport(len(turn_times), seconds,
+                                           turn_times,
+                                           len(player.members) > 0,
+                                           record.seed)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Replay a TextRPG journal.')
+    parser.add_argument('journal', nargs='?', default=journal.DEFAULT_PATH)
+    parser.add_argument('--to-day', type=int, default=None,
+                        help='stop once this day is over')
+    parser.add_argument('--full', action='store_true',
+                        help='replay from the start, ignoring snapshots')
+    parser.add_argument('--loud', action='store_true',
+                        help='show the game while it replays')
+    parser.add_argument('--save', help='save the world where replay stopped')
+    args = parser.parse_args()
+    try:
+        party, report = replay(args.journal, args.to_day, not args.loud,
+                               not args.full)
+    except save_game.SaveError as error:
+        parser.exit(1, f'Can\'t load the journal\'s save: {error}\n')
+    if args.save is not None:
+        save_game.save(party, args.save)
+    print(report)
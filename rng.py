@@ -0,0 +1,171 @@
+"""RPG - Random Streams.
+
+Author: Caden VanV
+Version: 10/4/2024
+"""
+
+import contextlib
+import hashlib
+import random
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional, only the band engine needs it
+    np = None
+
+# Stream names
+WORLD = 'world'
+CHARACTERS = 'characters'
+COMBAT = 'combat'
+LOOT = 'loot'
+ECONOMY = 'economy'
+SPAWNS = 'spawns'
+WANDER = 'wander'
+
+
+def derive(seed, name):
+    """Turn a root seed and a name into an independent seed.
+
+    Args:
+        seed (int or str): root seed
+        name (str): what the new seed is for
+
+    Returns:
+        int: 64 bit seed, the same for the same root and name
+    """
+    digest = hashlib.sha256(f'{seed}/{name}'.encode()).digest()
+    return int.from_bytes(digest[:8], 'big')
+
+
+class RNGService:
+    """Hands out named random streams that all come from one root seed.
+
+    Each stream is a random.Random seeded with derive(seed, name), so what
+    one part of the game draws never shifts what another part sees.
+    Streams are made once and reseeded in place, so modules can keep a
+    reference to theirs.
+
+    Attributes:
+        seed (int or str): root seed
+        streams (dict): name to random.Random
+    """
+
+    def __init__(self, seed=None):
+        """Create service.
+
+        Args:
+            seed (int or str): root seed, a random one is picked if None
+        """
+        self.streams = {}
+        self.reseed(seed)
+
+    def reseed(self, seed=None):
+        """Start every stream over from a new root seed.
+
+        Args:
+            seed (int or str): root seed, a random one is picked if None
+        """
+        if seed is None:
+            seed = random.SystemRandom().randrange(1 << 63)
+        self.seed = seed
+        for name, stream in self.streams.items():
+            stream.seed(derive(seed, name))
+
+    def stream(self, name):
+        """Get a named stream.
+
+        Args:
+            name (str): stream name, see the names at the top of the module
+
+        Returns:
+            Random: the stream, the same object every time
+        """
+        stream = self.streams.get(name)
+        if stream is None:
+            stream = random.Random(derive(self.seed, name))
+            self.streams[name] = stream
+        return stream
+
+    def numpy(self, name):
+        """Make a NumPy generator for a name.
+
+        Args:
+            name (str): what the generator is for
+
+        Returns:
+            Generator: new NumPy generator seeded from the root seed
+        """
+        if np is None:
+            raise ImportError('numpy streams need numpy installed')
+        return np.random.default_rng(derive(self.seed, name))
+
+    def spawn(self, name):
+        """Make a child service for separate work, like a worker process.
+
+        Args:
+            name (str): what the child is for, unique per child
+
+        Returns:
+            RNGService: service whose streams don't overlap this one's
+        """
+        return RNGService(derive(self.seed, name))
+
+    @contextlib.contextmanager
+    def override(self, name, seed):
+        """Reseed one stream for a while, then put it back where it was.
+
+        Args:
+            name (str): stream name
+            seed (int or str): seed to use inside the block
+        """
+        stream = self.stream(name)
+        state = stream.getstate()
+        stream.seed(seed)
+        try:
+            yield stream
+        finally:
+            stream.setstate(state)
+
+    def getstate(self):
+        """Get everything needed to continue the exact same rolls later.
+
+        Returns:
+            dict: root seed and the state of each stream
+        """
+        return {'seed': self.seed,
+                'streams': {name: stream.getstate()
+                            for name, stream in self.streams.items()}}
+
+    def setstate(self, state):
+        """Continue from a state made by getstate.
+
+        Args:
+            state (dict): root seed and stream states
+        """
+        self.reseed(state['seed'])
+        for name, stream_state in state['streams'].items():
+            self.stream(name).setstate(stream_state)
+
+
+service = RNGService()
+
+
+def seed(root=None):
+    """Start the game's streams over from a root seed.
+
+    Args:
+        root (int or str): root seed, a random one is picked if None
+    """
+    service.reseed(root)
+
+
+def stream(name):
+    """Get one of the game's named streams.
+
+    Args:
+        name (str): stream name
+
+    Returns:
+        Random: the stream
+    """
+    return service.stream(name)
@@ -4,11 +4,21 @@ Author: Caden VanV
 Version: 10/4/2024
 """
 
+import argparse
 import actions
-import entities
+import journal
 import map_items
+import rng
+import save_game
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Play TextRPG.')
+    parser.add_argument('save', nargs='?', help='save file to carry on from')
+    parser.add_argument('--seed', type=int, default=None,
+                        help='root seed for a new game, a save keeps its own')
+    args = parser.parse_args()
+    if args.seed is not None:
+        rng.seed(args.seed)
     # Intro text
     print('____________________________________________________________\n'
           '========================== TEXTRPG ==========================\n'
@@ -39,14 +49,25 @@ if __name__ == "__main__":
           '\n========================== Begin Campaign '
           '==========================\n'
           '‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾')
-    main_char = entities.PlayerCharacter()
-    adv_party = map_items.PlayerParty(main_char)
-    startersburg = map_items.Settlement('Startersburg', 1000)
-    actions.create_world()
-    startersburg.x = 0
-    startersburg.y = 0
-    day = 1
+    # Every answer is journaled so the campaign can be replayed
+    if args.save is not None:
+        # Carry on from a save, the day after it was made
+        try:
+            adv_party = save_game.load(args.save)
+        except save_game.SaveError as error:
+            parser.exit(1, f'Can\'t load {args.save}: {error}\n')
+        # Copied so saving over the file later can't break the journal
+        start = f'{journal.DEFAULT_PATH}.start.sav'
+        save_game.save(adv_party, start)
+        journal.start_recording(seed=rng.service.seed, start=start)
+        day = map_items.current_day + 1
+    else:
+        journal.start_recording(seed=rng.service.seed)
+        adv_party = actions.new_game()
+        day = 1
     while len(adv_party.members) > 0:
         day = actions.global_turn(adv_party, day)
+    journal.stop_recording()
     print('\n========================== Game Over '
           '==========================')
+    print(f'Seed: {rng.service.seed}')
@@ -0,0 +1,321 @@
+"""RPG - Save Games.
+
+Author: Caden VanV
+Version: 10/4/2024
+
+Saves are pickles, but only the game's own classes are loaded from them,
+so a save can't name other functions to call while it's read.
+"""
+
+import contextlib
+import gc
+import gzip
+import io
+import pickle
+import struct
+import abilities
+import band_engine
+import entities
+import items
+import map_items
+import pathfinding
+import rng
+
+MAGIC = b'TEXTRPG\0'
+VERSION = 2
+# Header flags
+FLAG_GZIP = 1
+# Magic, version, flags
+_HEADER = struct.Struct('>8sHH')
+DEFAULT_PATH = 'textrpg.sav'
+
+
+class SaveError(Exception):
+    """Raised when a file isn't a save this version can read."""
+
+
+# (module, name) of everything a save may ask the unpickler for, a whole
+# module can't be allowed as its imports would come with it
+ALLOWED = frozenset((('abilities', 'Ability'),
+                     ('abilities', 'AbilityState'),
+                     ('chunks', 'ChunkWorld'),
+                     ('entities', 'Entity'),
+                     ('entities', 'PlayerCharacter'),
+                     ('entities', 'RPGCharacter'),
+                     ('items', 'Item'),
+                     ('map_items', 'MonsterBand'),
+                     ('map_items', 'PlayerParty'),
+                     ('map_items', 'Settlement'),
+                     ('pathfinding', 'TerrainMap'),
+                     ('save_game', '_lookup')))
+
+
+class _Unpickler(pickle.Unpickler):
+    """Unpickler that only finds the classes in ALLOWED."""
+
+    def find_class(self, module, name):
+        """Get a class a save names, if it's allowed.
+
+        Args:
+            module (str): module name
+            name (str): name in the module
+
+        Returns:
+            type: the class, or _lookup
+        """
+        if (module, name) not in ALLOWED:
+            raise SaveError(f'save asks for {module}.{name}, '
+                            'which saves never contain')
+        return super().find_class(module, name)
+
+
+def _catalog():
+    """List every shared catalog object with a stable key.
+
+    Returns:
+        dict: id of object to (kind, index...) key
+    """
+    keys = {}
+    for i, item in enumerate(items.all_items):
+        keys[id(item)] = ('item', i)
+    for i, ability in enumerate(abilities.all_abilities):
+        keys[id(ability)] = ('ability', i)
+    for i, race in enumerate(entities.rpg_races):
+        keys[id(race)] = ('race', i)
+    for i, rpg_class in enumerate(entities.rpg_classes):
+        keys[id(rpg_class)] = ('class', i)
+        for j, subclass in enumerate(rpg_class.subclasses):
+            keys[id(subclass)] = ('subclass', i, j)
+    return keys
+
+
+def _lookup(key):
+    """Find the catalog object for a saved key.
+
+    Args:
+        key (tuple): (kind, index...) from _catalog
+
+    Returns:
+        object: catalog object
+    """
+    kind = key[0]
+    if kind == 'item':
+        return items.all_items[key[1]]
+    if kind == 'ability':
+        return abilities.all_abilities[key[1]]
+    if kind == 'race':
+        return entities.rpg_races[key[1]]
+    if kind == 'class':
+        return entities.rpg_classes[key[1]]
+    if kind == 'subclass':
+        return entities.rpg_classes[key[1]].subclasses[key[2]]
+    raise SaveError(f'unknown catalog entry {key}')
+
+
+def _reduce_catalog(obj):
+    """Save a catalog object as its key.
+
+    Args:
+        obj (object): item, ability, class, subclass or race
+
+    Returns:
+        tuple: call that finds the object again on load
+    """
+    key = _catalog_keys.get(id(obj))
+    if key is None:
+        return obj.__reduce_ex__(pickle.HIGHEST_PROTOCOL)
+    return (_lookup, (key,))
+
+
+# Catalog keys are built on first save, the catalog never changes after
+_catalog_keys = {}
+# Only catalog types are checked, so plain values pickle at full speed
+_dispatch = {items.Item: _reduce_catalog,
+             abilities.Ability: _reduce_catalog,
+             entities.RPGClass: _reduce_catalog,
+             entities.RPGSubclass: _reduce_catalog,
+             entities.RPGRace: _reduce_catalog}
+
+
+def _pickler(file):
+    """Make a pickler that writes catalog objects as their key.
+
+    Args:
+        file (file): binary file to write to
+
+    Returns:
+        Pickler: pickler for the file
+    """
+    if len(_catalog_keys) == 0:
+        _catalog_keys.update(_catalog())
+    pickler = pickle.Pickler(file, pickle.HIGHEST_PROTOCOL)
+    pickler.dispatch_table = _dispatch
+    return pickler
+
+
+@contextlib.contextmanager
+def _paused_gc():
+    """Stop the cycle collector while a save is read or written.
+
+    Loading makes hundreds of thousands of objects and none of them are
+    garbage, but each batch would still set off a full collection.
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def dumps(obj):
+    """Pickle part of the world, writing catalog objects as their key.
+
+    Args:
+        obj (object): anything from the world, like a list of map items
+
+    Returns:
+        bytes: pickled object
+    """
+    buffer = io.BytesIO()
+    with _paused_gc():
+        _pickler(buffer).dump(obj)
+    return buffer.getvalue()
+
+
+def loads(data):
+    """Unpickle something made by dumps.
+
+    Args:
+        data (bytes): pickled object
+
+    Returns:
+        object: the object, sharing catalog objects with the game
+    """
+    with _paused_gc():
+        return _unpickle(io.BytesIO(data))
+
+
+def _unpickle(file):
+    """Read one pickled object with only the game's classes allowed.
+
+    Args:
+        file (file): binary file to read from
+
+    Returns:
+        object: the object
+    """
+    try:
+        return _Unpickler(file).load()
+    except (pickle.UnpicklingError, EOFError) as error:
+        raise SaveError(f'save is damaged: {error}') from error
+
+
+def dump(file, player, compress=True):
+    """Write the whole world to an open binary file.
+
+    Args:
+        file (file): binary file to write to
+        player (PlayerParty): player party
+        compress (bool): gzip everything after the header
+    """
+    flags = FLAG_GZIP if compress else 0
+    file.write(_HEADER.pack(MAGIC, VERSION, flags))
+    engine = map_items.engine
+    state = {'day': map_items.current_day,
+             'spawned': map_items.spawned,
+             'camera': (map_items.camera.x, map_items.camera.y),
+             'rng': rng.service.getstate(),
+             'engine_rng': (None if engine is None
+                            else engine.rng.bit_generator.state),
+             'engine_bands': None if engine is None else engine.bands,
+             'player': player,
+             'map_items': map_items.map_items,
+             'world': map_items.world,
+             'terrain': pathfinding.terrain}
+    with _paused_gc():
+        if compress:
+            with gzip.GzipFile(fileobj=file, mode='wb',
+                               compresslevel=6) as body:
+                _pickler(body).dump(state)
+        else:
+            _pickler(file).dump(state)
+
+
+def restore(file):
+    """Replace the world with one read from an open binary file.
+
+    Args:
+        file (file): binary file to read from
+
+    Returns:
+        PlayerParty: the player party
+    """
+    header = file.read(_HEADER.size)
+    if len(header) < _HEADER.size:
+        raise SaveError('file is too short to be a save')
+    magic, version, flags = _HEADER.unpack(header)
+    if magic != MAGIC:
+        raise SaveError('file is not a save')
+    if version != VERSION:
+        raise SaveError(f'save version {version} is not {VERSION}')
+    with _paused_gc():
+        if flags & FLAG_GZIP:
+            with gzip.GzipFile(fileobj=file, mode='rb') as body:
+                state = _unpickle(body)
+        else:
+            state = _unpickle(file)
+    map_items.clear_map()
+    map_items.current_day = state['day']
+    map_items.spawned = state['spawned']
+    map_items.camera.x, map_items.camera.y = state['camera']
+    map_items.world = state.get('world')
+    pathfinding.reset(state.get('terrain'))
+    rng.service.setstate(state['rng'])
+    map_items.map_items.extend(state['map_items'])
+    map_items.grid.rebuild(map_items.map_items)
+    for item in map_items.map_items:
+        item.indexed = True
+        if item.mobile and state['engine_rng'] is None:
+            # Booked for the same day as before, see Band.schedule
+            map_items.due_bands.setdefault(item.due_day, []).append(item)
+    if state['engine_rng'] is not None:
+        # Same slot order as before, bands draw their steps in slot order
+        engine = band_engine.BandEngine()
+        for band in state['engine_bands']:
+            engine.add(band)
+        for item in map_items.map_items:
+            if not item.mobile:
+                engine.add(item)
+        engine.rng.bit_generator.state = state['engine_rng']
+        map_items.engine = engine
+    return state['player']
+
+
+def save(player, path=DEFAULT_PATH, compress=True):
+    """Save the whole world to a file.
+
+    Args:
+        player (PlayerParty): player party
+        path (str): file to write
+        compress (bool): gzip the save
+    """
+    with open(path, 'wb') as file:
+        dump(file, player, compress)
+
+
+def load(path=DEFAULT_PATH):
+    """Load the whole world from a file.
+
+    The day counter is the day the save was made on, carry on from the
+    day after it.
+
+    Args:
+        path (str): file to read
+
+    Returns:
+        PlayerParty: the player party
+    """
+    with open(path, 'rb') as file:
+        return restore(file)
@@ -0,0 +1,463 @@
+"""RPG - Simulation Worker.
+
+Author: Caden VanV
+Version: 10/4/2024
+"""
+
+import collections
+import contextlib
+import multiprocessing
+import queue
+import sys
+import traceback
+import actions
+import chunks
+import events
+import instrument
+import journal
+import map_items
+import pathfinding
+import spatial
+
+# Lines of printed text kept for the window
+CONSOLE_LINES = 200
+# Most bands listed one by one, past it they're counted in blocks a grid
+# cell wide even at zoom levels that don't ask for it
+MAX_BANDS = 1500
+# Put on the command queue to stop the worker at its next question
+_STOP = None
+
+
+class WorkerStopped(Exception):
+    """Raised inside the worker when the window asks it to stop."""
+
+
+class WorldSnapshot:
+    """Stores what the window needs to draw one moment of the game.
+
+    Made by the worker and never changed after, every field is a tuple or
+    a plain value, so it is cheap to send between processes and the
+    window can keep it while the worker carries on. Locations are
+    relative to the camera.
+
+    Attributes:
+        serial (int): counts up with every snapshot
+        day (int): day the world is on
+        view (tuple): (center x, center y, half width, half height,
+            cluster) of the part of the map it covers, see
+            renderer.Viewport.request
+        background_key (tuple): changes whenever anything in terrain or
+            settlements might have
+        terrain (tuple): (x, y, cost) of tiles in view that aren't open
+        settlements (tuple): (x, y) of settlements in view
+        bands (tuple): (key, x, y) of bands in view, the key stays the
+            same for a band while it exists, empty when clustered
+        clusters (tuple): (x, y, count) of the middle of each block of
+            cluster miles with bands in it, packed away ones included,
+            also used when more than MAX_BANDS bands are in view
+        items (int): map items loaded
+        turn (tuple): (phase, seconds) of the last global turn, see
+            instrument.TURN_PHASES, then ('total', seconds)
+        console (tuple): last lines printed
+        prompt (str): question waiting for an answer, None while busy
+        party (tuple): (name, hp, max hp) of each party member
+        gold (int): party gold
+        finished (bool): the campaign is over
+        error (str): traceback if the game crashed, otherwise None
+    """
+
+    __slots__ = ('serial', 'day', 'view', 'background_key', 'terrain',
+                 'settlements', 'bands', 'clusters', 'items', 'turn',
+                 'console', 'prompt', 'party', 'gold', 'finished', 'error')
+
+    def __init__(self, serial, day, view, background_key, terrain,
+                 settlements, bands, clusters, items, turn, console, prompt,
+                 party, gold, finished, error=None):
+        """Create snapshot, see the class attributes."""
+        self.serial = serial
+        self.day = day
+        self.view = view
+        self.background_key = background_key
+        self.terrain = terrain
+        self.settlements = settlements
+        self.bands = bands
+        self.clusters = clusters
+        self.items = items
+        self.turn = turn
+        self.console = console
+        self.prompt = prompt
+        self.party = party
+        self.gold = gold
+        self.finished = finished
+        self.error = error
+
+
+class ConsoleCapture:
+    """Keeps the last lines printed while still printing them.
+
+    Attributes:
+        lines (deque): finished lines, newest last
+        partial (str): text printed since the last newline
+        echo (file): where text is also written, or None
+    """
+
+    def __init__(self, size=CONSOLE_LINES, echo=None):
+        """Create capture.
+
+        Args:
+            size (int): lines kept
+            echo (file): where text is also written, or None
+        """
+        self.lines = collections.deque(maxlen=size)
+        self.partial = ''
+        self.echo = echo
+
+    def write(self, text):
+        """Take printed text.
+
+        Args:
+            text (str): text printed
+
+        Returns:
+            int: characters taken
+        """
+        if self.echo is not None:
+            self.echo.write(text)
+        *done, self.partial = (self.partial + text).split('\n')
+        self.lines.extend(done)
+        return len(text)
+
+    def flush(self):
+        """Flush the echo."""
+        if self.echo is not None:
+            self.echo.flush()
+
+    def recent(self):
+        """Get what's on screen right now.
+
+        Returns:
+            tuple: finished lines, then the partial one if there is one
+        """
+        if self.partial:
+            return tuple(self.lines) + (self.partial,)
+        return tuple(self.lines)
+
+
+class SimWorker:
+    """Runs the game in its own process for a window to show.
+
+    The game is played exactly as in the console. Every question goes
+    through journal.prompt, which the worker answers from a queue of
+    commands the window sends. The window also tells it which part of the
+    map it's looking at, and only that part goes into snapshots. Whenever
+    the game waits for an answer or finishes a day, the worker sends a new
+    WorldSnapshot back. The window only ever draws the latest snapshot. A
+    separate process means a long day never holds the interpreter lock the
+    window needs, so frames keep coming at full speed, and the window
+    never sees the world half updated.
+
+    Attributes:
+        commands (Queue): answers typed in the window
+        snapshots (Queue): snapshots from the worker, oldest first
+        snapshot (WorldSnapshot): latest snapshot received
+        process (Process): process the game runs in
+    """
+
+    def __init__(self, setup, view, echo=True):
+        """Create worker, call start to run it.
+
+        Args:
+            setup (function): starts the game and returns the player party,
+                must be a module level function so the worker can find it
+            view (tuple): part of the map to show at first, see look
+            echo (bool): print the game to the console as well
+        """
+        self.commands = multiprocessing.Queue()
+        self.snapshots = multiprocessing.Queue()
+        self.snapshot = WorldSnapshot(0, 0, None, None, (), (), (), (), 0,
+                                      (), (), None, (), 0, False)
+        self.process = multiprocessing.Process(
+            target=_serve, name='sim', daemon=True,
+            args=(setup, view, echo, self.commands, self.snapshots))
+
+    def start(self):
+        """Start playing."""
+        self.process.start()
+
+    def poll(self):
+        """Take every snapshot that has come in, keeping the newest.
+
+        Returns:
+            WorldSnapshot: latest snapshot
+        """
+        while True:
+            try:
+                self.snapshot = self.snapshots.get_nowait()
+            except queue.Empty:
+                return self.snapshot
+
+    def send(self, text):
+        """Answer the question the game is asking.
+
+        Args:
+            text (str): what was typed
+        """
+        self.commands.put(text)
+
+    def look(self, view):
+        """Change the part of the map snapshots cover.
+
+        Takes effect the next time the game waits for an answer, which is
+        right away unless it's in the middle of a day.
+
+        Args:
+            view (tuple): (center x, center y, half width, half height,
+                cluster) relative to the camera, cluster is miles along
+                each side of a density marker or 0 to list every band
+        """
+        self.commands.put(view)
+
+    def stop(self, timeout=1):
+        """Stop the game the next time it asks something.
+
+        Args:
+            timeout (float): seconds to wait before ending it anyway
+        """
+        self.commands.put(_STOP)
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.terminate()
+
+
+def _serve(setup, view, echo, commands, snapshots):
+    """Play a game in the worker process, see SimWorker.
+
+    Args:
+        setup (function): starts the game and returns the player party
+        view (tuple): part of the map to show at first, see SimWorker.look
+        echo (bool): print the game to the console as well
+        commands (Queue): answers from the window
+        snapshots (Queue): where snapshots go
+    """
+    session = Session(view, commands.get, snapshots.put,
+                      sys.__stdout__ if echo else None)
+    try:
+        session.run(setup)
+    finally:
+        journal.stop_recording()
+        # Worker processes end without running exit handlers
+        instrument.write_at_exit()
+        snapshots.close()
+        snapshots.join_thread()
+
+
+class Session:
+    """Plays one game, answering questions and publishing snapshots.
+
+    Attributes:
+        view (tuple): part of the map snapshots cover, see SimWorker.look
+        receive (function): waits for the next answer
+        send (function): hands a snapshot to the window
+        console (ConsoleCapture): everything the game printed
+        snapshot (WorldSnapshot): last snapshot sent
+        player (PlayerParty): player party once set up
+    """
+
+    def __init__(self, view, receive, send, echo=None):
+        """Create session.
+
+        Args:
+            view (tuple): part of the map snapshots cover
+            receive (function): waits for the next answer
+            send (function): hands a snapshot to the window
+            echo (file): where printed text is also written, or None
+        """
+        self.view = view
+        self.receive = receive
+        self.send = send
+        self.console = ConsoleCapture(echo=echo)
+        self.snapshot = None
+        self.player = None
+
+    def ask(self, text):
+        """Wait for an answer from the window, used as journal's reader.
+
+        Args:
+            text (str): question
+
+        Returns:
+            str: answer
+        """
+        events.flush()
+        self.publish(text)
+        answer = self.receive()
+        while isinstance(answer, tuple):
+            # The window moved, show it the same question in the new view
+            self.view = answer
+            self.publish(text)
+            answer = self.receive()
+        if answer is _STOP:
+            raise WorkerStopped()
+        # Shown after the question, like typing into the console
+        print(f'{text}{answer}')
+        self.publish()
+        return answer
+
+    def run(self, setup):
+        """Play until the party is wiped out or the window stops it.
+
+        Args:
+            setup (function): starts the game and returns the player party
+        """
+        error = None
+        with contextlib.ExitStack() as stack:
+            stack.enter_context(contextlib.redirect_stdout(self.console))
+            stack.enter_context(journal.use_reader(self.ask))
+            stack.enter_context(events.use_sinks(events.ConsoleSink()))
+            try:
+                self.player = setup()
+                day = map_items.current_day + 1
+                while len(self.player.members) > 0:
+                    day = actions.global_turn(self.player, day)
+                    self.publish()
+                print('\n========================== Game Over '
+                      '==========================')
+            except WorkerStopped:
+                pass
+            except Exception:
+                error = traceback.format_exc()
+                print(error)
+        self.publish(finished=True, error=error)
+
+    def publish(self, prompt=None, finished=False, error=None):
+        """Make a new snapshot of the view and send it to the window.
+
+        Args:
+            prompt (str): question being asked, if any
+            finished (bool): the game is over
+            error (str): traceback if the game crashed
+        """
+        old = self.snapshot
+        view = self.view
+        center_x, center_y, half_width, half_height, cluster = view
+        camera = map_items.camera
+        terrain = pathfinding.terrain
+        background_key = (camera.x, camera.y, view, id(terrain),
+                          terrain.version, map_items.grid.version)
+        if old is not None and old.background_key[:5] == background_key[:5]:
+            terrain_tiles = old.terrain
+        else:
+            terrain_tiles = self._terrain_in_view()
+        left = camera.x + center_x - half_width
+        top = camera.y + center_y - half_height
+        right = camera.x + center_x + half_width
+        bottom = camera.y + center_y + half_height
+        settlements = []
+        bands = []
+        counts = {}
+        for item in map_items.grid.items_in_box(left, top, right, bottom):
+            if not item.mobile:
+                settlements.append(item.offset())
+            elif item.player:
+                continue
+            elif cluster:
+                block = (item.x // cluster, item.y // cluster)
+                counts[block] = counts.get(block, 0) + 1
+            else:
+                rel_x, rel_y = item.offset()
+                bands.append((id(item), rel_x, rel_y))
+        if len(bands) > MAX_BANDS:
+            # Too crowded to draw band by band at 60 frames a second
+            cluster = spatial.CELL_SIZE
+            for _key, rel_x, rel_y in bands:
+                block = ((camera.x + rel_x) // cluster,
+                         (camera.y + rel_y) // cluster)
+                counts[block] = counts.get(block, 0) + 1
+            bands = []
+        clusters = ()
+        if cluster:
+            clusters = self._clusters(counts, cluster, left, top, right,
+                                      bottom)
+        player = self.player
+        party = ()
+        gold = 0
+        if player is not None:
+            party = tuple((char.name, char.cur_hp, char.max_hp)
+                          for char in player.members)
+            gold = player.gold
+        turn = ()
+        if actions.last_turn:
+            turn = tuple((phase, actions.last_turn[phase])
+                         for phase in instrument.TURN_PHASES + ('total',))
+        self.snapshot = WorldSnapshot(
+            1 if old is None else old.serial + 1, map_items.current_day,
+            view, background_key, terrain_tiles, tuple(settlements),
+            tuple(bands), clusters, len(map_items.map_items), turn,
+            self.console.recent(), prompt, party, gold, finished, error)
+        self.send(self.snapshot)
+
+    def _clusters(self, counts, cluster, left, top, right, bottom):
+        """Turn band counts per block into density markers.
+
+        Bands in chunks that are packed away count too, as one marker in
+        the middle of their chunk, so zooming out over explored land
+        doesn't show it empty.
+
+        Args:
+            counts (dict): (block x, block y) to bands in it
+            cluster (int): miles along each side of a block
+            left (int): lowest horizontal location in view
+            top (int): lowest vertical location in view
+            right (int): highest horizontal location in view
+            bottom (int): highest vertical location in view
+
+        Returns:
+            tuple: (x, y, count) relative to the camera
+        """
+        camera = map_items.camera
+        half = cluster // 2
+        markers = [(block_x * cluster + half - camera.x,
+                    block_y * cluster + half - camera.y, count)
+                   for (block_x, block_y), count in counts.items()]
+        world = map_items.world
+        if world is not None:
+            half = chunks.CHUNK_SIZE // 2
+            for (chunk_x, chunk_y), count in world.dormant.items():
+                x = chunk_x * chunks.CHUNK_SIZE + half
+                y = chunk_y * chunks.CHUNK_SIZE + half
+                if count > 0 and left <= x <= right and top <= y <= bottom:
+                    markers.append((x - camera.x, y - camera.y, count))
+        markers.sort()
+        return tuple(markers)
+
+    def _terrain_in_view(self):
+        """List the tiles in view that aren't open ground.
+
+        Returns:
+            tuple: (x, y, cost) relative to the camera
+        """
+        costs = pathfinding.terrain.costs
+        if len(costs) == 0:
+            return ()
+        camera = map_items.camera
+        center_x, center_y, half_width, half_height, _cluster = self.view
+        low_x = center_x - half_width
+        high_x = center_x + half_width
+        low_y = center_y - half_height
+        high_y = center_y + half_height
+        tiles = []
+        if len(costs) < (high_x - low_x + 1) * (high_y - low_y + 1):
+            # Zoomed far out, there are fewer costly tiles than tiles in view
+            for (x, y), cost in costs.items():
+                rel_x = x - camera.x
+                rel_y = y - camera.y
+                if low_x <= rel_x <= high_x and low_y <= rel_y <= high_y:
+                    tiles.append((rel_x, rel_y, cost))
+            tiles.sort()
+            return tuple(tiles)
+        for rel_x in range(low_x, high_x + 1):
+            for rel_y in range(low_y, high_y + 1):
+                cost = costs.get((camera.x + rel_x, camera.y + rel_y))
+                if cost is not None:
+                    tiles.append((rel_x, rel_y, cost))
+        return tuple(tiles)
@@ -0,0 +1,336 @@
+"""RPG - Spatial Index.
+
+Author: Caden VanV
+Version: 10/4/2024
+"""
+
+import itertools
+import math
+
+# Width of a grid cell in miles, roughly one day of band movement
+CELL_SIZE = 16
+
+
+class GridIndex:
+    """Stores map items in a uniform grid of square cells.
+
+    Items are also kept by their exact tile, so asking what is on one
+    tile is a single dict lookup.
+
+    Attributes:
+        cell_size (int): width of a cell in miles
+        cells (dict): cell coordinates to list of items in that cell
+        tiles (dict): (x, y) to list of items on that tile
+        version (int): changes whenever an item is added or removed
+    """
+
+    def __init__(self, cell_size=CELL_SIZE):
+        """Create empty index.
+
+        Args:
+            cell_size (int): width of a cell in miles
+        """
+        self.cell_size = cell_size
+        self.cells = {}
+        self.tiles = {}
+        self.version = 0
+
+    def __len__(self):
+        """Count indexed items.
+
+        Returns:
+            int: amount of items in the index
+        """
+        return sum(len(bucket) for bucket in self.cells.values())
+
+    def cell(self, x, y):
+        """Get the cell a location falls in.
+
+        Args:
+            x (int): horizontal location
+            y (int): vertical location
+
+        Returns:
+            tuple: cell coordinates
+        """
+        return (x // self.cell_size, y // self.cell_size)
+
+    def add(self, item):
+        """Add item at its current location.
+
+        Args:
+            item (MapItem): item being added
+        """
+        key = self.cell(item.x, item.y)
+        bucket = self.cells.get(key)
+        if bucket is None:
+            self.cells[key] = [item]
+        else:
+            bucket.append(item)
+        self._add_tile(item, item.x, item.y)
+        self.version += 1
+
+    def _add_tile(self, item, x, y):
+        """Put item on a tile.
+
+        Args:
+            item (MapItem): item being added
+            x (int): horizontal location
+            y (int): vertical location
+        """
+        here = self.tiles.get((x, y))
+        if here is None:
+            self.tiles[(x, y)] = [item]
+        else:
+            here.append(item)
+
+    def _remove_tile(self, item, x, y):
+        """Take item off a tile.
+
+        Args:
+            item (MapItem): item being removed
+            x (int): horizontal location
+            y (int): vertical location
+        """
+        here = self.tiles[(x, y)]
+        here.remove(item)
+        if not here:
+            del self.tiles[(x, y)]
+
+    def remove(self, item, x=None, y=None):
+        """Remove item from the index.
+
+        Args:
+            item (MapItem): item being removed
+            x (int): location it was indexed at, defaults to item.x
+            y (int): location it was indexed at, defaults to item.y
+        """
+        if x is None:
+            x = item.x
+        if y is None:
+            y = item.y
+        key = self.cell(x, y)
+        bucket = self.cells[key]
+        bucket.remove(item)
+        if not bucket:
+            del self.cells[key]
+        self._remove_tile(item, x, y)
+        self.version += 1
+
+    def move(self, item, old_x, old_y):
+        """Update an item after its location changed.
+
+        Args:
+            item (MapItem): item that moved, already at its new location
+            old_x (int): previous horizontal location
+            old_y (int): previous vertical location
+        """
+        # Locations can be properties that read an array, read them once
+        x = item.x
+        y = item.y
+        if old_x == x and old_y == y:
+            return
+        self._remove_tile(item, old_x, old_y)
+        self._add_tile(item, x, y)
+        old_key = self.cell(old_x, old_y)
+        key = self.cell(x, y)
+        if old_key != key:
+            bucket = self.cells[old_key]
+            bucket.remove(item)
+            if not bucket:
+                del self.cells[old_key]
+            bucket = self.cells.get(key)
+            if bucket is None:
+                self.cells[key] = [item]
+            else:
+                bucket.append(item)
+
+    def clear(self):
+        """Remove every item."""
+        self.cells = {}
+        self.tiles = {}
+        self.version += 1
+
+    def rebuild(self, items):
+        """Throw away the index and add items again.
+
+        Args:
+            items (list): every item that should be indexed
+        """
+        self.clear()
+        for item in items:
+            self.add(item)
+
+    def items_at(self, x, y):
+        """Get all items on a tile.
+
+        Args:
+            x (int): horizontal location
+            y (int): vertical location
+
+        Returns:
+            list: items at exactly (x, y)
+        """
+        return list(self.tiles.get((x, y), ()))
+
+    def occupied(self, x, y, ignore=None):
+        """Test if anything other than ignore is on a tile.
+
+        Args:
+            x (int): horizontal location
+            y (int): vertical location
+            ignore (MapItem): item that doesn't count, usually the mover
+
+        Returns:
+            bool: is the tile taken
+        """
+        here = self.tiles.get((x, y))
+        if here is None:
+            return False
+        return len(here) > 1 or here[0] is not ignore
+
+    def items_within(self, x, y, radius):
+        """Get all items within a distance of a location.
+
+        Only the cells the circle overlaps are looked at. The items come
+        back in no particular order, callers sort them if it matters.
+
+        Args:
+            x (int): horizontal location
+            y (int): vertical location
+            radius (float): max distance in miles
+
+        Returns:
+            list: items no further than radius away
+        """
+        result = []
+        reach = math.floor(radius)
+        low_x, low_y = self.cell(x - reach, y - reach)
+        high_x, high_y = self.cell(x + reach, y + reach)
+        limit = radius * radius
+        for cell_x in range(low_x, high_x + 1):
+            for cell_y in range(low_y, high_y + 1):
+                for item in self.cells.get((cell_x, cell_y), ()):
+                    dist_x = item.x - x
+                    dist_y = item.y - y
+                    if dist_x * dist_x + dist_y * dist_y <= limit:
+                        result.append(item)
+        return result
+
+    def items_in_box(self, left, top, right, bottom):
+        """Get all items inside a rectangle.
+
+        Only the cells the rectangle overlaps are looked at, so a view of
+        a small part of a big world costs next to nothing.
+
+        Args:
+            left (int): lowest horizontal location inside
+            top (int): lowest vertical location inside
+            right (int): highest horizontal location inside
+            bottom (int): highest vertical location inside
+
+        Returns:
+            list: items in the rectangle, edges included
+        """
+        result = []
+        low_x, low_y = self.cell(left, top)
+        high_x, high_y = self.cell(right, bottom)
+        cells = self.cells
+        if (high_x - low_x + 1) * (high_y - low_y + 1) > len(cells):
+            # Zoomed far out, there are fewer filled cells than cells in view
+            keys = [key for key in cells
+                    if low_x <= key[0] <= high_x and low_y <= key[1] <= high_y]
+        else:
+            keys = [(cell_x, cell_y) for cell_x in range(low_x, high_x + 1)
+                    for cell_y in range(low_y, high_y + 1)]
+        for key in keys:
+            for item in cells.get(key, ()):
+                if left <= item.x <= right and top <= item.y <= bottom:
+                    result.append(item)
+        return result
+
+    def _ring(self, center_x, center_y, ring):
+        """List the cells a ring of cells away from a center cell.
+
+        Args:
+            center_x (int): horizontal cell coordinate of the center
+            center_y (int): vertical cell coordinate of the center
+            ring (int): cells away on the furthest axis
+
+        Returns:
+            list: cell coordinates on the ring
+        """
+        if ring == 0:
+            return [(center_x, center_y)]
+        low_x = center_x - ring
+        high_x = center_x + ring
+        cells = []
+        for cell_x in range(low_x, high_x + 1):
+            cells.append((cell_x, center_y - ring))
+            cells.append((cell_x, center_y + ring))
+        for cell_y in range(center_y - ring + 1, center_y + ring):
+            cells.append((low_x, cell_y))
+            cells.append((high_x, cell_y))
+        return cells
+
+    def nearest(self, x, y, k=None, radius=None, accept=None):
+        """Get the items closest to a location, closest first.
+
+        Cells are searched in rings around the location and the search
+        stops once nothing further out could make the list, so a small k
+        or radius only looks at the cells around the location. Ties are
+        broken by location then name, never by cell order, so the same
+        world always gives the same list.
+
+        Args:
+            x (int): horizontal location
+            y (int): vertical location
+            k (int): most items to return, None for no limit
+            radius (float): max distance in miles, None for no limit
+            accept (function): items it returns False for are skipped
+
+        Returns:
+            list: items sorted by distance
+        """
+        if k is not None and k <= 0:
+            return []
+        center_x, center_y = self.cell(x, y)
+        if radius is None:
+            limit = math.inf
+            last_ring = None
+            left = len(self)
+        else:
+            limit = radius * radius
+            reach = math.floor(radius)
+            low_x, low_y = self.cell(x - reach, y - reach)
+            high_x, high_y = self.cell(x + reach, y + reach)
+            last_ring = max(center_x - low_x, high_x - center_x,
+                            center_y - low_y, high_y - center_y)
+            left = None
+        found = []
+        tie = itertools.count()
+        ring = 0
+        while last_ring is None or ring <= last_ring:
+            for key in self._ring(center_x, center_y, ring):
+                bucket = self.cells.get(key, ())
+                if left is not None:
+                    left -= len(bucket)
+                for item in bucket:
+                    dist_x = item.x - x
+                    dist_y = item.y - y
+                    dist = dist_x * dist_x + dist_y * dist_y
+                    if dist <= limit and (accept is None or accept(item)):
+                        found.append((dist, item.x, item.y, item.name,
+                                      next(tie), item))
+            if left is not None and left <= 0:
+                break
+            if k is not None and len(found) >= k:
+                found.sort()
+                del found[k:]
+                # Everything in later rings is over ring cells away
+                edge = ring * self.cell_size
+                if found[-1][0] <= edge * edge:
+                    break
+            ring += 1
+        found.sort()
+        return [entry[-1] for entry in found[:k]]
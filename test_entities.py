@@ -0,0 +1,110 @@
+"""RPG - Entity Stat Cache Tests.
+
+Author: Caden VanV
+Version: 10/4/2024
+"""
+
+import contextlib
+import io
+import pytest
+import entities
+import rng
+
+
+class Effect:
+    """Stands in for an item or ability, the stats only read effects.
+
+    Attributes:
+        effects (tuple): (atk, ac, dge, hp) added to stats
+    """
+
+    def __init__(self, *effects):
+        """Create effect.
+
+        Args:
+            effects (int): atk, ac, dge and hp added to stats
+        """
+        self.effects = effects
+
+
+def fresh_stats(entity):
+    """Work out an entity's stats from scratch, ignoring the cache.
+
+    Args:
+        entity (Entity): entity to look at
+
+    Returns:
+        tuple: (atk, ac, dge, max_hp)
+    """
+    stats = list(entity.base_stats())
+    for source in entity.modifier_sources():
+        for i in range(4):
+            stats[i] += source.effects[i]
+    return tuple(stats)
+
+
+@pytest.fixture(autouse=True)
+def seeded():
+    """Make characters the same every run."""
+    rng.seed(11)
+
+
+def test_adding_a_modifier_clears_the_cache():
+    """Stats read after add_modifier include the new modifier."""
+    wolf = entities.Entity('Wolf', 2)
+    before = wolf.stats
+    wolf.add_modifier('rage', Effect(3, -1, 0, 5))
+    assert wolf._stats is None
+    assert wolf.stats == (before[0] + 3, before[1] - 1, before[2],
+                          before[3] + 5)
+    # Adding under the same key replaces the old one
+    wolf.add_modifier('rage', Effect(1, 0, 0, 0))
+    assert wolf._stats is None
+    assert wolf.stats == (before[0] + 1,) + before[1:]
+
+
+def test_removing_a_modifier_clears_the_cache():
+    """Stats read after remove_modifier no longer include it."""
+    wolf = entities.Entity('Wolf', 3)
+    before = wolf.stats
+    wolf.add_modifier('rage', Effect(3, -1, 0, 5))
+    wolf.add_modifier('shield', Effect(0, 4, 1, 0))
+    wolf.stats
+    wolf.remove_modifier('rage')
+    assert wolf._stats is None
+    assert wolf.stats == (before[0], before[1] + 4, before[2] + 1,
+                          before[3])
+    wolf.remove_modifier('shield')
+    assert wolf.stats == before
+
+
+def test_removing_a_missing_modifier_keeps_the_cache():
+    """Nothing changed, so the cached stats are kept."""
+    wolf = entities.Entity('Wolf', 1)
+    cached = wolf.stats
+    wolf.remove_modifier('never added')
+    assert wolf._stats is cached
+
+
+def test_invalidate_stats_picks_up_other_changes():
+    """Changes the entity can't see are picked up once invalidated."""
+    wolf = entities.Entity('Wolf', 1)
+    wolf.stats
+    wolf._base = (1, 2, 3, 4)
+    wolf.invalidate_stats()
+    assert wolf.stats == (1, 2, 3, 4)
+    entities.recompute_stats([wolf])
+    assert wolf._stats == (1, 2, 3, 4)
+
+
+def test_character_stats_follow_modifiers_and_levels():
+    """Cached character stats always match a fresh calculation."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        hero = entities.RPGCharacter()
+        assert hero.stats == fresh_stats(hero)
+        hero.add_modifier('blessing', Effect(2, 2, 2, 2))
+        assert hero.stats == fresh_stats(hero)
+        hero.level_up()
+        assert hero.stats == fresh_stats(hero)
+        hero.remove_modifier('blessing')
+        assert hero.stats == fresh_stats(hero)
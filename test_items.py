@@ -0,0 +1,88 @@
+"""RPG - Item Table Tests.
+
+Author: Caden VanV
+Version: 10/4/2024
+"""
+
+import collections
+import random
+import pytest
+import items
+
+# Picks drawn when checking sampled frequencies
+DRAWS = 200000
+
+
+def table_odds(table):
+    """Work out the exact chance of each choice from the table itself.
+
+    Args:
+        table (AliasTable): table to look at
+
+    Returns:
+        dict: choice index to chance of being picked
+    """
+    n = len(table.choices)
+    odds = collections.Counter()
+    for column in range(n):
+        odds[column] += table.prob[column] / n
+        odds[table.alias[column]] += (1 - table.prob[column]) / n
+    return odds
+
+
+def random_weights(seed):
+    """Make up weights with a few very small and very large ones.
+
+    Args:
+        seed (int): random seed
+
+    Returns:
+        list: weights
+    """
+    picks = random.Random(seed)
+    return [picks.choice((0.001, 1, 50)) * picks.random() + 0.0001
+            for _i in range(picks.randint(1, 40))]
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_table_odds_match_weights(seed):
+    """Every choice's chance in the table is its share of the weight."""
+    weights = random_weights(seed)
+    table = items.AliasTable(range(len(weights)), weights)
+    odds = table_odds(table)
+    total = sum(weights)
+    for i, weight in enumerate(weights):
+        assert odds[i] == pytest.approx(weight / total, abs=1e-12)
+
+
+@pytest.mark.parametrize('weights', ([1], [3, 1], [1, 2, 3, 4],
+                                     [0.75, 0.15, 0.07, 0.03]))
+def test_sampled_frequencies_match_weights(weights):
+    """Picks come up as often as their weights say, one at a time or many."""
+    table = items.AliasTable(range(len(weights)), weights)
+    total = sum(weights)
+    stream = random.Random(1)
+    singles = collections.Counter(table.sample(stream)
+                                  for _i in range(DRAWS))
+    many = collections.Counter(table.sample_many(DRAWS, random.Random(2)))
+    for i, weight in enumerate(weights):
+        share = weight / total
+        # Five standard deviations, so a correct table all but never fails
+        spread = 5 * (share * (1 - share) / DRAWS) ** 0.5 + 1e-9
+        assert singles[i] / DRAWS == pytest.approx(share, abs=spread)
+        assert many[i] / DRAWS == pytest.approx(share, abs=spread)
+
+
+def test_sample_many_matches_sample():
+    """Picking k at once gives the same picks as k single picks."""
+    table = items.AliasTable('abcde', [5, 1, 1, 2, 8])
+    stream = random.Random(3)
+    singles = [table.sample(stream) for _i in range(1000)]
+    assert table.sample_many(1000, random.Random(3)) == singles
+
+
+def test_zero_weight_is_never_picked():
+    """A choice with no weight never comes up."""
+    table = items.AliasTable('abc', [1, 0, 1])
+    assert table_odds(table)[1] == 0
+    assert 'b' not in table.sample_many(10000, random.Random(4))
@@ -0,0 +1,152 @@
+"""RPG - Journal Replay Tests.
+
+Author: Caden VanV
+Version: 10/4/2024
+"""
+
+import contextlib
+import io
+import random
+import pytest
+import abilities
+import actions
+import entities
+import events
+import journal
+import map_items
+import replay
+import rng
+
+# Most answers a scripted session may give before it's counted as stuck
+MAX_ANSWERS = 50000
+
+
+class ScriptedPlayer:
+    """Answers every prompt like a player would, from a seeded stream.
+
+    Attributes:
+        picks (Random): decides each answer
+        creation (list): class, subclass and race for the first character
+        answers (int): answers given so far
+    """
+
+    def __init__(self, seed):
+        """Create player.
+
+        Args:
+            seed (int): random seed for the answers
+        """
+        self.picks = random.Random(seed)
+        rpg_class = entities.rpg_classes[0]
+        self.creation = [rpg_class.name, rpg_class.subclasses[0].name,
+                         entities.rpg_races[0].name]
+        self.answers = 0
+
+    def __call__(self, text=''):
+        """Answer one prompt.
+
+        Args:
+            text (str): question asked
+
+        Returns:
+            str: answer
+        """
+        self.answers += 1
+        assert self.answers < MAX_ANSWERS, f'stuck on {text!r}'
+        picks = self.picks
+        if text == 'Choose Character Name: ':
+            return 'Hero'
+        if text == '':
+            # Character creation, then attack targets, where '' is the first
+            return self.creation.pop(0) if self.creation else ''
+        if text == 'Select Action: ':
+            return picks.choice(('rest', 'new move', 'new move', 'settlement',
+                                 'continue moving', 'fight enemy'))
+        if text == 'What would you like to do? ':
+            return picks.choice(('recruit', 'shop', 'back'))
+        if text.startswith('Enter number'):
+            return picks.choice(('1', 'finished'))
+        if text.startswith('Type item name'):
+            return 'finished'
+        if text.startswith('Do you want to use an ability'):
+            return picks.choice(('attack', 'attack', 'ability'))
+        if text.startswith('Which ability'):
+            return picks.choice(abilities.all_abilities).name
+        if text.startswith('Where do you want to go'):
+            # The first place is often the settlement the party is on
+            return str(picks.randint(1, 4))
+        if 'target' in text:
+            return str(picks.randint(1, 5))
+        return '1'
+
+
+def world(player):
+    """Sum up the state a replay has to reach.
+
+    Args:
+        player (PlayerParty): player party
+
+    Returns:
+        tuple: map items, player and day, easy to compare
+    """
+    bands = [(type(item).__name__, item.name, item.x, item.y,
+              [(char.name, char.lvl, char.cur_hp, char.stats)
+               for char in getattr(item, 'members', ())])
+             for item in map_items.map_items]
+    party = (player.x, player.y, player.gold,
+             [(char.name, char.xp, char.cur_hp, char.stats,
+               [ability.cooldown_cur for ability in char.abilities])
+              for char in player.members],
+             [item.name for item in player.inv])
+    return bands, party, map_items.current_day
+
+
+@pytest.fixture
+def recorded(tmp_path):
+    """Play a short scripted campaign with the journal on.
+
+    The script and seed were picked so the party travels, fights and
+    recruits, and is still alive at the end.
+
+    Returns:
+        tuple: journal path and the world it ended in, see world
+    """
+    path = str(tmp_path / 'test.journal')
+    with contextlib.ExitStack() as stack:
+        stack.enter_context(events.use_sinks(events.NullSink()))
+        stack.enter_context(contextlib.redirect_stdout(io.StringIO()))
+        stack.enter_context(journal.use_reader(ScriptedPlayer(7)))
+        stack.callback(journal.stop_recording)
+        map_items.clear_map()
+        rng.seed(7)
+        journal.start_recording(path, seed=rng.service.seed,
+                                snapshot_every=15)
+        player = actions.new_game()
+        day = 1
+        while day <= 40 and player.members:
+            day = actions.global_turn(player, day)
+    yield path, world(player)
+    map_items.clear_map()
+
+
+@pytest.mark.parametrize('use_snapshots', (False, True))
+def test_replay_reaches_the_same_world(recorded, use_snapshots):
+    """Feeding the answers back in ends in the exact same state."""
+    path, expected = recorded
+    player, report = replay.replay(path, use_snapshots=use_snapshots)
+    assert world(player) == expected
+    assert player.members
+    if use_snapshots:
+        # Started from the day 30 snapshot, not day 1
+        assert report.days == expected[2] - 30
+    assert journal.feed is None
+
+
+def test_snapshot_and_full_replay_agree_midway(recorded):
+    """Stopping partway gives the same world with or without snapshots."""
+    path, _expected = recorded
+    full, _report = replay.replay(path, 20, use_snapshots=False)
+    full_world = world(full)
+    jumped, report = replay.replay(path, 20)
+    assert world(jumped) == full_world
+    assert report.days == 5
@@ -0,0 +1,140 @@
+"""RPG - Pathfinding Tests.
+
+Author: Caden VanV
+Version: 10/4/2024
+"""
+
+import random
+import pytest
+import pathfinding
+
+# Walls and rough ground are only put this far from the origin, so the
+# cheapest way around them never leaves either search's area
+HALF = 10
+# Covers every tile A* may look at, see pathfinding.SEARCH_MARGIN
+RADIUS = 4 * HALF + 2 * pathfinding.SEARCH_MARGIN
+
+
+@pytest.fixture(autouse=True)
+def fresh_terrain():
+    """Give each test open ground and forget it afterwards."""
+    pathfinding.reset()
+    yield
+    pathfinding.reset()
+
+
+def make_terrain(seed):
+    """Scatter walls and rough ground around the origin.
+
+    Args:
+        seed (int): random seed
+
+    Returns:
+        TerrainMap: the terrain, also swapped in for pathfinding
+    """
+    terrain = pathfinding.TerrainMap()
+    layout = random.Random(seed)
+    for x in range(-HALF, HALF + 1):
+        for y in range(-HALF, HALF + 1):
+            roll = layout.random()
+            if roll < 0.25:
+                terrain.set_cost(x, y, pathfinding.BLOCKED)
+            elif roll < 0.45:
+                terrain.set_cost(x, y, layout.randint(2, 5))
+    pathfinding.reset(terrain)
+    return terrain
+
+
+def open_tiles(terrain):
+    """List the tiles around the origin that aren't walls.
+
+    Args:
+        terrain (TerrainMap): terrain to look at
+
+    Returns:
+        list: (x, y) of every walkable tile
+    """
+    return [(x, y) for x in range(-HALF, HALF + 1)
+            for y in range(-HALF, HALF + 1)
+            if terrain.cost(x, y) != pathfinding.BLOCKED]
+
+
+@pytest.mark.parametrize('seed', range(8))
+def test_path_cost_matches_distance_field(seed):
+    """A* and the distance field agree on the cheapest cost."""
+    terrain = make_terrain(seed)
+    tiles = open_tiles(terrain)
+    picks = random.Random(seed + 100)
+    goal = picks.choice(tiles)
+    field = pathfinding.DistanceField(goal, RADIUS, terrain)
+    for start in picks.sample(tiles, 30):
+        path = pathfinding.find_path(start, goal)
+        if path is None:
+            assert not field.reaches(*start)
+            continue
+        assert field.reaches(*start)
+        assert path.length == field.costs[start]
+        assert path.tiles[0] == start and path.tiles[-1] == goal
+
+
+@pytest.mark.parametrize('seed', range(8))
+def test_path_costs_add_up(seed):
+    """Each step of a path costs the tile it walks onto."""
+    terrain = make_terrain(seed)
+    tiles = open_tiles(terrain)
+    picks = random.Random(seed + 200)
+    goal = picks.choice(tiles)
+    for start in picks.sample(tiles, 10):
+        path = pathfinding.find_path(start, goal)
+        if path is None:
+            continue
+        for i in range(1, len(path.tiles)):
+            (old_x, old_y), (x, y) = path.tiles[i - 1], path.tiles[i]
+            assert abs(x - old_x) + abs(y - old_y) == 1
+            step = (pathfinding.OPEN if (x, y) == goal
+                    else terrain.cost(x, y))
+            assert path.costs[i] - path.costs[i - 1] == step
+
+
+def test_walled_in_start_is_unreachable():
+    """Neither search gets out of a ring of walls."""
+    terrain = make_terrain(0)
+    for x in range(-2, 3):
+        for y in range(-2, 3):
+            if max(abs(x), abs(y)) == 2:
+                terrain.set_cost(x, y, pathfinding.BLOCKED)
+            else:
+                terrain.set_cost(x, y, pathfinding.OPEN)
+    goal = (HALF + 1, HALF + 1)
+    field = pathfinding.DistanceField(goal, RADIUS, terrain)
+    assert pathfinding.find_path((0, 0), goal) is None
+    assert not field.reaches(0, 0)
+    # Inside the ring everything is still reachable
+    path = pathfinding.find_path((1, 1), (0, 0))
+    inner = pathfinding.DistanceField((0, 0), RADIUS, terrain)
+    assert inner.reaches(1, 1)
+    assert path.length == inner.costs[(1, 1)] == 2
+
+
+def test_open_ground_costs_the_distance():
+    """With no terrain the cheapest cost is the grid distance."""
+    field = pathfinding.DistanceField((3, -4), RADIUS, pathfinding.terrain)
+    for start in ((0, 0), (10, 10), (-7, 2), (3, -4)):
+        path = pathfinding.find_path(start, (3, -4))
+        distance = abs(start[0] - 3) + abs(start[1] + 4)
+        assert path.length == distance
+        assert field.reaches(*start)
+        assert field.costs[start] == distance
+
+
+def test_long_detour_widens_the_search():
+    """A wall longer than the search margin is still walked around."""
+    terrain = pathfinding.TerrainMap()
+    reach = pathfinding.SEARCH_MARGIN + 20
+    for y in range(-reach, reach + 1):
+        terrain.set_cost(0, y, pathfinding.BLOCKED)
+    pathfinding.reset(terrain)
+    path = pathfinding.find_path((-1, 0), (1, 0))
+    field = pathfinding.DistanceField((1, 0), 2 * reach, terrain)
+    assert field.reaches(-1, 0)
+    assert path.length == field.costs[(-1, 0)] == 2 * (reach + 1) + 2
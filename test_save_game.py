@@ -0,0 +1,140 @@
+"""RPG - Save Game Tests.
+
+Author: Caden VanV
+Version: 10/4/2024
+"""
+
+import contextlib
+import io
+import os
+import pickle
+import pytest
+import abilities
+import actions
+import band_engine
+import entities
+import events
+import headless
+import items
+import map_items
+import rng
+import save_game
+
+
+class Sneaky:
+    """Pickles as a call to a function no save should ever name."""
+
+    def __reduce__(self):
+        """Ask the unpickler to call os.system.
+
+        Returns:
+            tuple: function and arguments to call it with
+        """
+        return os.system, ('echo this should never run',)
+
+
+def world(player):
+    """Sum up everything a save has to bring back.
+
+    Args:
+        player (PlayerParty): player party
+
+    Returns:
+        tuple: map items, player and day, easy to compare
+    """
+    bands = [(type(item).__name__, item.name, item.x, item.y,
+              [(char.name, char.lvl, char.cur_hp, char.stats)
+               for char in getattr(item, 'members', ())])
+             for item in map_items.map_items]
+    party = (player.x, player.y, player.gold,
+             [(char.name, char.xp, char.cur_hp, char.stats)
+              for char in player.members],
+             [item.name for item in player.inv])
+    return bands, party, map_items.current_day
+
+
+def play(player, days, policy):
+    """Run global turns quietly from the day after the current one.
+
+    Args:
+        player (PlayerParty): player party
+        days (int): days to run
+        policy (Policy): player decisions
+    """
+    day = map_items.current_day + 1
+    for _i in range(days):
+        if not player.members:
+            break
+        day = actions.global_turn(player, day, policy)
+
+
+@pytest.fixture
+def quiet():
+    """Throw away everything printed and logged, clear the map after."""
+    with contextlib.ExitStack() as stack:
+        stack.enter_context(events.use_sinks(events.NullSink()))
+        stack.enter_context(contextlib.redirect_stdout(io.StringIO()))
+        yield
+    band_engine.disable()
+    map_items.clear_map()
+
+
+@pytest.mark.parametrize('compress, engine', ((True, False), (False, False),
+                                              (True, True)))
+def test_round_trip_carries_on_the_same(quiet, compress, engine):
+    """A loaded save is the same world and plays out the same way."""
+    if engine:
+        pytest.importorskip('numpy')
+    rng.seed(14)
+    policy = headless.Policy()
+    player = headless.new_campaign()
+    if engine:
+        band_engine.enable()
+    play(player, 40, policy)
+    saved = io.BytesIO()
+    save_game.dump(saved, player, compress)
+    before = world(player)
+    play(player, 20, policy)
+    after = world(player)
+    band_engine.disable()
+    saved.seek(0)
+    loaded = save_game.restore(saved)
+    assert world(loaded) == before
+    play(loaded, 20, policy)
+    assert world(loaded) == after
+
+
+def test_disallowed_global_is_rejected(quiet):
+    """A save naming anything outside ALLOWED is refused, not called."""
+    assert ('posix', 'system') not in save_game.ALLOWED
+    with pytest.raises(save_game.SaveError, match='system'):
+        save_game.loads(pickle.dumps(Sneaky()))
+    state = {'player': Sneaky()}
+    saved = io.BytesIO()
+    saved.write(save_game._HEADER.pack(save_game.MAGIC, save_game.VERSION,
+                                       0))
+    pickle.dump(state, saved)
+    saved.seek(0)
+    with pytest.raises(save_game.SaveError, match='system'):
+        save_game.restore(saved)
+
+
+def test_catalog_objects_are_shared_after_loading():
+    """Catalog items come back as the game's own objects, not copies."""
+    catalog = (list(items.all_items) + list(abilities.all_abilities) +
+               list(entities.rpg_races) + list(entities.rpg_classes))
+    loaded = save_game.loads(save_game.dumps(catalog))
+    assert len(loaded) == len(catalog)
+    assert all(new is old for new, old in zip(loaded, catalog))
+
+
+@pytest.mark.parametrize('header', (
+    b'',
+    b'TEXTRPG',
+    save_game._HEADER.pack(b'NOTASAVE', save_game.VERSION, 0),
+    save_game._HEADER.pack(save_game.MAGIC, save_game.VERSION + 1, 0),
+    save_game._HEADER.pack(save_game.MAGIC, save_game.VERSION, 0) + b'junk'))
+def test_bad_files_are_rejected(header):
+    """Short, foreign, newer and damaged files all raise SaveError."""
+    with pytest.raises(save_game.SaveError):
+        save_game.restore(io.BytesIO(header))
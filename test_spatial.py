@@ -0,0 +1,254 @@
+"""RPG - Spatial Index Tests.
+
+Author: Caden VanV
+Version: 10/4/2024
+"""
+
+import contextlib
+import io
+import random
+import pytest
+import band_engine
+import map_items
+import rng
+import spatial
+
+
+class Marker:
+    """Stands in for a map item, the index only reads these.
+
+    Attributes:
+        name (str): name
+        x (int): horizontal location
+        y (int): vertical location
+    """
+
+    def __init__(self, name, x, y):
+        """Create marker.
+
+        Args:
+            name (str): name
+            x (int): horizontal location
+            y (int): vertical location
+        """
+        self.name = name
+        self.x = x
+        self.y = y
+
+
+def brute_force(grid, everything):
+    """Work out what the index should hold by looking at every item.
+
+    Args:
+        grid (GridIndex): index, only its cell size is used
+        everything (list): every item that should be indexed
+
+    Returns:
+        tuple: cells and tiles, each a dict of key to item ids
+    """
+    cells = {}
+    tiles = {}
+    for item in everything:
+        cells.setdefault(grid.cell(item.x, item.y), set()).add(id(item))
+        tiles.setdefault((item.x, item.y), set()).add(id(item))
+    return cells, tiles
+
+
+def indexed(buckets):
+    """Turn index buckets into sets of item ids.
+
+    Args:
+        buckets (dict): cells or tiles of a GridIndex
+
+    Returns:
+        dict: key to item ids
+    """
+    result = {}
+    for key, bucket in buckets.items():
+        # Nothing is ever filed twice or left in an empty bucket
+        assert len(bucket) == len({id(item) for item in bucket}) > 0
+        result[key] = {id(item) for item in bucket}
+    return result
+
+
+def assert_matches(grid, everything):
+    """Check the index against a brute force scan.
+
+    Args:
+        grid (GridIndex): index being checked
+        everything (list): every item that should be indexed
+    """
+    cells, tiles = brute_force(grid, everything)
+    assert indexed(grid.cells) == cells
+    assert indexed(grid.tiles) == tiles
+    assert len(grid) == len(everything)
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_index_matches_brute_force(seed):
+    """Random adds, moves and removes keep cells and tiles right."""
+    moves = random.Random(seed)
+    grid = spatial.GridIndex(cell_size=8)
+    everything = []
+    for i in range(3000):
+        roll = moves.random()
+        if roll < 0.4 or not everything:
+            # Few enough tiles that items often share one
+            item = Marker(f'item {i}', moves.randint(-40, 40),
+                          moves.randint(-40, 40))
+            grid.add(item)
+            everything.append(item)
+        elif roll < 0.85:
+            item = moves.choice(everything)
+            old_x, old_y = item.x, item.y
+            item.x += moves.randint(-10, 10)
+            item.y += moves.randint(-10, 10)
+            grid.move(item, old_x, old_y)
+        else:
+            item = everything.pop(moves.randrange(len(everything)))
+            grid.remove(item)
+        if i % 100 == 0:
+            assert_matches(grid, everything)
+    assert_matches(grid, everything)
+    for item in everything:
+        assert item in grid.items_at(item.x, item.y)
+
+
+@pytest.fixture
+def world():
+    """Start an empty map with a known seed and clear it afterwards."""
+    rng.seed(7)
+    map_items.clear_map()
+    yield
+    map_items.clear_map()
+
+
+@pytest.mark.parametrize('crowded', (False, True))
+def test_band_engine_keeps_grid_in_sync(world, crowded):
+    """The grid the band engine rebuilds matches where bands really are."""
+    pytest.importorskip('numpy')
+    with contextlib.redirect_stdout(io.StringIO()):
+        for i in range(20):
+            map_items.Settlement(f'Town {i}', 1000)
+        for _i in range(300):
+            map_items.MonsterBand('Goblin', 1, 3)
+        if crowded:
+            # Everything starts on a few tiles so wanderers get nudged
+            for i, item in enumerate(map_items.map_items):
+                item.x = i % 4
+                item.y = i % 3
+        engine = band_engine.enable()
+        version = map_items.grid.version
+        for day in range(1, 30):
+            map_items.current_day = day
+            engine.step()
+            assert_matches(map_items.grid, map_items.map_items)
+            # Moving isn't adding or removing
+            assert map_items.grid.version == version
+        band_engine.disable()
+    assert_matches(map_items.grid, map_items.map_items)
+
+
+def scatter(seed, count=400, spread=60):
+    """Fill an index with items, many sharing tiles and distances.
+
+    Args:
+        seed (int): random seed
+        count (int): items to add
+        spread (int): items are put this far from the origin at most
+
+    Returns:
+        tuple: (GridIndex, list of every item, Random for further picks)
+    """
+    picks = random.Random(seed)
+    grid = spatial.GridIndex(cell_size=picks.choice((1, 3, 8, 16)))
+    everything = []
+    for i in range(count):
+        item = Marker(f'item {i:03}', picks.randint(-spread, spread),
+                      picks.randint(-spread, spread))
+        grid.add(item)
+        everything.append(item)
+    return grid, everything, picks
+
+
+def nearest_brute_force(everything, x, y, k=None, radius=None, accept=None):
+    """Find the closest items by sorting all of them.
+
+    Args:
+        everything (list): every indexed item
+        x (int): horizontal location
+        y (int): vertical location
+        k (int): most items to return, None for no limit
+        radius (float): max distance in miles, None for no limit
+        accept (function): items it returns False for are skipped
+
+    Returns:
+        list: items sorted by distance, then location, then name
+    """
+    found = []
+    for item in everything:
+        dist = (item.x - x) ** 2 + (item.y - y) ** 2
+        if radius is not None and dist > radius * radius:
+            continue
+        if accept is None or accept(item):
+            found.append((dist, item.x, item.y, item.name, item))
+    found.sort(key=lambda entry: entry[:4])
+    return [entry[-1] for entry in found[:k]]
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_nearest_matches_brute_force(seed):
+    """Every mix of k, radius and filter gives the brute force list."""
+    grid, everything, picks = scatter(seed)
+    for _i in range(200):
+        # Queries inside and well outside the filled area, often right on
+        # a cell edge where the ring early exit is tightest
+        x = picks.randint(-90, 90)
+        y = picks.randint(-90, 90)
+        if picks.random() < 0.3:
+            x -= x % grid.cell_size
+        k = picks.choice((None, 0, 1, 2, 5, 17, 1000))
+        radius = picks.choice((None, 0, 1, 2.5, 7, 20.9, 45, 200))
+        accept = picks.choice((None, lambda item: item.x % 2 == 0))
+        assert (grid.nearest(x, y, k, radius, accept) ==
+                nearest_brute_force(everything, x, y, k, radius, accept))
+
+
+def test_nearest_breaks_ties_by_location_then_name():
+    """Items the same distance away come back in a fixed order."""
+    grid = spatial.GridIndex(cell_size=4)
+    # All five away, on both sides of cell edges
+    tiles = ((5, 0), (0, 5), (-5, 0), (0, -5), (3, 4), (-3, 4), (3, -4),
+             (-4, -3), (4, 3))
+    everything = []
+    for i, (x, y) in enumerate(reversed(tiles)):
+        for name in ('b', 'a'):
+            item = Marker(f'{name}{i}', x, y)
+            grid.add(item)
+            everything.append(item)
+    expected = nearest_brute_force(everything, 0, 0)
+    assert grid.nearest(0, 0) == expected
+    assert [(item.x, item.y) for item in expected[:2]] == [(-5, 0)] * 2
+    for k in range(len(everything) + 1):
+        assert grid.nearest(0, 0, k) == expected[:k]
+        assert grid.nearest(0, 0, k, radius=5) == expected[:k]
+    assert grid.nearest(0, 0, radius=4.99) == []
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_items_in_box_matches_brute_force(seed):
+    """Boxes of every size find exactly the items inside them."""
+    grid, everything, picks = scatter(seed, count=150)
+    for _i in range(200):
+        # From a single tile up to far more cells than are filled, which
+        # switches to walking the filled cells instead
+        size = picks.choice((0, 1, 5, 20, 100, 1000))
+        left = picks.randint(-80, 80) - size // 2
+        top = picks.randint(-80, 80) - size // 2
+        right = left + picks.randint(0, size)
+        bottom = top + picks.randint(0, size)
+        inside = {id(item) for item in everything
+                  if left <= item.x <= right and top <= item.y <= bottom}
+        found = grid.items_in_box(left, top, right, bottom)
+        assert len(found) == len(inside)
+        assert {id(item) for item in found} == inside